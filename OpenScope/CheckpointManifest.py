@@ -0,0 +1,103 @@
+"""A manifest of the completed stages of a pipeline, so an interrupted run can be resumed."""
+import datetime
+import glob
+import hashlib
+import json
+import os
+
+_FILE_PREFIX = 'Checkpoint - '
+
+class CheckpointManifest:
+    """A manifest of the completed stages of a pipeline, so an interrupted run can be resumed.
+
+    Each completed stage records its output (a file or layer source) and the hash of its inputs. A stage's
+    checkpoint is only valid if the inputs are unchanged and the output still exists.
+    """
+
+    _enabled = True
+
+    _fileName = None
+
+    _stages = None
+
+#------------------- Lifecycle -------------------
+
+    def __init__(self, fileName, enabled=True):
+        self._enabled = enabled
+        self._fileName = fileName
+        self._stages = {}
+
+        if enabled and os.path.isfile(fileName):
+            try:
+                with open(fileName) as f:
+                    self._stages = json.load(f).get('stages', {})
+            except ValueError:
+                # A manifest that was only partially written is ignored
+                self._stages = {}
+
+#------------------- Public -------------------
+
+    def clear(self):
+        """Removes the manifest and the intermediate checkpoint files, once the pipeline has completed"""
+        self._stages = {}
+
+        if os.path.isfile(self._fileName):
+            os.unlink(self._fileName)
+
+        pattern = os.path.join(glob.escape(os.path.dirname(self._fileName)), '%s*' % _FILE_PREFIX)
+        for fileName in glob.glob(pattern):
+            os.unlink(fileName)
+
+    def complete(self, stage, inputHash, output):
+        """Records the stage as completed with the specified input hash and output"""
+        if not self._enabled:
+            return
+
+        self._stages[stage] = {
+            'completed': datetime.datetime.now().isoformat(),
+            'hash': inputHash,
+            'output': output
+        }
+
+        # Write to a temporary file first, so a crash doesn't leave a partial manifest
+        tmpFile = '%s.tmp' % self._fileName
+        with open(tmpFile, 'w') as f:
+            json.dump({'stages': self._stages}, f, indent=2)
+
+        os.replace(tmpFile, self._fileName)
+
+    def getFile(self, fileName):
+        """Gets the path of an intermediate checkpoint file, which is removed by clear"""
+        path = os.path.join(os.path.dirname(self._fileName), '%s%s' % (_FILE_PREFIX, fileName))
+
+        if os.path.isfile(path):
+            os.unlink(path)
+
+        return path
+
+    @staticmethod
+    def getHash(*inputs):
+        """Gets the hash of the inputs, which must be JSON serialisable (or convertible to strings)"""
+        data = json.dumps(inputs, sort_keys=True, default=str)
+
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def getOutput(self, stage, inputHash):
+        """Gets the output of the stage if it has a valid checkpoint, otherwise None"""
+        if not self._enabled:
+            return None
+
+        checkpoint = self._stages.get(stage)
+
+        if not checkpoint or checkpoint['hash'] != inputHash:
+            return None
+
+        # Layer sources may include options, eg. 'Water.gpkg|layername=Water'
+        if not os.path.isfile(checkpoint['output'].split('|')[0]):
+            return None
+
+        return checkpoint['output']
+
+    def isEnabled(self):
+        """Gets a flag indicating whether checkpoints are enabled"""
+        return self._enabled
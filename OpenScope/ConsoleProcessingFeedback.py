@@ -0,0 +1,53 @@
+"""A feedback class that reports progress on stdout"""
+import math
+import sys
+from .TextProcessingFeedback import TextProcessingFeedback
+
+class ConsoleProcessingFeedback(TextProcessingFeedback):
+    """A feedback that writes the progress text and percentage to a stream"""
+
+    _lastProgress = None
+
+    _stream = None
+
+    _step = 10
+
+    def __init__(self, stream=None, step=10):
+        super(ConsoleProcessingFeedback, self).__init__()
+
+        self._stream = stream or sys.stdout
+        self._step = step
+
+        self.progressChanged.connect(self._progressChanged)
+
+    def pushInfo(self, info):
+        """Writes an informational message"""
+        self._write(info)
+
+    def reportError(self, error, fatalError=False):
+        """Writes an error message"""
+        self._write('ERROR: %s' % error)
+
+    def setProgressText(self, text):
+        """Sets the progress text, writing it to the stream"""
+        super(ConsoleProcessingFeedback, self).setProgressText(text)
+
+        self._lastProgress = None
+        self._write(text)
+
+    def _progressChanged(self, progress):
+        """Handler for when the progress changes, writing it each time it passes a step"""
+
+        if math.isnan(progress):
+            return
+
+        step = int(progress // self._step) * self._step
+        if self._lastProgress is None or step > self._lastProgress:
+            self._lastProgress = step
+            if step > 0:
+                self._write('  %d%%' % step)
+
+    def _write(self, text):
+        """Writes a line of text to the stream"""
+        self._stream.write('%s\n' % text)
+        self._stream.flush()
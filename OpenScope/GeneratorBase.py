@@ -1,9 +1,11 @@
 """The base class from which GIS generators should inherit"""
+import json
 import os
 import tempfile
 from PyQt5.QtGui import QColor
 from qgis.core import (
     QgsCoordinateReferenceSystem,
+    QgsFeatureRequest,
     QgsMapLayer,
     QgsProject,
     QgsVectorLayer, QgsVectorFileWriter
@@ -11,11 +13,20 @@ from qgis.core import (
 from qgis.utils import iface
 from .AirportModel import AirportModel
 
+# The GeoPackage the existing terrain GeoJSON is converted to
+_EXISTING_TERRAIN_CACHE = 'Existing Terrain.gpkg'
+
+# The source (path, size and modification time) of the GeoJSON the existing terrain cache was converted from
+_EXISTING_TERRAIN_SOURCE = 'Existing Terrain.json'
+
 class GeneratorConfigBase:
     """The configuration options passed to the GeneratorBase constructor."""
 
     airportFile = None
 
+    # Where downloaded DEM and GSHHG files are cached, defaults to tmpPath
+    cachePath = None
+
     loadExistingTerrain = False
 
     projectPath = None
@@ -43,15 +54,22 @@ class GeneratorBase:
         """Gets the AirportModel."""
         return self._airport
 
+    def getCachePath(self):
+        """Gets the location of where downloaded files should be cached."""
+        if not self._config.cachePath:
+            return self.getTempPath()
+
+        return os.path.join(self._config.cachePath, 'qgsopenscope')
+
     def getDemsPath(self):
         """Gets the location of where DEM files should be stored."""
-        path = os.path.join(self.getTempPath(), 'dems')
+        path = os.path.join(self.getCachePath(), 'dems')
         os.makedirs(path, exist_ok=True)
         return path
 
     def getGshhgPath(self):
         """Gets the location of where GSHHG files should be stored."""
-        path = os.path.join(self.getTempPath(), 'gshhg')
+        path = os.path.join(self.getCachePath(), 'gshhg')
         os.makedirs(path, exist_ok=True)
         return path
 
@@ -118,8 +136,43 @@ class GeneratorBase:
 
         return QgsVectorLayer(fileName, name)
 
+    def setAttributeValues(self, layer, fields, values):
+        """Sets the attribute values of every feature in the layer as a single batch.
+
+        The values are written directly to the data provider, bypassing the edit buffer and undo stack.
+        Any of the QgsField objects in `fields` that don't exist are added to the layer. `values` is a list
+        the same length as `fields`, each item is either a constant or a callable taking the QgsFeature.
+        """
+        provider = layer.dataProvider()
+        missing = [f for f in fields if layer.fields().indexFromName(f.name()) == -1]
+
+        if missing:
+            provider.addAttributes(missing)
+            layer.updateFields()
+
+        indexes = [layer.fields().indexFromName(f.name()) for f in fields]
+        needsFeature = any(callable(v) for v in values)
+
+        request = QgsFeatureRequest()
+        if not needsFeature:
+            request.setFlags(QgsFeatureRequest.NoGeometry)
+            request.setNoAttributes()
+
+        changes = {}
+        for feature in layer.getFeatures(request):
+            changes[feature.id()] = {
+                index: value(feature) if callable(value) else value
+                for index, value in zip(indexes, values)
+            }
+
+        if changes:
+            provider.changeAttributeValues(changes)
+
     def loadExistingTerrain(self, group):
-        """Loads the existing terrrain, if present"""
+        """Loads the existing terrrain, if present.
+
+        The GeoJSON is loaded from a GeoPackage cache with a spatial index, see _getExistingTerrainCache.
+        """
 
         terrainFile = self._config.terrainFile
 
@@ -134,7 +187,7 @@ class GeneratorBase:
         if not os.path.isfile(terrainFile):
             return
 
-        layer = QgsVectorLayer(terrainFile)
+        layer = QgsVectorLayer(self._getExistingTerrainCache(terrainFile) or terrainFile)
         layer.setName('Existing Terrain')
         layer.setReadOnly(True)
 
@@ -167,6 +220,11 @@ class GeneratorBase:
 
     def zoomToGroup(self, group=None):
         """Zoom to the layers in the specified group"""
+
+        # There's no canvas when running outside of the QGIS desktop
+        if iface is None:
+            return
+
         canvas = iface.mapCanvas()
         bounds = None
 
@@ -191,3 +249,64 @@ class GeneratorBase:
             canvas.setExtent(bounds)
 
         canvas.refreshAllLayers()
+
+#------------------- Private -------------------
+
+    def _getExistingTerrainCache(self, terrainFile):
+        """Gets the GeoPackage cache of the existing terrain GeoJSON, converting it if it's missing or out of date.
+
+        GeoJSON has no spatial index, so every pan, zoom and identify scans the whole file. The GeoJSON remains the
+        source of truth, the path, size and modification time of the GeoJSON the cache was converted from are kept
+        alongside it, so a different file, or any change to it, rebuilds the cache. Returns None if the GeoJSON can't
+        be converted.
+        """
+        cacheFile = os.path.join(self.getProjectPath(), _EXISTING_TERRAIN_CACHE)
+        sourceFile = os.path.join(self.getProjectPath(), _EXISTING_TERRAIN_SOURCE)
+        terrainSource = self._getExistingTerrainSource(terrainFile)
+
+        if os.path.isfile(cacheFile) and os.path.isfile(sourceFile):
+            try:
+                with open(sourceFile) as f:
+                    if json.load(f) == terrainSource:
+                        return cacheFile
+            except ValueError:
+                pass
+
+        # Write alongside and then move into place, so a failed conversion never leaves a partial cache
+        partialFile = os.path.join(self.getProjectPath(), 'Existing Terrain - %d.gpkg' % os.getpid())
+        source = QgsVectorLayer(terrainFile)
+
+        if not source.isValid():
+            return None
+
+        # OGR creates the GeoPackage with an R-tree spatial index
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = 'GPKG'
+        options.fileEncoding = 'utf-8'
+        options.layerName = 'Existing Terrain'
+
+        error, _ = QgsVectorFileWriter.writeAsVectorFormat(source, partialFile, options)
+
+        if error != QgsVectorFileWriter.NoError:
+            if os.path.isfile(partialFile):
+                os.unlink(partialFile)
+
+            return None
+
+        os.replace(partialFile, cacheFile)
+
+        with open(sourceFile, 'w') as f:
+            json.dump(terrainSource, f, indent=2)
+
+        return cacheFile
+
+    @staticmethod
+    def _getExistingTerrainSource(terrainFile):
+        """Gets a dict of the path, size and modification time of the existing terrain GeoJSON"""
+        stat = os.stat(terrainFile)
+
+        return {
+            'path': os.path.abspath(terrainFile),
+            'size': stat.st_size,
+            'modified': stat.st_mtime
+        }
@@ -0,0 +1,198 @@
+"""Where the intermediate layers and files of the processing pipelines are stored."""
+import glob
+import os
+import re
+import shutil
+from enum import Enum
+from qgis.core import QgsFeatureRequest, QgsMapLayer
+
+_MEMORY_OUTPUT = 'memory:'
+
+# Rough estimates of the memory used by each feature and vertex of a memory layer
+_FEATURE_BYTES = 64
+_VERTEX_BYTES = 16
+
+# The number of features sampled to estimate the average size of a layer's features
+_SAMPLE_SIZE = 100
+
+class StorageMode(Enum):
+    """The valid values for where intermediate layers are stored"""
+    MEMORY = 'memory' # Everything is kept in RAM
+    SCRATCH = 'scratch' # Everything is written to a GeoPackage per intermediate in the scratch directory
+    AUTO = 'auto' # Kept in RAM until the memory budget is exceeded, then written to the scratch directory
+
+class IntermediateStorage:
+    """Where the intermediate layers and files of the processing pipelines are stored.
+
+    Intermediates should be released as soon as their last consumer has finished.
+    """
+
+    _budget = 0
+
+    _count = 0
+
+    _liveBytes = 0
+
+    _mode = StorageMode.MEMORY
+
+    _projectPath = None
+
+    _scratchPath = None
+
+    _sizes = None
+
+#------------------- Lifecycle -------------------
+
+    def __init__(self, mode=StorageMode.MEMORY, scratchPath=None, budget=0, projectPath=None):
+        if mode != StorageMode.MEMORY and not scratchPath:
+            raise Exception('A scratch path is required for the \'%s\' storage mode' % mode.value)
+
+        self._budget = budget
+        self._mode = mode
+        self._projectPath = projectPath
+        self._scratchPath = scratchPath
+        self._sizes = {}
+
+        if scratchPath:
+            shutil.rmtree(scratchPath, ignore_errors=True)
+
+#------------------- Public -------------------
+
+    def cleanUp(self):
+        """Removes the scratch directory and everything in it"""
+        self._liveBytes = 0
+        self._sizes = {}
+
+        if self._scratchPath:
+            shutil.rmtree(self._scratchPath, ignore_errors=True)
+
+    def getFile(self, fileName):
+        """Gets the path of an intermediate file, removing any existing file.
+
+        In memory mode the file is kept in the project directory, otherwise it's written to the scratch directory.
+        """
+        if self._isScratch():
+            os.makedirs(self._scratchPath, exist_ok=True)
+            path = os.path.join(self._scratchPath, fileName)
+        else:
+            path = os.path.join(self._projectPath, fileName)
+
+        _removeFile(path)
+
+        return path
+
+    def getLiveBytes(self):
+        """Gets the estimated number of bytes used by the unreleased memory layers"""
+        return self._liveBytes
+
+    def getOutput(self, name):
+        """Gets the processing output string for the intermediate layer with the specified name.
+
+        Each scratch layer is written to its own GeoPackage, which OGR creates with a spatial index, so releasing it
+        frees the disk space by removing the file.
+        """
+        if not self._isScratch():
+            return _MEMORY_OUTPUT
+
+        os.makedirs(self._scratchPath, exist_ok=True)
+
+        # The names are unique, as the same intermediate may be created more than once (eg. per contour set)
+        self._count += 1
+        table = '%s_%d' % (re.sub(r'\W+', '_', name).strip('_').lower(), self._count)
+        fileName = os.path.join(self._scratchPath, '%s.gpkg' % table)
+
+        return 'ogr:dbname=\'%s\' table="%s" (geom) sql=' % (fileName, table)
+
+    def release(self, *items):
+        """Releases the intermediate layers (or file paths), once their last consumer has finished.
+
+        Memory layers are truncated, scratch layers (their GeoPackages) and files are removed.
+        """
+        for item in items:
+            if item is None:
+                continue
+
+            if isinstance(item, str):
+                self._removeScratchFile(item)
+            elif item.type() == QgsMapLayer.VectorLayer and item.providerType() == 'memory':
+                self._liveBytes -= self._sizes.pop(item.id(), 0)
+                item.dataProvider().truncate()
+            else:
+                self._removeScratchFile(item.source())
+
+    def track(self, layer):
+        """Records the estimated memory used by a memory layer, for the auto mode's budget. Returns the layer."""
+        if self._mode == StorageMode.AUTO and layer.providerType() == 'memory':
+            size = _estimateSize(layer)
+            self._liveBytes += size - self._sizes.get(layer.id(), 0)
+            self._sizes[layer.id()] = size
+
+        return layer
+
+#------------------- Private -------------------
+
+    def _isScratch(self):
+        """Gets a flag indicating whether new intermediates should be written to the scratch directory"""
+        if self._mode == StorageMode.AUTO:
+            return self._liveBytes > self._budget
+
+        return self._mode == StorageMode.SCRATCH
+
+    def _isScratchSource(self, source):
+        """Gets a flag indicating whether the layer source is in the scratch directory"""
+        if not self._scratchPath:
+            return False
+
+        path = os.path.abspath(source.split('|')[0])
+
+        return os.path.dirname(path) == os.path.abspath(self._scratchPath)
+
+    def _removeScratchFile(self, source):
+        """Removes the file of the source if it's in the scratch directory.
+
+        Files still open elsewhere (eg. on Windows) are left for cleanUp.
+        """
+        if not self._isScratchSource(source):
+            return
+
+        try:
+            _removeFile(source.split('|')[0])
+        except OSError:
+            pass
+
+def _estimateSize(layer):
+    """Estimates the number of bytes used by the layer's features, from the average size of a sample of them"""
+    count = layer.featureCount()
+    sampled = 0
+    vertices = 0
+
+    if count <= 0:
+        return 0
+
+    for f in layer.getFeatures(QgsFeatureRequest().setNoAttributes().setLimit(_SAMPLE_SIZE)):
+        geometry = f.geometry()
+        if not geometry.isNull():
+            vertices += geometry.constGet().nCoordinates()
+        sampled += 1
+
+    if not sampled:
+        return 0
+
+    return int(count * (_FEATURE_BYTES + _VERTEX_BYTES * vertices / sampled))
+
+def _removeFile(path):
+    """Removes the file, and the sidecar files of shapefiles and GeoPackages"""
+    base, ext = os.path.splitext(path)
+
+    if ext.lower() == '.shp':
+        for item in glob.glob('%s.*' % glob.escape(base)):
+            os.unlink(item)
+        return
+
+    if ext.lower() == '.gpkg':
+        for item in ['%s-wal' % path, '%s-shm' % path]:
+            if os.path.isfile(item):
+                os.unlink(item)
+
+    if os.path.isfile(path):
+        os.unlink(path)
@@ -90,7 +90,7 @@ class ProjectGenerator(GeneratorBase):
             osm = QgsRasterLayer(_XYZ_OSM, 'OpenStreetMap', 'wms')
             self.addLayerToGroup(osm, root)
 
-        if airspace:
+        if airspace and iface is not None:
             iface.setActiveLayer(airspace)
 
         self.zoomToGroup(airspaceGroup)
@@ -0,0 +1,102 @@
+"""The GDAL performance settings applied to the raster stages of the processing pipelines."""
+import os
+from osgeo import gdal # pylint: disable=import-error
+
+class RasterProfile:
+    """The GDAL performance settings applied to the raster stages of the processing pipelines.
+
+    The settings are applied to the in-process GDAL bindings, and to the environment inherited by the GDAL
+    command-line tools the processing algorithms run.
+    """
+
+    _cacheSize = 512
+
+    _compression = 'DEFLATE'
+
+    _previous = None
+
+    _threads = None
+
+#------------------- Lifecycle -------------------
+
+    def __init__(self, cacheSize=512, threads=None, compression='DEFLATE'):
+        self._cacheSize = cacheSize
+        self._compression = compression
+        self._threads = threads or os.cpu_count() or 1
+
+#------------------- Public -------------------
+
+    def apply(self):
+        """Applies the GDAL block cache size and number of threads, until restored"""
+        settings = {
+            'GDAL_CACHEMAX': str(self._cacheSize),
+            'GDAL_NUM_THREADS': str(self._threads)
+        }
+
+        self._previous = {
+            'cacheMax': gdal.GetCacheMax(),
+            'config': {key: gdal.GetConfigOption(key) for key in settings},
+            'environ': {key: os.environ.get(key) for key in settings}
+        }
+
+        gdal.SetCacheMax(self._cacheSize * 1024 * 1024)
+
+        for key, value in settings.items():
+            gdal.SetConfigOption(key, value)
+            os.environ[key] = value
+
+    def getCreationOptions(self):
+        """Gets the list of GeoTIFF creation options"""
+        if not self._compression:
+            return []
+
+        return ['TILED=YES', 'COMPRESS=%s' % self._compression, 'PREDICTOR=2']
+
+    def getOptionsString(self):
+        """Gets the GeoTIFF creation options, as the OPTIONS parameter of the GDAL processing algorithms"""
+        return '|'.join(self.getCreationOptions())
+
+    def mosaic(self, files, fileName):
+        """Mosaics the raster files into a VRT in-process, rather than copying them with gdal_merge.
+
+        Any nodata value of the sources is hidden, so the voids are read as heights like a merged GeoTIFF.
+        Returns the filename of the VRT.
+        """
+        if os.path.isfile(fileName):
+            os.unlink(fileName)
+
+        vrt = gdal.BuildVRT(fileName, files, options=gdal.BuildVRTOptions(hideNodata=True))
+
+        if vrt is None:
+            raise Exception('Unable to mosaic the DEM files: %s' % gdal.GetLastErrorMsg())
+
+        # Closing the dataset writes the VRT
+        vrt = None
+
+        return fileName
+
+    def restore(self):
+        """Restores the GDAL settings from before the profile was applied"""
+        if self._previous is None:
+            return
+
+        gdal.SetCacheMax(self._previous['cacheMax'])
+
+        for key, value in self._previous['config'].items():
+            gdal.SetConfigOption(key, value)
+
+        for key, value in self._previous['environ'].items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+        self._previous = None
+
+    def toDict(self):
+        """Gets the settings as a dict, eg. for the run metrics"""
+        return {
+            'cacheSize': self._cacheSize,
+            'compression': self._compression,
+            'threads': self._threads
+        }
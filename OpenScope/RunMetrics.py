@@ -0,0 +1,118 @@
+"""The timings, memory use and output sizes of a pipeline run."""
+import sys
+import time
+from qgis.core import QgsFeatureRequest, QgsMapLayer
+
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+class RunMetrics:
+    """The timings, memory use and output sizes of a pipeline run.
+
+    A stage lasts from when it's started until the next stage is started, or the run is finished.
+    """
+
+    _current = None
+
+    _layers = None
+
+    _settings = None
+
+    _stages = None
+
+    _started = None
+
+    _finished = None
+
+#------------------- Lifecycle -------------------
+
+    def __init__(self):
+        self._layers = {}
+        self._settings = {}
+        self._stages = []
+        self._started = time.perf_counter()
+
+#------------------- Public -------------------
+
+    def addLayers(self, layers):
+        """Records the feature and vertex counts of the vector layers"""
+        for layer in layers:
+            if layer.type() != QgsMapLayer.VectorLayer:
+                continue
+
+            features = 0
+            vertices = 0
+
+            for f in layer.getFeatures(QgsFeatureRequest().setNoAttributes()):
+                geometry = f.geometry()
+                if not geometry.isNull():
+                    vertices += geometry.constGet().nCoordinates()
+                features += 1
+
+            self._layers[layer.name()] = {
+                'features': features,
+                'vertices': vertices
+            }
+
+    def finish(self):
+        """Finishes the current stage and the run"""
+        self._finishStage()
+        self._finished = time.perf_counter()
+
+    def setSetting(self, name, value):
+        """Records a setting that the run used, eg. an option that affects performance"""
+        self._settings[name] = value
+
+    def startStage(self, name):
+        """Finishes the current stage, and starts the stage with the specified name"""
+        self._finishStage()
+
+        self._current = {
+            'name': name,
+            'started': time.perf_counter(),
+            'peakMemoryBefore': getPeakMemory()
+        }
+
+    def toDict(self):
+        """Gets the metrics as a JSON serialisable dict"""
+        finished = self._finished if self._finished is not None else time.perf_counter()
+
+        return {
+            'seconds': finished - self._started,
+            'peakMemory': getPeakMemory(),
+            'settings': dict(self._settings),
+            'stages': list(self._stages),
+            'layers': dict(self._layers),
+            'vertices': sum(item['vertices'] for item in self._layers.values())
+        }
+
+#------------------- Private -------------------
+
+    def _finishStage(self):
+        """Records the current stage, if there is one"""
+        if self._current is None:
+            return
+
+        peakMemory = getPeakMemory()
+
+        self._stages.append({
+            'name': self._current['name'],
+            'seconds': time.perf_counter() - self._current['started'],
+            'peakMemory': peakMemory,
+            # How much the peak memory increased during the stage
+            'peakMemoryIncrease': max(0, peakMemory - self._current['peakMemoryBefore'])
+        })
+
+        self._current = None
+
+def getPeakMemory():
+    """Gets the peak resident memory (in bytes) of the process, or 0 if it's unavailable"""
+    if resource is None:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
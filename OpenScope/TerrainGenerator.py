@@ -1,19 +1,39 @@
 """The terrain generator."""
+import math
 import os
-from PyQt5.QtCore import QVariant
+import shutil
+import threading
+from enum import Enum
+from PyQt5.QtCore import QThreadPool, QVariant
 from PyQt5.QtGui import QColor
 from qgis.core import (
+    NULL,
+    QgsApplication,
     QgsFeature, QgsFeatureRequest, QgsField,
     QgsGeometry,
     QgsMapLayer,
-    QgsProject,
-    QgsRasterLayer,
-    QgsVectorLayer,
+    QgsPointXY, QgsProcessingContext, QgsProcessingException, QgsProcessingFeedback, QgsProject, QgsProviderRegistry,
+    QgsRasterLayer, QgsRectangle,
+    QgsTask,
+    QgsVectorFileWriter, QgsVectorLayer,
     QgsWkbTypes
 )
 import processing # pylint: disable=import-error
+from .CheckpointManifest import CheckpointManifest
 from .GeneratorBase import GeneratorBase, GeneratorConfigBase
+from .IntermediateStorage import IntermediateStorage, StorageMode
+from .RasterProfile import RasterProfile
+from .RunMetrics import RunMetrics
+from .utilities.contours import (
+    getContourOptions,
+    getContourSets,
+    getElevationExpression,
+    getLevel,
+    getMinimumLevel
+)
 from .utilities.dem import getDemFromLayer
+from .utilities.diff import diffTerrain
+from .utilities.edits import getEdits, readSnapshot, writeSnapshot
 from .utilities.gshhg import (
     downloadArchive,
     getRiverShapeFile,
@@ -22,6 +42,29 @@ from .utilities.gshhg import (
     RiverLevel,
     ShorelineLevel
 )
+from .utilities.qa import SLIVER_AREA, checkTerrain
+from .utilities.smoothing import smoothDem
+from .utilities.tiling import getCutLines, getTiles, stitchPolygons
+from .utilities.topology import simplifyCoverage
+from .utilities.voids import getFilledDem
+from .utilities.watermask import getRasterSize, maskSea, writeWaterMask
+
+CHECKPOINT_FILE = 'terrain-checkpoint.json'
+
+# The group the comparison with the existing terrain is published to
+DIFF_GROUP = 'Terrain Diff'
+
+# The point layer the issues found by a quality check of the terrain are published to
+QA_LAYER = 'Terrain QA'
+
+# The processed DEM of the last full run, before the ocean was masked, to update the contours for edits to the water
+UNMASKED_DEM_FILE = 'elevation-unmasked.tif'
+
+# A snapshot of the generated water, to detect the edits made to it since
+WATER_SNAPSHOT_FILE = 'water-snapshot.json'
+
+# How far (in DEM pixels) beyond each edit to the water its contours are generated again
+_EDIT_MARGIN = 4
 
 _MEMORY_OUTPUT = 'memory:'
 
@@ -31,59 +74,355 @@ _WDB_RIVER_LEVELS = [
     RiverLevel.ADDITIONAL_MAJOR_RIVER
 ]
 
+class SimplifyMethod(Enum):
+    """The valid values for how the contour and water polygons are simplified"""
+    INDEPENDENT = 'independent' # Each line or polygon is simplified on its own
+    COVERAGE = 'coverage' # Shared edges are simplified once, and reused by all the polygons sharing them
+
+class WaterEngine(Enum):
+    """The valid values for how the water is computed from the coastlines and lakes"""
+    VECTOR = 'vector' # The coastlines are inverted with a geometric difference
+    RASTER = 'raster' # The land and lakes are rasterised, and the water mask vectorised once
+
 class TerrainGeneratorConfig(GeneratorConfigBase):
     """The configuration options passed to the TerrainGenerator constructor."""
 
     contourInterval = 304.8
 
+    # A list of contour intervals (in metres) generated from the same DEM, instead of contourInterval
+    contourIntervals = None
+
+    # A list of explicit contour level lists (in metres) generated from the same DEM, eg. [[150, 300, 600, 1200]]
+    contourLevels = None
+
+    # Resample the clipped DEM to this resolution (in degrees) before contouring, eg. 0.001 to roughly match the
+    # 0.002 degree simplification tolerance. None contours the DEM at its original resolution (3 arc seconds)
+    demResolution = None
+
+    # The radius (in pixels) of the box filter used to smooth the clipped DEM before contouring, 0 disables smoothing
+    demSmoothing = 0
+
+    # Fill the voids in the SRTM tiles before merging them, caching the filled tiles for later runs
+    fillVoids = True
+
+    # Set the DEM pixels under the generated water to sea level before contouring, removing the contours over the sea
+    maskOcean = False
+
+    # The size (in MB) of the GDAL block cache used by the raster stages
+    rasterCacheSize = 512
+
+    # The compression of the intermediate GeoTIFFs, which are also tiled. None writes them uncompressed and striped
+    rasterCompression = 'DEFLATE'
+
+    # The number of threads used by GDAL warps, defaults to the CPU count
+    rasterThreads = None
+
+    # The estimated size (in bytes) of the intermediate memory layers before the auto storage mode spills to disk
+    memoryBudget = 1024 * 1024 * 1024
+
+    # Generate a quick, low resolution preview of the terrain, eg. to tune the bounds or contour interval. The
+    # small contour polygons are deleted rather than eliminated, and no checkpoints are kept
+    preview = False
+
+    # The resolution (in degrees) the DEM is resampled to for a preview, about 1km
+    previewDemResolution = 0.01
+
+    # The resolution of the GSHHG coastlines, lakes and rivers used for a preview
+    previewGshhgResolution = Resolution.LOW
+
+    # The tolerance (in degrees) the contours, coastlines and rivers are simplified with for a preview
+    previewTolerance = 0.01
+
+    # Check each contour set and the water for gaps, overlaps and slivers, publishing the issues as a point layer
+    qualityCheck = False
+
+    # Resume an interrupted run from the checkpoints of the stages it completed
+    resume = True
+
+    simplifyMethod = SimplifyMethod.INDEPENDENT
+
+    # Where the intermediate layers and files are stored
+    storageMode = StorageMode.MEMORY
+
+    # The maximum size (in degrees) of the tiles the contour polygons are generated in, None disables tiling. The tiled
+    # polygons are always simplified as a coverage, once they've been stitched
+    tileSize = None
+
+    # How far (in degrees) the DEM for each tile extends beyond it, so the contours match across the tile edges
+    tileOverlap = 0.02
+
+    # The maximum number of tiles processed concurrently, defaults to the CPU count
+    tileWorkers = None
+
+    # How the water is computed from the coastlines and lakes
+    waterEngine = WaterEngine.VECTOR
+
+    # The size (in degrees) of the raster water engine's pixels, which is also the simplification tolerance
+    waterResolution = 0.002
+
 class TerrainGenerator(GeneratorBase):
     """The terrain generator."""
 
+    _checkpoints = None
+
+    _clippedDem = None
+
+    _feedback = None
+
+    _layers = None
+
+    _metrics = None
+
+    _provisional = None
+
+    _publish = None
+
+    _rasterProfile = None
+
+    _storage = None
+
+    _zoomed = False
+
 #------------------- Public -------------------
 
-    def generateTerrain(self, feedback):
-        """Generates the terrain"""
+    def generateTerrain(self, feedback, polygons=None):
+        """Generates the terrain
 
-        project = QgsProject.instance()
-        terrain = TerrainGenerator._getTerrainGroup()
+        The terrain bounds are taken from `polygons`, a list of QgsFeature objects. If not specified
+        the polygons selected in the project are used.
+        """
+        if polygons is None:
+            polygons = TerrainGenerator.getSelectedPolygons()
 
-        if terrain:
-            layers = list(map(lambda x: x.layer().id(), terrain.findLayers()))
-            project.removeMapLayers(layers)
-        else:
-            terrain = self.addGroup('Terrain')
+        if not polygons:
+            raise Exception('No valid polygons were selected to determine the terrain bounds')
 
-        polygons = self._getSelectedPolygons()
+        self.resetTerrain()
+        self.buildTerrain(feedback, polygons, self.publishLayer)
 
+    def buildTerrain(self, feedback, polygons, publish=None):
+        """Builds the terrain layers within `polygons`, a list of QgsFeature objects. Returns the list of layers.
+
+        `publish` is called with each layer as soon as it's complete, and the list of provisional layers published
+        earlier that it replaces, eg. publishLayer. Provisional layers are read-only layers of intermediates, to
+        review while the later stages are still running. Nothing else in the project is changed, so the terrain can
+        be built in a background task.
+        """
         if not polygons:
             raise Exception('No valid polygons were selected to determine the terrain bounds')
 
-        if self._config.loadExistingTerrain:
-            self.loadExistingTerrain(terrain)
+        self._layers = []
+        self._provisional = []
+        self._publish = publish
+
+        # The stages are timed from the progress text of the main feedback
+        self._feedback = feedback
+        self._rasterProfile = RasterProfile(
+            self._config.rasterCacheSize,
+            self._config.rasterThreads,
+            self._config.rasterCompression
+        )
+        self._metrics = RunMetrics()
+        self._metrics.setSetting('contourSets', [item['label'] for item in self._getContourSets()])
+        self._metrics.setSetting('demResolution', self._getDemResolution())
+        self._metrics.setSetting('demSmoothing', self._config.demSmoothing)
+        self._metrics.setSetting('fillVoids', self._config.fillVoids)
+        self._metrics.setSetting('maskOcean', self._config.maskOcean)
+        self._metrics.setSetting('preview', self._config.preview)
+        self._metrics.setSetting('rasterProfile', self._rasterProfile.toDict())
+        self._metrics.setSetting('simplifyMethod', self._config.simplifyMethod.value)
+        self._metrics.setSetting('storageMode', self._config.storageMode.value)
+        self._metrics.setSetting('tileSize', self._config.tileSize)
+        self._metrics.setSetting('waterEngine', self._config.waterEngine.value)
 
         # Ensure the GSHHG data is present
-        feedback.setProgressText('Downloading GSHHG archive')
-        feedback.setProgress(0)
+        self._setProgress(feedback, 'Downloading GSHHG archive')
         downloadArchive(self.getGshhgPath(), feedback)
 
-        # Get the clipping bounds
-        bounds, perimeter, buffer = self._getPerimeter(polygons, feedback)
-        # self.addLayerToGroup(airspace, group)
-        # self.addLayerToGroup(perimeter, group)
-        # self.addLayerToGroup(buffer, group)
+        self._storage = IntermediateStorage(
+            self._config.storageMode,
+            os.path.join(self.getTempPath(), 'scratch', self.getIcao()),
+            self._config.memoryBudget,
+            self.getProjectPath()
+        )
 
-        self._generateRivers(terrain, buffer, feedback)
+        # Completed stages are only reused if they were generated from the same bounds. A preview is quick enough
+        # not to need them, and mustn't replace the checkpoints of an interrupted full quality run
+        self._checkpoints = CheckpointManifest(
+            os.path.join(self.getProjectPath(), CHECKPOINT_FILE),
+            self._config.resume and not self._config.preview
+        )
+        inputHash = CheckpointManifest.getHash([p.geometry().asWkt() for p in polygons])
 
-        self._generateTerrain(terrain, bounds, perimeter, buffer, feedback)
+        self._rasterProfile.apply()
 
-        # Clean up unused layers
-        project.removeMapLayers([
-            bounds.id(),
-            perimeter.id(),
-            buffer.id()
-        ])
+        try:
+            # Get the clipping bounds
+            bounds, perimeter, buffer = self._getPerimeter(polygons, feedback)
+            # self.addLayerToGroup(airspace, group)
+            # self.addLayerToGroup(perimeter, group)
+            # self.addLayerToGroup(buffer, group)
+
+            self._generateRivers(buffer, inputHash, feedback)
+
+            self._generateTerrain(bounds, perimeter, buffer, inputHash, feedback)
+
+            # Clean up unused layers
+            self._storage.release(bounds, perimeter, buffer)
+
+        finally:
+            self._rasterProfile.restore()
+            self._storage.cleanUp()
+
+        # The run has completed, so there's nothing to resume
+        if not self._config.preview:
+            self._checkpoints.clear()
+
+        self._metrics.finish()
+        self._metrics.addLayers(self._layers)
+
+        return self._layers
+
+    @staticmethod
+    def checkQuality(layers=None, feedback=None):
+        """Checks the terrain layers (defaults to the generated terrain) for holes, overlaps and slivers.
+
+        The holes left by removing the lowland below the lowest contour level aren't reported.
+
+        The issues found are published as the Terrain QA point layer, replacing that of any earlier check. Returns
+        the summary of the check, see qa.checkTerrain.
+        """
+        layers = layers or TerrainGenerator.getTerrainLayers()
+
+        if not layers:
+            raise Exception('There are no terrain layers to check')
+
+        if feedback:
+            feedback.setProgressText('Checking the quality of the terrain')
+
+        water = [layer for layer in layers if layer.name() == 'Water']
+        lowland = TerrainGenerator._getLowland(layers)
+        result = checkTerrain(layers, excluded=lowland, feedback=feedback, water=water)
+
+        QgsProject.instance().removeMapLayers([layer.id() for layer in QgsProject.instance().mapLayersByName(QA_LAYER)])
+
+        issues = result['issues']
+        issues.setName(QA_LAYER)
+        issues.setReadOnly(True)
+        QgsProject.instance().addMapLayer(issues)
+
+        return result['summary']
+
+    @staticmethod
+    def compareTerrain(feedback=None):
+        """Compares the generated terrain with the existing terrain, see diff.diffTerrain.
+
+        The added, removed and changed areas are published as read-only layers in the Terrain Diff group, replacing
+        those of any earlier comparison. Returns the summary of the comparison.
+        """
+        layers = TerrainGenerator.getTerrainLayers()
+        existing = TerrainGenerator._getExistingTerrainLayer()
+
+        if not layers:
+            raise Exception('The terrain must be generated before it can be compared')
+
+        if existing is None:
+            raise Exception('The existing terrain must be loaded before it can be compared')
+
+        if feedback:
+            feedback.setProgressText('Comparing with the existing terrain')
+
+        result = diffTerrain(layers, [existing], feedback)
+
+        root = QgsProject.instance().layerTreeRoot()
+        previous = root.findGroup(DIFF_GROUP)
+
+        if previous is not None:
+            QgsProject.instance().removeMapLayers(previous.findLayerIds())
+            root.removeChildNode(previous)
+
+        group = root.addGroup(DIFF_GROUP)
+
+        colors = {'added': (0x2c, 0xa0, 0x2c), 'removed': (0xd6, 0x27, 0x28), 'changed': (0xff, 0x7f, 0x0e)}
+
+        for key, color in colors.items():
+            layer = result[key]
+            layer.setReadOnly(True)
+
+            if layer.renderer():
+                layer.renderer().symbol().setColor(QColor.fromRgb(*color))
+
+            QgsProject.instance().addMapLayer(layer, False)
+            group.addLayer(layer)
+
+        return result['summary']
+
+    def getAirspacePolygons(self, hiddenAirspace=False, indices=None):
+        """Gets the airport's airspace as a list of polygon QgsFeature objects.
+
+        `indices` optionally limits the airspace to those at the specified positions in the airport file.
+        """
+        polygons = []
+
+        for index, item in enumerate(self.getAirport().getAirspace(hiddenAirspace)):
+            if indices is not None and index not in indices:
+                continue
+
+            feature = QgsFeature()
+            feature.setGeometry(QgsGeometry.fromPolygonXY([item.poly]))
+            polygons.append(feature)
+
+        return polygons
+
+    def getMetrics(self):
+        """Gets the RunMetrics of the last generateTerrain call, or None"""
+        return self._metrics
+
+    @staticmethod
+    def getSelectedPolygons():
+        """Gets the list of polygons selected in the project"""
+
+        selected = []
+
+        for layerView in QgsProject.instance().layerTreeRoot().findLayers():
+            layer = layerView.layer()
+
+            if layer.type() != QgsMapLayer.VectorLayer:
+                continue
+
+            features = filter(
+                lambda x: x.geometry().type() == QgsWkbTypes.PolygonGeometry,
+                layer.selectedFeatures()
+            )
+
+            selected.extend(features)
+
+        return selected
+
+    @staticmethod
+    def getTerrainLayers():
+        """Gets the exportable layers (polygons with an elevation) from the Terrain group"""
+        group = TerrainGenerator._getTerrainGroup()
+        layers = []
+
+        if not group:
+            return layers
+
+        for item in group.findLayers():
+            layer = item.layer()
 
-        self.zoomToGroup(terrain)
+            if layer.type() != QgsMapLayer.VectorLayer or layer.isReadOnly():
+                continue
+
+            if layer.geometryType() != QgsWkbTypes.PolygonGeometry:
+                continue
+
+            if layer.fields().indexFromName('elevation') == -1:
+                continue
+
+            layers.append(layer)
+
+        return layers
 
     @staticmethod
     def hasExistingLayers():
@@ -91,72 +430,280 @@ class TerrainGenerator(GeneratorBase):
         group = TerrainGenerator._getTerrainGroup()
         return group is not None and group.findLayers() != []
 
-#------------------- Private -------------------
+    def publishLayer(self, layer, replaces=None):
+        """Adds the layer to the Terrain group, replacing the provisional layers and any layer with the same name.
 
-    def _generateRivers(self, terrain, buffer, feedback):
-        """Generates the river lines within the buffer"""
+        A generated layer with the same name (eg. from a preview) is replaced, the existing terrain is kept. The view
+        is zoomed to the terrain once the first layer with any features is published.
+        """
+        terrain = TerrainGenerator._getTerrainGroup() or self.addGroup('Terrain')
+        project = QgsProject.instance()
+        removed = [item.id() for item in replaces or [] if project.mapLayer(item.id()) is not None]
 
-        rivers = self.createVectorLayer('Rivers', 'LineString', fileName='Rivers')
-        features = []
+        for item in terrain.findLayers():
+            if item.layer().name() == layer.name() and not item.layer().isReadOnly():
+                removed.append(item.layer().id())
 
-        self._setProgress(feedback, 'Clipping and simplifying rivers')
-        for level in _WDB_RIVER_LEVELS:
-            shpPath = getRiverShapeFile(self.getGshhgPath(), Resolution.FULL, level)
+        project.removeMapLayers(removed)
+        self.addLayerToGroup(layer, terrain)
 
-            result = processing.run('qgis:clip', {
-                'INPUT': shpPath,
-                'OUTPUT': _MEMORY_OUTPUT,
-                'OVERLAY': buffer
-            }, feedback=feedback)
+        if not self._zoomed and layer.featureCount() > 0:
+            self._zoomed = True
+            self.zoomToGroup(terrain)
 
-            result = processing.run('qgis:simplifygeometries', {
-                'INPUT': result['OUTPUT'],
-                'METHOD': 0, # Distance
-                'OUTPUT': _MEMORY_OUTPUT,
-                'TOLERANCE': 0.0005
+    def resetTerrain(self):
+        """Removes all the layers from the Terrain group, reloading the existing terrain if configured"""
+        project = QgsProject.instance()
+        terrain = TerrainGenerator._getTerrainGroup()
+
+        if terrain:
+            layers = list(map(lambda x: x.layer().id(), terrain.findLayers()))
+            project.removeMapLayers(layers)
+        else:
+            terrain = self.addGroup('Terrain')
+
+        if self._config.loadExistingTerrain:
+            self.loadExistingTerrain(terrain)
+
+        self._zoomed = False
+
+    def updateTerrain(self, feedback):
+        """Updates the contours for the edits made to the water since the terrain was generated.
+
+        The water only changes the contours through the ocean mask, so they're only updated if the terrain was generated
+        with the ocean masked. The processed DEM kept by that run is masked with the edited water, and the contours are
+        generated again within a window around the edits (see _updateContours). Returns the number of contour polygons
+        replaced.
+        """
+        water = TerrainGenerator._getTerrainLayer('Water')
+        snapshotFile = os.path.join(self.getProjectPath(), WATER_SNAPSHOT_FILE)
+        demFile = os.path.join(self.getProjectPath(), UNMASKED_DEM_FILE)
+
+        if water is None or not os.path.isfile(snapshotFile):
+            raise Exception('The terrain must be generated before it can be updated')
+
+        if water.isEditable():
+            raise Exception('Save or discard the edits to \'%s\' before updating the terrain' % water.name())
+
+        self._setProgress(feedback, 'Detecting water edits')
+        edits = getEdits(readSnapshot(snapshotFile), water)
+        replaced = 0
+
+        # The DEM is only kept if the ocean was masked, otherwise the contours don't depend on the water
+        if edits and os.path.isfile(demFile):
+            self._rasterProfile = RasterProfile(
+                self._config.rasterCacheSize,
+                self._config.rasterThreads,
+                self._config.rasterCompression
+            )
+            self._storage = IntermediateStorage(
+                self._config.storageMode,
+                os.path.join(self.getTempPath(), 'scratch', self.getIcao()),
+                self._config.memoryBudget,
+                self.getProjectPath()
+            )
+            self._rasterProfile.apply()
+
+            try:
+                dem = self._getEditedElevationData(demFile, water, feedback)
+                margin = _EDIT_MARGIN * max(dem.rasterUnitsPerPixelX(), dem.rasterUnitsPerPixelY())
+                windows = TerrainGenerator._getEditWindows(edits, margin)
+
+                for contourSet in self._getContourSets():
+                    contours = TerrainGenerator._getTerrainLayer('%s - Final' % contourSet['name'])
+
+                    if contours is None:
+                        continue
+
+                    if contours.isEditable():
+                        raise Exception('Save or discard the edits to \'%s\' before updating it' % contours.name())
+
+                    for window in windows:
+                        replaced += self._updateContours(contours, window, dem, contourSet, feedback)
+
+                self._storage.release(dem.source())
+
+            finally:
+                self._rasterProfile.restore()
+                self._storage.cleanUp()
+
+        # The next update is relative to these edits
+        writeSnapshot(water, snapshotFile)
+
+        return replaced
+
+#------------------- Private -------------------
+
+    def _addElevationField(self, contours, contourSet):
+        """Adds a virtual field containing the height normalised to the contour interval or levels"""
+        field = QgsField('elevation', QVariant.Double)
+        contours.addExpressionField(getElevationExpression(contourSet), field)
+
+    def _addLayer(self, layer):
+        """Adds the completed output layer to the terrain, publishing it in place of any provisional layers"""
+        self._layers.append(layer)
+
+        if self._publish is not None:
+            self._publish(layer, self._provisional)
+
+        self._provisional = []
+
+    def _checkQuality(self, water, contours, bounds, name, feedback):
+        """Checks the water and contours for gaps inside the bounds, overlaps and slivers, publishing the issues"""
+        self._setProgress(feedback, 'Checking the quality of \'%s\'' % name)
+        geometry = next(bounds.getFeatures()).geometry()
+        lowland = TerrainGenerator._getLowland([contours])
+        result = checkTerrain([contours], geometry, lowland, feedback=feedback, water=[water])
+
+        # Stored in a file, so the issues are saved with the project
+        qaName = '%s - QA' % name
+        fields = result['issues'].fields().toList()
+        issues = self.createVectorLayer(qaName, 'Point', fields, self._getOutputFileName(qaName))
+        issues.dataProvider().addFeatures(list(result['issues'].getFeatures()))
+        self._addLayer(issues)
+
+        summary = result['summary']
+        feedback.pushInfo('Found %d gaps, %d overlaps, %d slivers and %d water slivers in %d polygons' % (
+            summary['gap'], summary['overlap'], summary['sliver'], summary['water'], summary['polygons']
+        ))
+
+    def _eliminatePolygons(self, polygons, feedback):
+        """Eliminates the small polygons into their neighbours, and deletes any that can't be. Returns the layer."""
+        # A preview only deletes the small polygons, leaving holes where they were
+        if self._config.preview:
+            cleaned = polygons
+        else:
+            # Select all polygons smaller than 0.0005 sq degrees (about 38ha at lat=52))
+            # and eliminate them
+            self._setProgress(feedback, 'Eliminating small contour polygons')
+            selection = polygons.getFeatures(QgsFeatureRequest().setFilterExpression('$area < 0.00005'))
+            polygons.selectByIds([k.id() for k in selection])
+
+            result = processing.run('qgis:eliminateselectedpolygons', {
+                'INPUT': polygons,
+                'OUTPUT': self._storage.getOutput('Contours - Cleaned'),
+                'MODE': 2 # Largest common boundary
             }, feedback=feedback)
+            cleaned = self._storage.track(result['OUTPUT'])
+            cleaned.setName('Contours - Cleaned')
+            self._storage.release(polygons)
 
-            for f in result['OUTPUT'].getFeatures():
-                newFeature = QgsFeature()
+        # Delete any features that weren't eliminated (outside a common boundary)
+        self._setProgress(feedback, 'Deleting remaining small contour polygons')
+        selection = cleaned.getFeatures(QgsFeatureRequest().setFilterExpression('$area < 0.00005'))
+        cleaned.dataProvider().deleteFeatures([k.id() for k in selection])
 
-                newFeature.setGeometry(f.geometry())
-                features.append(newFeature)
+        return cleaned
+
+    def _generateContours(self, bounds, perimeter, buffer, water, inputHash, contourSet, feedback):
+        """Generates the contour polygons for the contour set"""
+        contourInputs = [
+            inputHash,
+            contourSet['interval'],
+            contourSet['levels'],
+            self._config.simplifyMethod.value,
+            self._config.tileSize,
+            self._config.tileOverlap
+        ]
+        contours = self._runStage(
+            '%s - Final' % contourSet['name'],
+            contourInputs,
+            lambda: self._getFinalContours(
+                bounds, perimeter, buffer, water, inputHash, contourSet, contourInputs, feedback
+            ),
+            feedback
+        )
 
-        rivers.dataProvider().addFeatures(features)
+        # Styling
+        contours.renderer().symbol().setColor(QColor.fromRgb(0xff, 0x9e, 0x17))
+        self._addElevationField(contours, contourSet)
+
+        self._addLayer(contours)
+
+        return contours
+
+    def _generateRivers(self, buffer, inputHash, feedback):
+        """Generates the river lines within the buffer"""
+
+        rivers = self._runStage(
+            'Rivers',
+            [inputHash, [level.value for level in _WDB_RIVER_LEVELS], self._getGshhgResolution().value],
+            lambda: self._getRivers(buffer, feedback),
+            feedback
+        )
 
         sym = rivers.renderer().symbol()
         sym.setColor(QColor.fromRgb(0x00, 0xff, 0xff))
         sym.setWidth(0.66)
 
-        self.addLayerToGroup(rivers, terrain)
+        self._addLayer(rivers)
 
-    def _generateTerrain(self, group, bounds, perimeter, buffer, feedback):
+    def _generateTerrain(self, bounds, perimeter, buffer, inputHash, feedback):
         """Generate the terrain."""
 
         # Get the water
-        self._setProgress(feedback, 'Getting water')
-        water = self._getWater(bounds, buffer, feedback)
-        self.addLayerToGroup(water, group)
+        water = self._runStage(
+            'Water',
+            [
+                inputHash,
+                self._config.simplifyMethod.value,
+                self._config.waterEngine.value,
+                self._getWaterResolution()
+            ],
+            lambda: self._getWater(bounds, buffer, feedback),
+            feedback
+        )
+        water.renderer().symbol().setColor(QColor.fromRgb(0x00, 0xff, 0xff))
 
-        # Height data
-        mergedDem, clippedDem, contours = self._getElevationData(buffer, feedback)
-        # self.addLayerToGroup(mergedDem, group)
-        # self.addLayerToGroup(clippedDem, group)
-        # self.addLayerToGroup(contours, group)
+        if not self._config.preview:
+            writeSnapshot(water, os.path.join(self.getProjectPath(), WATER_SNAPSHOT_FILE))
 
-        # Clean the contours
-        cleaned = self._getCleanContours(contours, perimeter, bounds, feedback)
-        self.addLayerToGroup(cleaned, group)
+        self._addLayer(water)
+
+        # The contours for each interval or level set, sharing the elevation data
+        self._clippedDem = None
 
-        # Normalize the contours
-        self._normalizeContours(cleaned, clippedDem, feedback)
+        for contourSet in self._getContourSets():
+            contours = self._generateContours(bounds, perimeter, buffer, water, inputHash, contourSet, feedback)
+
+            if self._config.qualityCheck:
+                self._checkQuality(water, contours, bounds, contourSet['name'], feedback)
 
         # Clean up unused layers
-        QgsProject.instance().removeMapLayers([
-            mergedDem.id(),
-            clippedDem.id(),
-            contours.id()
-        ])
+        self._storage.release(self._clippedDem)
+        self._clippedDem = None
+
+    def _getAllContourPolygons(self, clippedDem, perimeter, buffer, contourSet, feedback):
+        """Get the contour polygons, in parallel tiles if the bounds are large enough."""
+        tiles = self._getTiles(buffer)
+        name = contourSet['name']
+
+        if len(tiles) > 1:
+            polygons = self._getTiledContourPolygons(tiles, clippedDem, perimeter, contourSet, feedback)
+        else:
+            contourFile = self._storage.getFile('%s.shp' % name)
+            contours = self._getContours(clippedDem.source(), contourFile, contourSet, feedback)
+            # self.addLayerToGroup(contours, group)
+            polygons = self._getContourPolygons(contours, perimeter, feedback, self._storage)
+            self._storage.release(contours)
+
+        if not self._checkpoints.isEnabled():
+            return polygons
+
+        # Keep a copy of the polygons, so they can be resumed from
+        fileName = self._checkpoints.getFile('%s - Polygons.gpkg' % name)
+        QgsVectorFileWriter.writeAsVectorFormat(polygons, fileName, 'utf-8', polygons.crs(), 'GPKG')
+        self._storage.release(polygons)
+
+        return QgsVectorLayer(fileName, '%s - Polygons' % name)
+
+    @staticmethod
+    def _getBand(contourSet, mean):
+        """Gets the level of the band the mean height is in, 0 for the lowland below the lowest level (or no mean)"""
+        if mean is None or mean < getMinimumLevel(contourSet):
+            return 0
+
+        return getLevel(contourSet, mean)
 
     def _getBounds(self, polygons):
         """Gets the bounds for the terrain"""
@@ -177,128 +724,179 @@ class TerrainGenerator(GeneratorBase):
 
         return bounds
 
-    def _getCleanContours(self, contours, perimeter, airspace, feedback):
+    def _getCleanContours(self, polygons, airspace, name, feedback):
         """Get the cleaned contours."""
-        # Simplify the contours
-        self._setProgress(feedback, 'Simplify contours')
-        result = processing.run('qgis:simplifygeometries', {
-            'INPUT': contours,
-            'TOLERANCE': 0.002,
-            'OUTPUT': _MEMORY_OUTPUT
+        cleaned = self._eliminatePolygons(polygons, feedback)
+
+        # Clip to airspace
+        self._setProgress(feedback, 'Clipping contours to bounds')
+        result = processing.run('qgis:clip', {
+            'INPUT': cleaned,
+            'OUTPUT': self._storage.getOutput('Contours - Clipped'),
+            'OVERLAY': airspace
+        })
+        clipped = self._storage.track(result['OUTPUT'])
+        clipped.setName('Contours - Clipped')
+        self._storage.release(cleaned)
+
+        # Multipart to single part
+        self._setProgress(feedback, 'Converting contours to single part')
+        result = processing.run('qgis:multiparttosingleparts', {
+            'INPUT': clipped,
+            'OUTPUT': self._getOutputString('%s - Final' % name)
         }, feedback=feedback)
-        simplified = result['OUTPUT']
-        simplified.setName('Contours - Simplified')
+        final = result['OUTPUT']
+        final.setName('%s - Final' % name)
+        self._storage.release(clipped)
+
+        return final
+
+    def _getContourPolygons(self, contours, perimeter, feedback, storage, context=None, simplify=True):
+        """Get the polygons formed by the contours and the perimeter, simplified unless `simplify` is False.
+
+        The intermediate layers are created in the IntermediateStorage `storage`, the inputs aren't released.
+        """
+        isCoverage = self._config.simplifyMethod == SimplifyMethod.COVERAGE
+        simplified = None
+
+        # Simplify the contours, unless the polygons are simplified as a coverage
+        if simplify and not isCoverage:
+            self._setProgress(feedback, 'Simplify contours')
+            result = processing.run('qgis:simplifygeometries', {
+                'INPUT': contours,
+                'TOLERANCE': self._getTolerance(),
+                'OUTPUT': storage.getOutput('Contours - Simplified')
+            }, feedback=feedback, context=context)
+            simplified = storage.track(result['OUTPUT'])
+            simplified.setName('Contours - Simplified')
 
         # Merge with perimeter
         self._setProgress(feedback, 'Merging contours with perimter')
         result = processing.run('qgis:mergevectorlayers', {
-            'LAYERS': [simplified, perimeter],
-            'OUTPUT': _MEMORY_OUTPUT
-        }, feedback=feedback)
-        merged = result['OUTPUT']
+            'LAYERS': [simplified or contours, perimeter],
+            'OUTPUT': storage.getOutput('Contours - Merged')
+        }, feedback=feedback, context=context)
+        merged = storage.track(result['OUTPUT'])
         merged.setName('Contours - Merged')
+        storage.release(simplified)
 
         # Polygonise
         self._setProgress(feedback, 'Polygonise contours')
         result = processing.run('qgis:polygonize', {
             'INPUT': merged,
-            'OUTPUT': _MEMORY_OUTPUT,
-        })
-        polygons = result['OUTPUT']
+            'OUTPUT': storage.getOutput('Contours - Polygons'),
+        }, context=context)
+        polygons = storage.track(result['OUTPUT'])
         polygons.setName('Contours - Polygons')
+        storage.release(merged)
 
-        # Select all polygons smaller than 0.0005 sq degrees (about 38ha at lat=52))
-        # and eliminate them
-        self._setProgress(feedback, 'Eliminating small contour polygons')
-        selection = polygons.getFeatures(QgsFeatureRequest().setFilterExpression('$area < 0.00005'))
-        polygons.selectByIds([k.id() for k in selection])
+        if simplify and isCoverage:
+            self._setProgress(feedback, 'Simplify contour polygons')
+            self._simplifyCoverage([polygons], self._getTolerance())
 
-        result = processing.run('qgis:eliminateselectedpolygons', {
-            'INPUT': polygons,
-            'OUTPUT': _MEMORY_OUTPUT,
-            'MODE': 2 # Largest common boundary
-        }, feedback=feedback)
-        cleaned = result['OUTPUT']
-        cleaned.setName('Contours - Cleaned')
+        return polygons
 
-        # Delete any features that weren't eliminated (outside a common boundary)
-        self._setProgress(feedback, 'Deleting remaining small contour polygons')
-        selection = cleaned.getFeatures(QgsFeatureRequest().setFilterExpression('$area < 0.00005'))
-        cleaned.dataProvider().deleteFeatures([k.id() for k in selection])
+    def _getContourSets(self):
+        """Get the contour sets (intervals or explicit levels) to generate."""
+        return getContourSets(self._config.contourInterval, self._config.contourIntervals, self._config.contourLevels)
 
-        # Clip to airspace
-        self._setProgress(feedback, 'Clipping contours to bounds')
-        result = processing.run('qgis:clip', {
-            'INPUT': cleaned,
-            'OUTPUT': _MEMORY_OUTPUT,
-            'OVERLAY': airspace
-        })
-        clipped = result['OUTPUT']
-        clipped.setName('Contours - Clipped')
+    def _getCutLinesLayer(self, tile):
+        """Gets a line memory layer of the tile's cut lines, to close the polygons along its interior edges"""
+        cutLines = self.createMemoryLayer('Cut Lines', 'LineString')
+        features = []
 
-        # Multipart to single part
-        self._setProgress(feedback, 'Converting contours to single part')
-        result = processing.run('qgis:multiparttosingleparts', {
-            'INPUT': clipped,
-            'OUTPUT': self.getOgrString('Contours - Final')
-        }, feedback=feedback)
-        final = result['OUTPUT']
-        final.setName('Contours - Final')
+        for line in getCutLines(tile):
+            feature = QgsFeature()
+            feature.setGeometry(QgsGeometry.fromPolylineXY(line))
+            features.append(feature)
 
-        # Styling
-        final.renderer().symbol().setColor(QColor.fromRgb(0xff, 0x9e, 0x17))
+        cutLines.dataProvider().addFeatures(features)
 
-        return final
+        return cutLines
+
+    def _getDemResolution(self):
+        """Gets the resolution (in degrees) the DEM is resampled to, or None for its original resolution"""
+        if self._config.preview:
+            return max(self._config.demResolution or 0, self._config.previewDemResolution)
 
-    def _getContourInterval(self):
-        """Get the contour interval (in metres)."""
-        return self._config.contourInterval
+        return self._config.demResolution
 
-    def _getElevationData(self, boundingLayer, feedback):
-        """Get the elevation layers."""
+    def _getElevationData(self, boundingLayer, water, feedback):
+        """Get the elevation data, clipped to the bounding layer, with the sea level under the water if masked."""
         self._setProgress(feedback, 'Getting DEM files')
-        demFiles = getDemFromLayer(self.getDemsPath(), boundingLayer, feedback)
+        landFile = getShorelineShapeFile(self.getGshhgPath(), self._getGshhgResolution(), ShorelineLevel.CONTINENTAL)
+        land = QgsVectorLayer(landFile, 'Land')
+        demFiles = getDemFromLayer(self.getDemsPath(), boundingLayer, feedback, land)
 
-        projectPath = self.getProjectPath()
+        if self._config.fillVoids:
+            self._setProgress(feedback, 'Filling DEM voids')
+            filledPath = os.path.join(self.getDemsPath(), 'filled')
+            demFiles = [getFilledDem(demFile, filledPath) for demFile in demFiles]
 
-        # Merge all the DEM files into a single geotiff
+        # Mosaic all the DEM files into a single virtual raster
         self._setProgress(feedback, 'Merging DEM files')
-        mergedFile = os.path.join(projectPath, 'Elevation - Merged.tif')
-        if os.path.isfile(mergedFile):
-            os.unlink(mergedFile)
-
-        result = processing.run('gdal:merge', {
-            'INPUT': demFiles,
-            'DATA_TYPE': 1,
-            'OUTPUT': mergedFile
-        }, feedback=feedback)
-        merged = QgsRasterLayer(result['OUTPUT'], 'Elevation - Merged')
+        mergedFile = self._rasterProfile.mosaic(demFiles, self._storage.getFile('Elevation - Merged.vrt'))
 
-        # Clip the DEM file to the bounds
+        # Clip the DEM file to the bounds, keeping a copy to resume from if checkpoints are enabled
         self._setProgress(feedback, 'Clipping merged DEM')
-        clippedFile = os.path.join(projectPath, 'Elevation - Clipped.tif')
-        if os.path.isfile(clippedFile):
-            os.unlink(clippedFile)
+        if self._checkpoints.isEnabled():
+            clippedFile = self._checkpoints.getFile('Elevation - Clipped.tif')
+        else:
+            clippedFile = self._storage.getFile('Elevation - Clipped.tif')
 
         result = processing.run('gdal:cliprasterbymasklayer', {
             'INPUT': mergedFile,
             'MASK': boundingLayer,
-            'OUTPUT': clippedFile
+            'MULTITHREADING': True,
+            'OPTIONS': self._rasterProfile.getOptionsString(),
+            'OUTPUT': self._storage.getFile('Elevation - Full.tif') if self._getDemResolution() else clippedFile
         }, feedback=feedback)
-        clipped = QgsRasterLayer(result['OUTPUT'], 'Elevation - Clipped')
-
-        # Generate the contours
-        self._setProgress(feedback, 'Generating contours')
-        contourFile = os.path.join(projectPath, 'Contours.shp')
-        if os.path.isfile(contourFile):
-            os.unlink(contourFile)
-
-        result = processing.run('gdal:contour', {
-            'INPUT': clippedFile,
+        self._storage.release(mergedFile)
+
+        # Resample to the target resolution, averaging the heights when downsampling
+        if self._getDemResolution():
+            self._setProgress(feedback, 'Resampling DEM')
+            fullFile = result['OUTPUT']
+            result = processing.run('gdal:warpreproject', {
+                'INPUT': fullFile,
+                'RESAMPLING': 5, # Average
+                'TARGET_RESOLUTION': self._getDemResolution(),
+                'MULTITHREADING': True,
+                'OPTIONS': self._rasterProfile.getOptionsString(),
+                'OUTPUT': clippedFile
+            }, feedback=feedback)
+            self._storage.release(fullFile)
+
+        # Low-pass filter the heights, before the ocean is masked so the coastline stays sharp
+        if self._config.demSmoothing:
+            self._setProgress(feedback, 'Smoothing DEM')
+            smoothDem(result['OUTPUT'], self._config.demSmoothing)
+
+        # The DEM is kept before it's masked, so the contours can be updated for edits to the water
+        unmaskedFile = os.path.join(self.getProjectPath(), UNMASKED_DEM_FILE)
+
+        if not self._config.preview and self._config.maskOcean:
+            shutil.copyfile(result['OUTPUT'], unmaskedFile)
+        elif not self._config.preview and os.path.isfile(unmaskedFile):
+            os.unlink(unmaskedFile)
+
+        # Set the water to sea level, so SRTM noise over the sea doesn't produce any contours. The generated water is
+        # used rather than the GSHHG land, so the DEM agrees with its small island deletion and simplification
+        if self._config.maskOcean:
+            self._setProgress(feedback, 'Masking ocean in DEM')
+            source = QgsProviderRegistry.instance().decodeUri('ogr', water.source())
+            maskSea(result['OUTPUT'], source['path'], source.get('layerName'))
+
+        return QgsRasterLayer(result['OUTPUT'], 'Elevation - Clipped')
+
+    def _getContours(self, demFile, contourFile, contourSet, feedback, context=None):
+        """Generate the contours from the DEM file, excluding those at or below sea level."""
+        self._setProgress(feedback, 'Generating contours (%s)' % contourSet['label'])
+        result = processing.run('gdal:contour', dict({
+            'INPUT': demFile,
             'BAND' : 1,
-            'INTERVAL': self._getContourInterval(),
             'OUTPUT': contourFile
-        }, feedback=feedback)
+        }, **getContourOptions(contourSet)), feedback=feedback, context=context)
         contours = QgsVectorLayer(result['OUTPUT'], 'Contours')
 
         # Remove any polygons at or below sea level
@@ -306,7 +904,101 @@ class TerrainGenerator(GeneratorBase):
         it = contours.getFeatures(QgsFeatureRequest().setFilterExpression('ELEV <= %f' % 0))
         contours.dataProvider().deleteFeatures([i.id() for i in it])
 
-        return (merged, clipped, contours)
+        return contours
+
+    def _getEditedElevationData(self, demFile, water, feedback):
+        """Get the processed DEM kept by the full run, with the sea level under the edited water"""
+        self._setProgress(feedback, 'Masking ocean in DEM')
+        fileName = self._storage.getFile('Elevation - Edited.tif')
+        shutil.copyfile(demFile, fileName)
+
+        source = QgsProviderRegistry.instance().decodeUri('ogr', water.source())
+        maskSea(fileName, source['path'], source.get('layerName'))
+
+        return QgsRasterLayer(fileName, 'Elevation - Edited')
+
+    @staticmethod
+    def _getEditWindows(edits, margin):
+        """Gets the extents the contours are generated again in, around the edits and merged where they overlap.
+
+        The DEM only changes within the edits, so the `margin` (in degrees) leaves the contours along the edges of
+        each window unchanged.
+        """
+        windows = []
+
+        for edit in edits:
+            window = QgsRectangle(edit['extent'])
+            window.grow(margin)
+            overlapping = [other for other in windows if other.intersects(window)]
+
+            # A merged window may overlap others in turn
+            while overlapping:
+                for other in overlapping:
+                    window.combineExtentWith(other)
+                    windows.remove(other)
+
+                overlapping = [other for other in windows if other.intersects(window)]
+
+            windows.append(window)
+
+        return windows
+
+    def _getFinalContours(self, bounds, perimeter, buffer, water, inputHash, contourSet, contourInputs, feedback):
+        """Get the final contour polygons for the contour set, with the mean elevation of each."""
+
+        # The elevation data is shared by all the contour sets, so only fetched once
+        if self._clippedDem is None:
+            self._clippedDem = self._runStage(
+                'Elevation - Clipped',
+                [
+                    inputHash,
+                    self._getDemResolution(),
+                    self._config.demSmoothing,
+                    self._config.fillVoids,
+                    self._config.maskOcean,
+                    # The ocean is masked with the water, so changes with it
+                    [
+                        self._config.simplifyMethod.value,
+                        self._config.waterEngine.value,
+                        self._getWaterResolution()
+                    ] if self._config.maskOcean else None
+                ],
+                lambda: self._getElevationData(buffer, water, feedback),
+                feedback,
+                QgsRasterLayer
+            )
+
+        polygons = self._runStage(
+            '%s - Polygons' % contourSet['name'],
+            contourInputs,
+            lambda: self._getAllContourPolygons(self._clippedDem, perimeter, buffer, contourSet, feedback),
+            feedback
+        )
+
+        # The raw polygons can be reviewed while they're cleaned, if they're kept in a checkpoint file
+        if self._checkpoints.isEnabled():
+            self._publishProvisional(polygons, '%s - Polygons' % contourSet['name'])
+
+        # Clean the contours
+        cleaned = self._getCleanContours(polygons, bounds, contourSet['name'], feedback)
+        self._publishProvisional(cleaned, '%s - Cleaned' % contourSet['name'])
+
+        # Normalize the contours, keeping the lowland they leave uncovered for the quality checks
+        self._normalizeContours(cleaned, self._clippedDem, contourSet, feedback, '%s - Lowland' % contourSet['name'])
+
+        return cleaned
+
+    def _getGshhgResolution(self):
+        """Gets the resolution of the GSHHG coastlines, lakes and rivers"""
+        return self._config.previewGshhgResolution if self._config.preview else Resolution.FULL
+
+    def _getOutputFileName(self, name):
+        """Gets the name of the file an output layer is stored in, previews are kept separate"""
+        return '%s - Preview' % name if self._config.preview else name
+
+    def _getOutputString(self, name):
+        """Gets the OGR string of an output layer"""
+        return self.getOgrString(name, self._getOutputFileName(name))
 
     def _getPerimeter(self, polygons, feedback):
         """Gets the perimeter for the terrain"""
@@ -317,82 +1009,405 @@ class TerrainGenerator(GeneratorBase):
         self._setProgress(feedback, 'Getting perimiter')
         result = processing.run('qgis:polygonstolines', {
             'INPUT': bounds,
-            'OUTPUT': _MEMORY_OUTPUT
+            'OUTPUT': self._storage.getOutput('Perimeter')
         }, feedback=feedback)
-        perimeter = result['OUTPUT']
+        perimeter = self._storage.track(result['OUTPUT'])
         perimeter.setName('Perimeter')
 
         # Buffer the airspace
         self._setProgress(feedback, 'Buffering perimiter')
         result = processing.run('qgis:buffer', {
             'INPUT': bounds,
-            'OUTPUT': _MEMORY_OUTPUT,
+            'OUTPUT': self._storage.getOutput('Buffer'),
             'DISTANCE': 0.05
         }, feedback=feedback)
-        buffer = result['OUTPUT']
+        buffer = self._storage.track(result['OUTPUT'])
         buffer.setName('Buffer')
 
         return (bounds, perimeter, buffer)
 
-    def _getSelectedPolygons(self):
-        """Gets the list of selected polygons"""
+    def _getRasterWater(self, coastlines, lakes, buffer, feedback):
+        """Get the water within the buffer, by rasterising the land and lakes and vectorising the water mask.
+
+        Complex coastlines (eg. fjords, archipelagos) are much faster to invert as a raster than with a difference.
+        """
+        resolution = self._getWaterResolution()
+        extent = buffer.extent()
+        width, height = getRasterSize(extent, resolution)
+        rasterExtent = '%f,%f,%f,%f [EPSG:4326]' % (
+            extent.xMinimum(), extent.xMinimum() + width * resolution,
+            extent.yMaximum() - height * resolution, extent.yMaximum()
+        )
+
+        # Rasterise the land and lakes onto the same grid
+        rasters = []
+        for layer, name in [(coastlines, 'Land'), (lakes, 'Lakes')]:
+            self._setProgress(feedback, 'Rasterising %s' % name.lower())
+            result = processing.run('gdal:rasterize', {
+                'INPUT': layer,
+                'BURN': 1,
+                'UNITS': 1, # Georeferenced units
+                'WIDTH': resolution,
+                'HEIGHT': resolution,
+                'EXTENT': rasterExtent,
+                'INIT': 0,
+                'DATA_TYPE': 0, # Byte
+                'OPTIONS': self._rasterProfile.getOptionsString(),
+                'OUTPUT': self._storage.getFile('Water - %s.tif' % name)
+            }, feedback=feedback)
+            rasters.append(result['OUTPUT'])
+
+        self._storage.release(coastlines, lakes)
+
+        # Water is anything that isn't land, or is a lake
+        self._setProgress(feedback, 'Computing water mask')
+        maskFile = self._storage.getFile('Water - Mask.tif')
+        writeWaterMask(rasters[0], rasters[1], maskFile)
+        self._storage.release(*rasters)
+
+        # Vectorise the water mask
+        self._setProgress(feedback, 'Vectorising water mask')
+        result = processing.run('gdal:polygonize', {
+            'INPUT': maskFile,
+            'BAND': 1,
+            'FIELD': 'DN',
+            'EIGHT_CONNECTEDNESS': False,
+            'OUTPUT': self._storage.getFile('Water - Polygons.gpkg')
+        }, feedback=feedback)
+        polygons = QgsVectorLayer(result['OUTPUT'], 'Water - Polygons')
+        self._storage.release(maskFile)
 
-        selected = []
+        # Fill any small islands
+        self._setProgress(feedback, 'Deleting small islands')
+        result = processing.run('native:deleteholes', {
+            'INPUT': polygons,
+            'MIN_AREA': 0.0005,
+            'OUTPUT': self._storage.getOutput('Water - Filled')
+        }, feedback=feedback)
+        water = self._storage.track(result['OUTPUT'])
+        self._storage.release(polygons)
 
-        for layerView in QgsProject.instance().layerTreeRoot().findLayers():
-            layer = layerView.layer()
+        # Smooth the pixel edges
+        self._setProgress(feedback, 'Simplify water geometries')
+        if self._config.simplifyMethod == SimplifyMethod.COVERAGE:
+            self._simplifyCoverage([water], resolution)
+            return water
 
-            if layer.type() != QgsMapLayer.VectorLayer:
+        result = processing.run('qgis:simplifygeometries', {
+            'INPUT': water,
+            'TOLERANCE': resolution,
+            'OUTPUT': self._storage.getOutput('Water - Simplified')
+        }, feedback=feedback)
+        simplified = self._storage.track(result['OUTPUT'])
+        self._storage.release(water)
+
+        return simplified
+
+    def _getRivers(self, buffer, feedback):
+        """Gets the river lines within the buffer"""
+
+        rivers = self.createVectorLayer('Rivers', 'LineString', fileName=self._getOutputFileName('Rivers'))
+        tolerance = self._config.previewTolerance if self._config.preview else 0.0005
+        features = []
+
+        self._setProgress(feedback, 'Clipping and simplifying rivers')
+        for level in _WDB_RIVER_LEVELS:
+            shpPath = getRiverShapeFile(self.getGshhgPath(), self._getGshhgResolution(), level)
+
+            result = processing.run('qgis:clip', {
+                'INPUT': shpPath,
+                'OUTPUT': self._storage.getOutput('Rivers - Clipped L%d' % level.value),
+                'OVERLAY': buffer
+            }, feedback=feedback)
+            clipped = self._storage.track(result['OUTPUT'])
+
+            result = processing.run('qgis:simplifygeometries', {
+                'INPUT': clipped,
+                'METHOD': 0, # Distance
+                'OUTPUT': self._storage.getOutput('Rivers - Simplified L%d' % level.value),
+                'TOLERANCE': tolerance
+            }, feedback=feedback)
+            simplified = result['OUTPUT']
+            self._storage.release(clipped)
+
+            for f in simplified.getFeatures():
+                newFeature = QgsFeature()
+
+                newFeature.setGeometry(f.geometry())
+                features.append(newFeature)
+
+            self._storage.release(simplified)
+
+        rivers.dataProvider().addFeatures(features)
+
+        return rivers
+
+    @staticmethod
+    def _getExistingTerrainLayer():
+        """Gets the existing terrain layer from the Terrain group, or None"""
+        group = TerrainGenerator._getTerrainGroup()
+
+        if not group:
+            return None
+
+        for item in group.findLayers():
+            if item.layer().name() == 'Existing Terrain' and item.layer().isReadOnly():
+                return item.layer()
+
+        return None
+
+    @staticmethod
+    def _getLowland(layers):
+        """Gets the union of the lowland removed from the layers' contours (see _normalizeContours), or None.
+
+        The lowland of each contour set is stored alongside its final contours, eg. 'Contours - Lowland.gpkg'.
+        """
+        geometries = []
+
+        for layer in layers:
+            lowland = TerrainGenerator._getLowlandLayer(layer)
+
+            if lowland is not None:
+                geometries.extend(f.geometry() for f in lowland.getFeatures(QgsFeatureRequest().setNoAttributes()))
+
+        return QgsGeometry.unaryUnion(geometries) if geometries else None
+
+    @staticmethod
+    def _getLowlandLayer(contours):
+        """Gets the layer of the lowland removed from the final contours layer, or None if it doesn't have one"""
+        fileName = contours.source().split('|')[0]
+        baseName = os.path.basename(fileName)
+
+        if ' - Final' not in baseName:
+            return None
+
+        lowlandFile = os.path.join(os.path.dirname(fileName), baseName.replace(' - Final', ' - Lowland'))
+
+        if not os.path.isfile(lowlandFile):
+            return None
+
+        return QgsVectorLayer(lowlandFile, 'Lowland')
+
+    @staticmethod
+    def _getPolygonParts(geometry):
+        """Gets the list of single part polygons in the geometry, dropping the lines and points of an intersection"""
+        if geometry.isNull() or geometry.isEmpty():
+            return []
+
+        return [
+            part for part in geometry.asGeometryCollection()
+            if part.type() == QgsWkbTypes.PolygonGeometry and not part.isEmpty()
+        ]
+
+    @staticmethod
+    def _getStitchedMean(geometry, pieces):
+        """Gets the area weighted mean of the (tile, geometry, mean) pieces stitched into the geometry, or None"""
+        engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+        engine.prepareGeometry()
+        total = 0
+        area = 0
+
+        for _tile, piece, mean in pieces:
+            if mean is None or not engine.contains(piece.pointOnSurface().constGet()):
                 continue
 
-            features = filter(
-                lambda x: x.geometry().type() == QgsWkbTypes.PolygonGeometry,
-                layer.selectedFeatures()
-            )
+            total += piece.area() * mean
+            area += piece.area()
 
-            selected.extend(features)
+        return total / area if area else None
 
-        return selected
+    @staticmethod
+    def _getTerrainLayer(name):
+        """Gets the generated layer with the name from the Terrain group, or None"""
+        group = TerrainGenerator._getTerrainGroup()
+
+        if not group:
+            return None
+
+        for item in group.findLayers():
+            if item.layer().name() == name and not item.layer().isReadOnly():
+                return item.layer()
+
+        return None
 
     @staticmethod
     def _getTerrainGroup():
         """Gets the terrain group"""
         return QgsProject.instance().layerTreeRoot().findGroup('Terrain')
 
-    def _getWater(self, airspace, buffer, feedback):
-        """Get the water layer."""
-        gshhsPath = self.getGshhgPath()
-
-        self._setProgress(feedback, 'Loading coastlines and lakes')
-        coastlinePath = getShorelineShapeFile(gshhsPath, Resolution.FULL, ShorelineLevel.CONTINENTAL)
-        coastlines = QgsVectorLayer(coastlinePath, 'Coastline')
-        lakesPath = getShorelineShapeFile(gshhsPath, Resolution.FULL, ShorelineLevel.LAKES)
-        lakes = QgsVectorLayer(lakesPath, 'Lakes')
+    def _getTiledContourPolygons(self, tiles, clippedDem, perimeter, contourSet, feedback):
+        """Get the contour polygons, generating each tile in a background task and stitching the results.
+
+        Each tile task has its own processing context, and all its inputs and outputs are files. The tiles aren't
+        simplified until they've been stitched, so the polygons either side of the tile edges are simplified together
+        as a coverage.
+        """
+        tilesPath = os.path.join(self.getTempPath(), 'tiles', self.getIcao())
+        shutil.rmtree(tilesPath, ignore_errors=True)
+        os.makedirs(tilesPath)
+
+        # The perimeter is shared with the tasks as a file, as layers can't be shared between threads
+        perimeterFile = os.path.join(tilesPath, 'Perimeter.gpkg')
+        QgsVectorFileWriter.writeAsVectorFormat(perimeter, perimeterFile, 'utf-8', perimeter.crs(), 'GPKG')
+
+        self._setProgress(feedback, 'Generating contour polygons in %d tiles' % len(tiles))
+        demFile = clippedDem.source()
+        workers = self._config.tileWorkers or os.cpu_count()
+        results = [None] * len(tiles)
+        finished = [threading.Event() for _ in tiles]
+        tasks = []
+
+        def generateTile(_task, index):
+            try:
+                results[index] = self._getTilePolygons(
+                    tiles[index], demFile, perimeterFile, tilesPath, contourSet, feedback
+                )
+            except Exception as e: # pylint: disable=broad-except
+                results[index] = e
+            finally:
+                finished[index].set()
+
+        # The tasks are never touched once added, as the task manager deletes them when they've finished. The thread
+        # is handed back to the pool while waiting, in case this is running in a task too
+        pool = QThreadPool.globalInstance()
+        pool.releaseThread()
+
+        try:
+            for index, tile in enumerate(tiles):
+                if index >= workers:
+                    finished[index - workers].wait()
+
+                if feedback.isCanceled():
+                    break
+
+                task = QgsTask.fromFunction('Contour tile %d-%d' % (tile['col'], tile['row']), generateTile, index)
+                tasks.append(task)
+                QgsApplication.taskManager().addTask(task)
+
+            for index in range(len(tasks)):
+                finished[index].wait()
+                feedback.setProgress(100 * (index + 1) / len(tiles))
+        finally:
+            pool.reserveThread()
+
+        if feedback.isCanceled():
+            raise QgsProcessingException('The terrain generation was cancelled')
+
+        pieces = []
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+            tile, polygonFile = result
+            for f in QgsVectorLayer(polygonFile).getFeatures():
+                pieces.append((tile, f.geometry()))
+
+        self._setProgress(feedback, 'Stitching contour polygons')
+        features = []
+        for geometry in stitchPolygons(pieces):
+            feature = QgsFeature()
+            feature.setGeometry(geometry)
+            features.append(feature)
+
+        polygons = self.createMemoryLayer('Contours - Polygons', 'Polygon')
+        polygons.dataProvider().addFeatures(features)
+
+        shutil.rmtree(tilesPath, ignore_errors=True)
+
+        self._setProgress(feedback, 'Simplify contour polygons')
+        self._simplifyCoverage([polygons], self._getTolerance())
+
+        return polygons
+
+    def _getTilePolygons(self, tile, demFile, perimeterFile, tilesPath, contourSet, mainFeedback):
+        """Generate the unsimplified contour polygons within the tile, returning the tile and the polygons file.
+
+        This is run in a background task, so all the inputs and outputs are files.
+        """
+        if mainFeedback.isCanceled():
+            raise QgsProcessingException('The terrain generation was cancelled')
+
+        context = QgsProcessingContext()
+        feedback = QgsProcessingFeedback()
+        storage = IntermediateStorage()
+        name = 'Tile %d-%d' % (tile['col'], tile['row'])
+        overlap = self._config.tileOverlap
+        extent = '%f,%f,%f,%f [EPSG:4326]' % (tile['xMin'], tile['xMax'], tile['yMin'], tile['yMax'])
+
+        # Generate the contours for the tile from the overlapping DEM so they're continuous across the edges
+        result = processing.run('gdal:cliprasterbyextent', {
+            'INPUT': demFile,
+            'PROJWIN': '%f,%f,%f,%f [EPSG:4326]' % (
+                tile['xMin'] - overlap, tile['xMax'] + overlap,
+                tile['yMin'] - overlap, tile['yMax'] + overlap
+            ),
+            'OPTIONS': self._rasterProfile.getOptionsString(),
+            'OUTPUT': os.path.join(tilesPath, '%s.tif' % name)
+        }, feedback=feedback, context=context)
+
+        contours = self._getContours(
+            result['OUTPUT'],
+            os.path.join(tilesPath, '%s - Contours.shp' % name),
+            contourSet,
+            feedback,
+            context
+        )
+
+        # Clip the contours and the perimeter to the tile
+        result = processing.run('native:extractbyextent', {
+            'INPUT': contours,
+            'EXTENT': extent,
+            'CLIP': True,
+            'OUTPUT': _MEMORY_OUTPUT
+        }, feedback=feedback, context=context)
+        clippedContours = result['OUTPUT']
 
-        # Clip by the buffer
-        self._setProgress(feedback, 'Clipping coastlines to buffer')
-        result = processing.run('qgis:clip', {
-            'INPUT': coastlines,
-            'OVERLAY': buffer,
+        result = processing.run('native:extractbyextent', {
+            'INPUT': perimeterFile,
+            'EXTENT': extent,
+            'CLIP': True,
             'OUTPUT': _MEMORY_OUTPUT
-        }, feedback=feedback)
-        clipped_coastlines = result['OUTPUT']
+        }, feedback=feedback, context=context)
+        clippedPerimeter = result['OUTPUT']
 
-        result = processing.run('qgis:clip', {
-            'INPUT': lakes,
-            'OVERLAY': buffer,
+        # Close the polygons along the interior edges of the tile, these are removed when stitching
+        result = processing.run('qgis:mergevectorlayers', {
+            'LAYERS': [clippedPerimeter, self._getCutLinesLayer(tile)],
             'OUTPUT': _MEMORY_OUTPUT
-        }, feedback=feedback)
-        clipped_lakes = result['OUTPUT']
+        }, feedback=feedback, context=context)
+        boundary = result['OUTPUT']
+
+        polygons = self._getContourPolygons(clippedContours, boundary, feedback, storage, context, False)
+
+        polygonFile = os.path.join(tilesPath, '%s - Polygons.gpkg' % name)
+        QgsVectorFileWriter.writeAsVectorFormat(polygons, polygonFile, 'utf-8', polygons.crs(), 'GPKG')
 
+        return (tile, polygonFile)
+
+    def _getTiles(self, boundingLayer):
+        """Gets the tiles the contours should be generated in, a single tile if tiling is disabled."""
+        return getTiles(boundingLayer.extent(), self._config.tileSize or math.inf)
+
+    def _getTolerance(self):
+        """Gets the tolerance (in degrees) the contours and coastlines are simplified with"""
+        return self._config.previewTolerance if self._config.preview else 0.002
+
+    def _getVectorWater(self, coastlines, lakes, buffer, feedback):
+        """Get the water within the buffer, by inverting the coastlines and merging in the lakes."""
         # Simplify
         self._setProgress(feedback, 'Simplify coastline geometries')
-        result = processing.run('qgis:simplifygeometries', {
-            'INPUT': clipped_coastlines,
-            'TOLERANCE': 0.002,
-            'OUTPUT': _MEMORY_OUTPUT
-        }, feedback=feedback)
-        cleaned = result['OUTPUT']
+        if self._config.simplifyMethod == SimplifyMethod.COVERAGE:
+            # The coastlines and lakes share the edges where they were clipped by the buffer
+            self._simplifyCoverage([coastlines, lakes], self._getTolerance())
+            cleaned = coastlines
+        else:
+            result = processing.run('qgis:simplifygeometries', {
+                'INPUT': coastlines,
+                'TOLERANCE': self._getTolerance(),
+                'OUTPUT': self._storage.getOutput('Coastline - Simplified')
+            }, feedback=feedback)
+            cleaned = self._storage.track(result['OUTPUT'])
+            self._storage.release(coastlines)
 
         # Delete any small islands
         self._setProgress(feedback, 'Deleting small islands')
@@ -404,35 +1419,72 @@ class TerrainGenerator(GeneratorBase):
         result = processing.run('qgis:difference', {
             'INPUT': buffer,
             'OVERLAY': cleaned,
-            'OUTPUT': _MEMORY_OUTPUT
+            'OUTPUT': self._storage.getOutput('Sea')
         }, feedback=feedback)
-        difference = result['OUTPUT']
+        difference = self._storage.track(result['OUTPUT'])
+        self._storage.release(cleaned)
 
         # Merge sea with lakes
         self._setProgress(feedback, 'Combining lakes and sea')
         result = processing.run('qgis:mergevectorlayers', {
-            'LAYERS': [difference, clipped_lakes],
-            'OUTPUT': _MEMORY_OUTPUT
+            'LAYERS': [difference, lakes],
+            'OUTPUT': self._storage.getOutput('Water - Merged')
         }, feedback=feedback)
-        merged_water = result['OUTPUT']
+        merged = self._storage.track(result['OUTPUT'])
+        self._storage.release(difference, lakes)
+
+        return merged
+
+    def _getWater(self, airspace, buffer, feedback):
+        """Get the water layer."""
+        gshhsPath = self.getGshhgPath()
+
+        self._setProgress(feedback, 'Loading coastlines and lakes')
+        coastlinePath = getShorelineShapeFile(gshhsPath, self._getGshhgResolution(), ShorelineLevel.CONTINENTAL)
+        coastlines = QgsVectorLayer(coastlinePath, 'Coastline')
+        lakesPath = getShorelineShapeFile(gshhsPath, self._getGshhgResolution(), ShorelineLevel.LAKES)
+        lakes = QgsVectorLayer(lakesPath, 'Lakes')
+
+        # Clip by the buffer
+        self._setProgress(feedback, 'Clipping coastlines to buffer')
+        result = processing.run('qgis:clip', {
+            'INPUT': coastlines,
+            'OVERLAY': buffer,
+            'OUTPUT': self._storage.getOutput('Coastline - Clipped')
+        }, feedback=feedback)
+        clipped_coastlines = self._storage.track(result['OUTPUT'])
+
+        result = processing.run('qgis:clip', {
+            'INPUT': lakes,
+            'OVERLAY': buffer,
+            'OUTPUT': self._storage.getOutput('Lakes - Clipped')
+        }, feedback=feedback)
+        clipped_lakes = self._storage.track(result['OUTPUT'])
+
+        if self._config.waterEngine == WaterEngine.RASTER:
+            merged_water = self._getRasterWater(clipped_coastlines, clipped_lakes, buffer, feedback)
+        else:
+            merged_water = self._getVectorWater(clipped_coastlines, clipped_lakes, buffer, feedback)
 
         # Re-clip by the airspace
         self._setProgress(feedback, 'Clipping water to airspace')
         result = processing.run('qgis:clip', {
             'INPUT': merged_water,
             'OVERLAY': airspace,
-            'OUTPUT': _MEMORY_OUTPUT
+            'OUTPUT': self._storage.getOutput('Water - Clipped')
         })
-        clipped = result['OUTPUT']
+        clipped = self._storage.track(result['OUTPUT'])
+        self._storage.release(merged_water)
 
         # Multipart to single part
         self._setProgress(feedback, 'Converting water to single part')
         result = processing.run('qgis:multiparttosingleparts', {
             'INPUT': clipped,
-            'OUTPUT': self.getOgrString('Water')
+            'OUTPUT': self._getOutputString('Water')
         }, feedback=feedback)
         water = result['OUTPUT']
         water.setName('Water')
+        self._storage.release(clipped)
 
         # Delete any small area of water
         self._setProgress(feedback, 'Deleting small areas of water')
@@ -441,21 +1493,82 @@ class TerrainGenerator(GeneratorBase):
 
         # Add an elevation attribute (0)
         self._setProgress(feedback, 'Adding height data')
-        water.startEditing()
-        water.addAttribute(QgsField("elevation", QVariant.Double))
-        elevationIndex = water.fields().indexFromName('elevation')
-        for f in water.getFeatures():
-            f[elevationIndex] = 0
-            water.updateFeature(f)
-        water.commitChanges()
-
-        # Styling
-        water.renderer().symbol().setColor(QColor.fromRgb(0x00, 0xff, 0xff))
+        self.setAttributeValues(water, [QgsField('elevation', QVariant.Double)], [0])
 
         return water
 
-    def _normalizeContours(self, contours, elevation, feedback):
-        """Normalize the contours."""
+    def _getWaterResolution(self):
+        """Gets the size (in degrees) of the raster water engine's pixels"""
+        if self._config.preview:
+            return max(self._config.waterResolution, self._config.previewTolerance)
+
+        return self._config.waterResolution
+
+    def _getWindowPolygons(self, tile, dem, contourSet, feedback):
+        """Generates the simplified contour polygons within the tile from the DEM layer, with the mean height of each.
+
+        The contours are simplified before they're polygonised whatever the simplification method, so the corners of
+        the tile aren't cut by a coverage simplification.
+        """
+        overlap = self._config.tileOverlap
+        extent = '%f,%f,%f,%f [EPSG:4326]' % (tile['xMin'], tile['xMax'], tile['yMin'], tile['yMax'])
+
+        # Generate the contours from the overlapping DEM so they match the unedited contours along the edges
+        self._setProgress(feedback, 'Clipping DEM to the edited region')
+        result = processing.run('gdal:cliprasterbyextent', {
+            'INPUT': dem.source(),
+            'PROJWIN': '%f,%f,%f,%f [EPSG:4326]' % (
+                tile['xMin'] - overlap, tile['xMax'] + overlap,
+                tile['yMin'] - overlap, tile['yMax'] + overlap
+            ),
+            'OPTIONS': self._rasterProfile.getOptionsString(),
+            'OUTPUT': self._storage.getFile('Elevation - Window.tif')
+        }, feedback=feedback)
+        demFile = result['OUTPUT']
+
+        contourFile = self._storage.getFile('Contours - Window.shp')
+        contours = self._getContours(demFile, contourFile, contourSet, feedback)
+        self._storage.release(demFile)
+
+        result = processing.run('native:extractbyextent', {
+            'INPUT': contours,
+            'EXTENT': extent,
+            'CLIP': True,
+            'OUTPUT': self._storage.getOutput('Contours - Clipped')
+        }, feedback=feedback)
+        clipped = self._storage.track(result['OUTPUT'])
+        self._storage.release(contours)
+
+        self._setProgress(feedback, 'Simplify contours')
+        result = processing.run('qgis:simplifygeometries', {
+            'INPUT': clipped,
+            'TOLERANCE': self._getTolerance(),
+            'OUTPUT': self._storage.getOutput('Contours - Simplified')
+        }, feedback=feedback)
+        simplified = self._storage.track(result['OUTPUT'])
+        self._storage.release(clipped)
+
+        cutLines = self._getCutLinesLayer(tile)
+        polygons = self._getContourPolygons(simplified, cutLines, feedback, self._storage, None, False)
+        self._storage.release(simplified)
+
+        self._setProgress(feedback, 'Calculating zonal statistics')
+        processing.run('qgis:zonalstatistics', {
+            'INPUT_RASTER': dem,
+            'INPUT_VECTOR': polygons,
+            'RASTER_BAND': 1,
+            'STATS' : [2], # mean
+            'COLUMN_PREFIX' : '_'
+        }, feedback=feedback)
+
+        return polygons
+
+    def _normalizeContours(self, contours, elevation, contourSet, feedback, lowlandName=None):
+        """Normalize the contours.
+
+        If `lowlandName` is specified the polygons removed for being below the lowest level are written to that output
+        layer, as the area deliberately left uncovered.
+        """
         # Calculate zonal statistics
         self._setProgress(feedback, 'Calculating zonal statistics')
         processing.run('qgis:zonalstatistics', {
@@ -466,18 +1579,260 @@ class TerrainGenerator(GeneratorBase):
             'COLUMN_PREFIX' : '_'
         }, feedback=feedback)
 
-        contourInterval = self._getContourInterval()
-
         # Remove any polygons lower than the altitude interval
         self._setProgress(feedback, 'Removing contours below min interval')
-        it = contours.getFeatures(QgsFeatureRequest().setFilterExpression('_mean < %f' % contourInterval))
-        contours.dataProvider().deleteFeatures([i.id() for i in it])
+        minimum = getMinimumLevel(contourSet)
+        lowland = list(contours.getFeatures(QgsFeatureRequest().setFilterExpression('_mean < %f' % minimum)))
 
-        # Add a virtual field containing the normalised height to the altitude interval
-        field = QgsField('elevation', QVariant.Double)
-        contours.addExpressionField('floor(_mean / %(interval)f) * %(interval)f' % {'interval': contourInterval}, field)
+        if lowlandName:
+            layer = self.createVectorLayer(lowlandName, 'MultiPolygon', fileName=self._getOutputFileName(lowlandName))
+            features = []
+
+            for f in lowland:
+                geometry = f.geometry()
+                geometry.convertToMultiType()
+
+                feature = QgsFeature(layer.fields())
+                feature.setGeometry(geometry)
+                features.append(feature)
+
+            layer.dataProvider().addFeatures(features)
+
+        contours.dataProvider().deleteFeatures([i.id() for i in lowland])
+
+    def _publishProvisional(self, layer, name):
+        """Publishes an intermediate layer to review while the later stages run, until the next output replaces it.
+
+        A separate read-only layer of the same file is published, so the pipeline can carry on using the intermediate.
+        """
+        if self._publish is None:
+            return
+
+        provisional = QgsVectorLayer(layer.source(), name)
+        provisional.setReadOnly(True)
+
+        if provisional.renderer():
+            provisional.renderer().symbol().setColor(QColor.fromRgb(0xff, 0x9e, 0x17))
+
+        self._provisional.append(provisional)
+        self._publish(provisional, [])
+
+    def _runStage(self, name, inputs, generate, feedback, layerType=QgsVectorLayer):
+        """Runs the pipeline stage, returning its output layer.
+
+        If the stage has a valid checkpoint for the inputs its output is loaded instead. `generate` is called
+        to run the stage, the output layer it returns must be stored in a file to be resumed from.
+        """
+        if feedback.isCanceled():
+            raise QgsProcessingException('The terrain generation was cancelled')
+
+        inputHash = CheckpointManifest.getHash(name, inputs)
+        output = self._checkpoints.getOutput(name, inputHash)
+
+        if output:
+            self._setProgress(feedback, 'Resuming from the \'%s\' checkpoint' % name)
+            return layerType(output, name)
+
+        layer = generate()
+
+        # A cancelled processing algorithm returns its partial output, which mustn't be resumed from
+        if feedback.isCanceled():
+            raise QgsProcessingException('The \'%s\' stage was cancelled' % name)
+
+        self._checkpoints.complete(name, inputHash, layer.source())
+
+        return layer
+
+    @staticmethod
+    def _simplifyCoverage(layers, tolerance):
+        """Simplifies the polygons in all the layers together, so shared edges are simplified identically.
+
+        The geometries are updated in place, and any features that collapse are deleted.
+        """
+        keys = []
+        polygons = []
+
+        for layerIndex, layer in enumerate(layers):
+            for f in layer.getFeatures(QgsFeatureRequest().setNoAttributes()):
+                geometry = f.geometry()
+                parts = geometry.asMultiPolygon() if geometry.isMultipart() else [geometry.asPolygon()]
+
+                for part in parts:
+                    keys.append((layerIndex, f.id()))
+                    polygons.append([[(p.x(), p.y()) for p in ring] for ring in part])
+
+        # The simplified parts of each feature, by layer
+        simplified = [{} for _ in layers]
+        for (layerIndex, fid), polygon in zip(keys, simplifyCoverage(polygons, tolerance)):
+            parts = simplified[layerIndex].setdefault(fid, [])
+            if polygon:
+                parts.append([[QgsPointXY(x, y) for x, y in ring] for ring in polygon])
+
+        for layer, features in zip(layers, simplified):
+            isMultipart = QgsWkbTypes.isMultiType(layer.wkbType())
+            geometries = {}
+
+            for fid, parts in features.items():
+                if len(parts) == 1 and not isMultipart:
+                    geometries[fid] = QgsGeometry.fromPolygonXY(parts[0])
+                elif parts:
+                    geometries[fid] = QgsGeometry.fromMultiPolygonXY(parts)
+
+            layer.dataProvider().changeGeometryValues(geometries)
+            layer.dataProvider().deleteFeatures([fid for fid, parts in features.items() if not parts])
 
     def _setProgress(self, feedback, text):
-        """Updates the progress for the feedback object"""
+        """Updates the progress for the feedback object, at the start of each step.
+
+        A cancelled run stops here, as the steps carry on after their processing algorithm is cancelled.
+        """
+        if feedback.isCanceled():
+            raise QgsProcessingException('The terrain generation was cancelled')
+
+        if self._metrics is not None and feedback is self._feedback:
+            self._metrics.startStage(text)
+
         feedback.setProgressText(text)
         feedback.setProgress(0)
+
+    def _updateContours(self, contours, window, dem, contourSet, feedback):
+        """Generates the contours again within the window (a QgsRectangle), returning the number of polygons replaced.
+
+        Only the pieces inside the window are generated again. The polygons it cuts keep their geometry and mean
+        outside it, and are stitched to the new pieces of the same band along its edges. The small polygons are then
+        eliminated into their neighbours, including the unedited polygons around them, and spliced back into the final
+        contours, or the lowland if they're below the lowest level.
+        """
+        name = contours.name()
+        lowland = TerrainGenerator._getLowlandLayer(contours)
+        layers = [layer for layer in [contours, lowland] if layer is not None]
+        rectangle = QgsGeometry.fromRect(window)
+
+        # An interior tile, so all the edges of the window are cut lines
+        inside = {
+            'col': 1,
+            'cols': 3,
+            'row': 1,
+            'rows': 3,
+            'xMin': window.xMinimum(),
+            'xMax': window.xMaximum(),
+            'yMin': window.yMinimum(),
+            'yMax': window.yMaximum()
+        }
+        outside = dict(inside)
+
+        # The (tile, geometry, mean) pieces of each band, starting with the polygons cut by the window outside it
+        self._setProgress(feedback, 'Cutting \'%s\' by the edited region' % name)
+        pieces = {}
+        replaced = [set() for _ in layers]
+        covered = []
+
+        for layer, ids in zip(layers, replaced):
+            for f in layer.getFeatures(QgsFeatureRequest().setFilterRect(window)):
+                geometry = f.geometry()
+
+                if not geometry.intersects(rectangle):
+                    continue
+
+                ids.add(f.id())
+                covered.append(geometry.intersection(rectangle))
+                mean = None if layer is lowland or f['_mean'] == NULL else f['_mean']
+                band = TerrainGenerator._getBand(contourSet, mean)
+
+                for part in TerrainGenerator._getPolygonParts(geometry.difference(rectangle)):
+                    pieces.setdefault(band, []).append((outside, part, mean))
+
+        if not covered:
+            return 0
+
+        # The new pieces only cover what the terrain did, eg. not outside the airspace
+        footprint = QgsGeometry.unaryUnion(covered)
+        polygons = self._getWindowPolygons(inside, dem, contourSet, feedback)
+
+        for f in polygons.getFeatures():
+            for part in TerrainGenerator._getPolygonParts(f.geometry().intersection(footprint)):
+                mean = f['_mean']
+
+                # Pieces too small to contain a pixel are sampled at a point inside them
+                if mean == NULL:
+                    mean, ok = dem.dataProvider().sample(part.pointOnSurface().asPoint(), 1)
+                    mean = mean if ok else None
+
+                pieces.setdefault(TerrainGenerator._getBand(contourSet, mean), []).append((inside, part, mean))
+
+        self._storage.release(polygons)
+
+        # Pieces of the same band either side of the window's edges are the same polygon
+        self._setProgress(feedback, 'Stitching the edited polygons of \'%s\'' % name)
+        edited = self.createMemoryLayer('Contours - Edited', 'MultiPolygon', [QgsField('_mean', QVariant.Double)])
+        features = []
+
+        for items in pieces.values():
+            for geometry in stitchPolygons([(tile, piece) for tile, piece, _mean in items]):
+                feature = QgsFeature(edited.fields())
+                geometry.convertToMultiType()
+                feature.setGeometry(geometry)
+                feature.setAttributes([TerrainGenerator._getStitchedMean(geometry, items)])
+                features.append(feature)
+
+        # The unedited neighbours of the small polygons, so they can be eliminated into them
+        small = [f.geometry().boundingBox() for f in features if f.geometry().area() < SLIVER_AREA]
+
+        for extent in small:
+            for layer, ids in zip(layers, replaced):
+                for f in layer.getFeatures(QgsFeatureRequest().setFilterRect(extent)):
+                    if f.id() in ids:
+                        continue
+
+                    ids.add(f.id())
+                    geometry = f.geometry()
+                    geometry.convertToMultiType()
+
+                    feature = QgsFeature(edited.fields())
+                    feature.setGeometry(geometry)
+                    feature.setAttributes([None if layer is lowland else f['_mean']])
+                    features.append(feature)
+
+        edited.dataProvider().addFeatures(features)
+
+        # Clean the edited polygons, as when they were generated
+        cleaned = self._eliminatePolygons(edited, feedback)
+
+        result = processing.run('qgis:multiparttosingleparts', {
+            'INPUT': cleaned,
+            'OUTPUT': _MEMORY_OUTPUT
+        }, feedback=feedback)
+        polygons = result['OUTPUT']
+        self._storage.release(cleaned)
+
+        # Splice the polygons back into the final layer, and those below the lowest level into the lowland
+        self._setProgress(feedback, 'Splicing the edited polygons into \'%s\'' % name)
+        minimum = getMinimumLevel(contourSet)
+        replacements = [[] for _ in layers]
+
+        for f in polygons.getFeatures():
+            mean = f['_mean']
+            layer = lowland if mean == NULL or mean < minimum else contours
+
+            if layer is None:
+                continue
+
+            geometry = f.geometry()
+            if QgsWkbTypes.isMultiType(layer.wkbType()):
+                geometry.convertToMultiType()
+
+            feature = QgsFeature(layer.dataProvider().fields())
+            feature.setGeometry(geometry)
+
+            if layer is contours:
+                feature.setAttribute('_mean', mean)
+
+            replacements[layers.index(layer)].append(feature)
+
+        for layer, ids, items in zip(layers, replaced, replacements):
+            layer.dataProvider().deleteFeatures(list(ids))
+            layer.dataProvider().addFeatures(items)
+
+        contours.triggerRepaint()
+
+        return len(replaced[0])
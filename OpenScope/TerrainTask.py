@@ -0,0 +1,95 @@
+"""A background task building the terrain."""
+from qgis.PyQt.QtCore import QCoreApplication, pyqtSignal
+from qgis.core import Qgis, QgsMessageLog, QgsTask
+from .TextProcessingFeedback import TextProcessingFeedback
+
+class TerrainTask(QgsTask):
+    """A background task building the terrain.
+
+    Each layer is published to the Terrain group on the main thread as soon as it's complete, while the later stages
+    keep running on the worker thread.
+    """
+
+    # Emitted from the worker thread with a layer to publish, and the list of layers it replaces
+    layerCompleted = pyqtSignal(object, object)
+
+    _clones = None
+
+    _exception = None
+
+    _feedback = None
+
+    _generator = None
+
+    _polygons = None
+
+#------------------- Lifecycle -------------------
+
+    def __init__(self, description, generator, polygons):
+        super(TerrainTask, self).__init__(description, QgsTask.CanCancel)
+
+        self._clones = {}
+        self._feedback = TextProcessingFeedback()
+        self._generator = generator
+        self._polygons = polygons
+
+        self._feedback.progressChanged.connect(self.setProgress)
+        self.layerCompleted.connect(self._layerCompleted)
+
+#------------------- Public -------------------
+
+    def cancel(self):
+        """Cancels the task, at the end of the current processing step"""
+        self._feedback.cancel()
+
+        super(TerrainTask, self).cancel()
+
+    def finished(self, result):
+        """Saves the project once the terrain is complete, on the main thread"""
+        if result:
+            self._generator.saveProject()
+        elif self._exception is not None and not self.isCanceled():
+            QgsMessageLog.logMessage(
+                'Unable to generate the terrain: %s' % self._exception,
+                'QgsOpenScope',
+                Qgis.Critical
+            )
+
+    def run(self):
+        """Builds the terrain layers, on the worker thread"""
+        try:
+            self._generator.buildTerrain(self._feedback, self._polygons, self._publish)
+        except Exception as e: # pylint: disable=broad-except
+            self._exception = e
+            return False
+
+        return not self.isCanceled()
+
+#------------------- Private -------------------
+
+    def _layerCompleted(self, layer, replaces):
+        """Handler for when a layer is completed, publishing it on the main thread"""
+        # The layers completed before a cancelled task stopped would be published over the next run's terrain
+        if self.isCanceled():
+            return
+
+        self._generator.publishLayer(layer, replaces)
+
+    def _publish(self, layer, replaces):
+        """Hands a clone of the layer to the main thread, as the worker thread may carry on using the layer"""
+        if self.isCanceled():
+            return
+
+        clone = layer.clone()
+
+        # A clone of a memory layer is empty
+        if layer.providerType() == 'memory':
+            clone.dataProvider().addFeatures(list(layer.getFeatures()))
+
+        clone.moveToThread(QCoreApplication.instance().thread())
+
+        # Provisional layers are read-only, and replaced by a later layer
+        if layer.isReadOnly():
+            self._clones[layer.id()] = clone
+
+        self.layerCompleted.emit(clone, [self._clones.pop(item.id()) for item in replaces if item.id() in self._clones])
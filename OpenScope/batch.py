@@ -0,0 +1,143 @@
+"""Batch terrain generation for a directory of airports, using a pool of worker processes.
+
+Each airport is generated in its own process, with its own QGIS instance, project and temp paths. The
+downloaded DEM and GSHHG files are shared between the workers.
+"""
+#pylint: disable=import-outside-toplevel
+
+import datetime
+import glob
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+REPORT_FILE = 'batch-report.json'
+
+#------------------- Public -------------------
+
+def generateTerrainBatch(airportPath, outputPath, processes=None, projectPath=None, cachePath=None,
+                         contourInterval=304.8, prefixPath=None):
+    """Generates the terrain for all the airport JSON files in `airportPath`.
+
+    A GeoJSON file for each airport is written to `outputPath`, along with a report of the per-airport
+    timings and failures, which is also returned.
+    """
+
+    airportFiles = sorted(glob.glob(os.path.join(airportPath, '*.json')))
+    processes = processes or os.cpu_count()
+    projectPath = projectPath or os.path.join(outputPath, 'projects')
+    cachePath = cachePath or tempfile.gettempdir()
+
+    os.makedirs(outputPath, exist_ok=True)
+
+    if not airportFiles:
+        raise Exception('No airport files were found in \'%s\'' % airportPath)
+
+    # Ensure the GSHHG archive is only downloaded once, rather than by every worker
+    from .utilities.gshhg import downloadArchive
+    downloadArchive(os.path.join(cachePath, 'qgsopenscope', 'gshhg'))
+
+    tasks = [{
+        'airportFile': airportFile,
+        'cachePath': cachePath,
+        'contourInterval': contourInterval,
+        'outputPath': outputPath,
+        'projectPath': projectPath
+    } for airportFile in airportFiles]
+
+    started = time.time()
+    results = []
+
+    # Spawn rather than fork as Qt doesn't survive forking. Every process only generates a single
+    # airport, so the memory used by QGIS is released between airports
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes, initializer=_initWorker, initargs=(prefixPath,), maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(_generateAirport, tasks):
+            results.append(result)
+            print('[%d/%d] %s %s in %.1fs%s' % (
+                len(results),
+                len(tasks),
+                result['icao'] or os.path.basename(result['airportFile']),
+                'generated' if result['success'] else 'failed',
+                result['seconds'],
+                '' if result['success'] else ': %s' % result['error']
+            ))
+
+    report = {
+        'started': datetime.datetime.fromtimestamp(started).isoformat(),
+        'seconds': time.time() - started,
+        'processes': processes,
+        'succeeded': len([r for r in results if r['success']]),
+        'failed': len([r for r in results if not r['success']]),
+        'airports': sorted(results, key=lambda x: x['airportFile'])
+    }
+
+    with open(os.path.join(outputPath, REPORT_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    return report
+
+#------------------- Private -------------------
+
+def _generateAirport(task):
+    """Generates the terrain for a single airport, returning the result rather than raising"""
+    from .AirportModel import AirportModel
+    from .ConsoleProcessingFeedback import ConsoleProcessingFeedback
+    from .TerrainGenerator import TerrainGeneratorConfig
+    from .headless import generateTerrain
+
+    airportFile = task['airportFile']
+    started = time.time()
+    tmpPath = tempfile.mkdtemp(prefix='qgsopenscope-batch-')
+    logPath = os.path.join(task['outputPath'], 'logs')
+    result = {
+        'airportFile': airportFile,
+        'icao': None,
+        'log': os.path.join(logPath, '%s.log' % os.path.splitext(os.path.basename(airportFile))[0]),
+        'output': None,
+        'success': False,
+        'error': None,
+        'seconds': 0
+    }
+
+    try:
+        icao = AirportModel(airportFile).getIcao()
+        result['icao'] = icao
+
+        config = TerrainGeneratorConfig()
+        config.airportFile = airportFile
+        config.cachePath = task['cachePath']
+        config.contourInterval = task['contourInterval']
+        config.projectPath = task['projectPath']
+        config.tmpPath = tmpPath
+
+        # The airports are already generated in parallel, so each process warps single-threaded
+        config.rasterThreads = 1
+
+        outputFile = os.path.join(task['outputPath'], '%s.geojson' % str.lower(icao))
+
+        os.makedirs(logPath, exist_ok=True)
+        with open(result['log'], 'w') as log:
+            generateTerrain(config, outputFile, feedback=ConsoleProcessingFeedback(log))
+
+        result['output'] = outputFile
+        result['success'] = True
+
+    except Exception as e: # pylint: disable=broad-except
+        result['error'] = str(e)
+
+    finally:
+        shutil.rmtree(tmpPath, ignore_errors=True)
+
+    result['seconds'] = time.time() - started
+
+    return result
+
+def _initWorker(prefixPath):
+    """Initialises QGIS in the worker process"""
+    from .headless import initQgis
+
+    initQgis(prefixPath)
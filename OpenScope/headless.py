@@ -0,0 +1,456 @@
+"""Headless terrain and project generation, for use outside of the QGIS desktop.
+
+Run from the plugin directory, eg.
+    python3 -m OpenScope.headless terrain path/to/einn.json path/to/einn.geojson
+    python3 -m OpenScope.headless project path/to/einn.json
+    python3 -m OpenScope.headless batch path/to/airports path/to/terrain
+    python3 -m OpenScope.headless diff path/to/einn.geojson path/to/existing/einn.geojson
+
+QGIS_PREFIX_PATH should be set (eg. /usr) and the QGIS python packages must be on the PYTHONPATH.
+"""
+#pylint: disable=import-outside-toplevel
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+_DEFAULT_PROJECT_PATH = os.path.expanduser('~/qgsopenscope')
+
+_QGIS_APP = None
+
+#------------------- Public -------------------
+
+def initQgis(prefixPath=None):
+    """Initialises a bare QgsApplication (without a GUI) and the processing framework.
+
+    Returns the QgsApplication, subsequent calls return the same instance.
+    """
+    global _QGIS_APP # pylint: disable=global-statement
+
+    if _QGIS_APP is not None:
+        return _QGIS_APP
+
+    from qgis.core import QgsApplication
+
+    prefixPath = prefixPath or os.environ.get('QGIS_PREFIX_PATH', '/usr')
+    QgsApplication.setPrefixPath(prefixPath, True)
+
+    app = QgsApplication([], False)
+    app.initQgis()
+
+    initProcessing()
+
+    _QGIS_APP = app
+
+    return app
+
+def initProcessing():
+    """Initialises the processing framework, and the native algorithms, in an existing QgsApplication"""
+    from qgis.core import QgsApplication
+
+    # The processing plugin isn't on the path outside of the desktop
+    pluginsPath = os.path.join(QgsApplication.pkgDataPath(), 'python', 'plugins')
+    if pluginsPath not in sys.path:
+        sys.path.append(pluginsPath)
+
+    from processing.core.Processing import Processing # pylint: disable=import-error
+    from qgis.analysis import QgsNativeAlgorithms
+
+    Processing.initialize()
+
+    if not QgsApplication.processingRegistry().providerById('native'):
+        QgsApplication.processingRegistry().addProvider(QgsNativeAlgorithms())
+
+def diffTerrain(terrainFile, existingFile, outputFile=None, feedback=None):
+    """Compares the terrain GeoJSON with the existing terrain GeoJSON, returning the summary of the comparison.
+
+    The added, removed and changed areas are written as layers of the `outputFile` GeoPackage, if specified.
+    """
+    from qgis.core import QgsVectorFileWriter, QgsVectorLayer
+    from .ConsoleProcessingFeedback import ConsoleProcessingFeedback
+    from .utilities.diff import diffTerrain as getDiff
+
+    feedback = feedback or ConsoleProcessingFeedback()
+    layers = []
+
+    for fileName in [terrainFile, existingFile]:
+        layer = QgsVectorLayer(fileName)
+
+        if not layer.isValid():
+            raise Exception('Unable to load the terrain \'%s\'' % fileName)
+
+        layers.append(layer)
+
+    feedback.setProgressText('Comparing %s with %s' % (terrainFile, existingFile))
+    result = getDiff([layers[0]], [layers[1]], feedback)
+
+    if outputFile:
+        partialFile = '%s.%d.gpkg' % (outputFile, os.getpid())
+
+        for i, key in enumerate(['added', 'removed', 'changed']):
+            options = QgsVectorFileWriter.SaveVectorOptions()
+            options.driverName = 'GPKG'
+            options.layerName = result[key].name()
+
+            if i > 0:
+                options.actionOnExistingFile = QgsVectorFileWriter.CreateOrOverwriteLayer
+
+            error, message = QgsVectorFileWriter.writeAsVectorFormat(result[key], partialFile, options)
+
+            if error != QgsVectorFileWriter.NoError:
+                raise Exception('Unable to write \'%s\': %s' % (outputFile, message))
+
+        os.replace(partialFile, outputFile)
+
+    return result['summary']
+
+def exitQgis():
+    """Exits the QgsApplication created by initQgis"""
+    global _QGIS_APP # pylint: disable=global-statement
+
+    if _QGIS_APP is not None:
+        _QGIS_APP.exitQgis()
+        _QGIS_APP = None
+
+def generateProject(airportFile, projectPath=_DEFAULT_PROJECT_PATH, tmpPath=None, feedback=None):
+    """Populates and saves the QGIS project for the airport, returning the project filename."""
+    from qgis.core import QgsProject
+    from .ProjectGenerator import LayerType, ProjectGenerator, ProjectGeneratorConfig
+    from .ConsoleProcessingFeedback import ConsoleProcessingFeedback
+
+    feedback = feedback or ConsoleProcessingFeedback()
+
+    config = ProjectGeneratorConfig()
+    config.airportFile = airportFile
+    config.projectPath = projectPath
+    config.tmpPath = tmpPath or tempfile.gettempdir()
+    config.layers = LayerType.All
+
+    project = ProjectGenerator(config)
+    config.mapNames = list(map(lambda x: x.name, project.getAirport().getMaps()))
+
+    QgsProject.instance().clear()
+
+    feedback.setProgressText('Populating project for %s' % project.getIcao())
+    project.populateProject(feedback)
+    project.saveProject()
+
+    return QgsProject.instance().fileName()
+
+def generateTerrain(config, outputFile, airspace=None, hiddenAirspace=False, saveProject=False, feedback=None,
+                    exportFormats=None, reportFile=None, maxBytes=None, maxVertices=None, maxFeatureVertices=None,
+                    maxFeatureSize=None):
+    """Generates the terrain for the TerrainGeneratorConfig and exports it as GeoJSON.
+
+    The terrain bounds are taken from the airport's airspace, limited to the `airspace` indices if specified.
+    If several contour sets are generated, each is exported with the water to its own file, named after the
+    set (eg. einn-152.4m.geojson). Any other `exportFormats` are written alongside, and the size, write and
+    parse times of each file are written to the `reportFile` JSON if specified. The terrain is simplified to fit
+    the `maxBytes` GeoJSON size and/or `maxVertices`, and polygons over `maxFeatureVertices` or `maxFeatureSize`
+    degrees across are split along a grid, if specified. Returns the list of GeoJSON filenames.
+    """
+    from qgis.core import QgsProject
+    from .ConsoleProcessingFeedback import ConsoleProcessingFeedback
+    from .TerrainGenerator import TerrainGenerator
+    from .utilities.exporter import exportTerrain
+
+    feedback = feedback or ConsoleProcessingFeedback()
+
+    QgsProject.instance().clear()
+
+    terrain = TerrainGenerator(config)
+    polygons = terrain.getAirspacePolygons(hiddenAirspace, airspace)
+
+    if not polygons:
+        raise Exception('No airspace polygons were found in \'%s\'' % config.airportFile)
+
+    terrain.generateTerrain(feedback, polygons)
+
+    if saveProject:
+        terrain.saveProject()
+
+    layers = TerrainGenerator.getTerrainLayers()
+    contours = [layer for layer in layers if layer.name().startswith('Contours')]
+    others = [layer for layer in layers if layer not in contours]
+
+    if len(contours) <= 1:
+        exports = [(layers, outputFile)]
+    else:
+        exports = [(others + [layer], _getContourFileName(outputFile, layer.name())) for layer in contours]
+
+    report = []
+
+    for items, fileName in exports:
+        feedback.setProgressText('Exporting terrain to %s' % fileName)
+        exported = exportTerrain(
+            items, fileName, exportFormats, maxBytes, maxVertices, maxFeatureVertices, maxFeatureSize
+        )
+        report.extend(exported)
+
+        statistics = exported[0]['vertexStatistics']
+        feedback.pushInfo('Exported %d features, %d vertices (max %d, median %d, 95th percentile %d per feature)' % (
+            statistics['features'], statistics['vertices'], statistics['max'], statistics['median'], statistics['p95']
+        ))
+
+        if maxBytes or maxVertices:
+            feedback.pushInfo('Simplified with a tolerance of %g, %d vertices and %d bytes' % (
+                exported[0]['tolerance'], exported[0]['vertices'], exported[0]['bytes']
+            ))
+
+    if reportFile:
+        for item in report:
+            item['parseSeconds'] = _getParseSeconds(item['fileName'])
+
+        with open(reportFile, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return [fileName for _, fileName in exports]
+
+def main(argv=None):
+    """The command-line entry point"""
+    args = _getArgumentParser().parse_args(argv)
+
+    # The batch workers each initialise their own QGIS instance
+    if args.command == 'batch':
+        return _runBatch(args)
+
+    initQgis(args.prefix)
+
+    from .utilities.exporter import ExportFormat
+
+    try:
+        if args.command == 'diff':
+            print(json.dumps(diffTerrain(args.terrain, args.existing, args.output), indent=2))
+            return 0
+
+        if args.command == 'project':
+            fileName = generateProject(args.airport, args.project_path, args.tmp_path)
+        else:
+            fileName = ', '.join(generateTerrain(
+                _buildTerrainConfig(args),
+                args.output,
+                args.airspace,
+                args.hidden_airspace,
+                args.save_project,
+                exportFormats=[ExportFormat(item) for item in args.export_format or []],
+                reportFile=args.export_report,
+                maxBytes=int(args.max_size * 1024 * 1024) if args.max_size else None,
+                maxVertices=args.max_vertices,
+                maxFeatureVertices=args.max_feature_vertices,
+                maxFeatureSize=args.max_feature_size
+            ))
+
+        print('Saved %s' % fileName)
+        return 0
+
+    except Exception as e: # pylint: disable=broad-except
+        print('ERROR: %s' % e, file=sys.stderr)
+        return 1
+
+    finally:
+        exitQgis()
+
+#------------------- Private -------------------
+
+def _buildTerrainConfig(args):
+    """Builds the TerrainGeneratorConfig from the parsed arguments"""
+    from .IntermediateStorage import StorageMode
+    from .TerrainGenerator import SimplifyMethod, TerrainGeneratorConfig, WaterEngine
+
+    config = TerrainGeneratorConfig()
+
+    config.airportFile = args.airport
+    config.projectPath = args.project_path
+    config.tmpPath = args.tmp_path or tempfile.gettempdir()
+    config.contourIntervals = args.contour_interval
+    config.contourLevels = args.contour_levels
+    config.tileSize = args.tile_size
+    config.demResolution = args.dem_resolution
+    config.demSmoothing = args.dem_smoothing
+    config.fillVoids = not args.no_fill_voids
+    config.maskOcean = args.mask_ocean
+    config.preview = args.preview
+    config.qualityCheck = args.quality_check
+    config.simplifyMethod = SimplifyMethod(args.simplify)
+    config.storageMode = StorageMode(args.storage)
+    config.waterEngine = WaterEngine(args.water)
+    config.resume = not args.no_resume
+    config.rasterCacheSize = args.gdal_cache
+    config.rasterThreads = args.gdal_threads
+    config.memoryBudget = int(args.memory_budget * 1024 * 1024)
+
+    return config
+
+def _getContourFileName(outputFile, layerName):
+    """Gets the export filename for a contour set's layer, eg. 'Contours 152.4 m - Final' => einn-152.4m.geojson"""
+    base, ext = os.path.splitext(outputFile)
+    label = layerName.replace('Contours', '').replace('- Final', '').replace(' ', '')
+
+    return '%s-%s%s' % (base, label.lower(), ext)
+
+def _getParseSeconds(fileName):
+    """Gets the time (in seconds) taken to read and parse the (optionally gzip compressed) JSON file"""
+    started = time.time()
+
+    with (gzip.open(fileName, 'rt', encoding='utf-8') if fileName.endswith('.gz') else open(fileName)) as f:
+        json.load(f)
+
+    return time.time() - started
+
+def _parseLevels(value):
+    """Parses a comma separated list of contour levels"""
+    try:
+        return [float(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError('\'%s\' is not a comma separated list of levels' % value)
+
+def _runBatch(args):
+    """Runs the batch terrain generation, returning the exit code"""
+    from .batch import REPORT_FILE, generateTerrainBatch
+
+    report = generateTerrainBatch(
+        args.airports,
+        args.output,
+        processes=args.processes,
+        projectPath=args.project_path,
+        cachePath=args.tmp_path,
+        contourInterval=args.contour_interval,
+        prefixPath=args.prefix
+    )
+
+    print('Generated %d airports, %d failed, in %.1fs. See %s' % (
+        report['succeeded'],
+        report['failed'],
+        report['seconds'],
+        os.path.join(args.output, REPORT_FILE)
+    ))
+
+    return 1 if report['failed'] else 0
+
+def _getArgumentParser():
+    """Gets the command-line argument parser"""
+    parser = argparse.ArgumentParser(prog='python3 -m OpenScope.headless', description=__doc__.splitlines()[0])
+    parser.add_argument('--prefix', help='The QGIS prefix path (defaults to $QGIS_PREFIX_PATH or /usr)')
+    parser.add_argument('--project-path', default=_DEFAULT_PROJECT_PATH, help='Where project files are stored')
+    parser.add_argument('--tmp-path', help='Where temporary (downloaded) files are stored')
+
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    project = commands.add_parser('project', help='Populate and save the QGIS project for an airport')
+    project.add_argument('airport', help='The openScope airport JSON file')
+
+    terrain = commands.add_parser('terrain', help='Generate and export the terrain for an airport')
+    terrain.add_argument('airport', help='The openScope airport JSON file')
+    terrain.add_argument('output', help='The terrain GeoJSON file to write')
+    terrain.add_argument(
+        '--airspace', type=int, nargs='+',
+        help='The indices of the airspace polygons used for the bounds (defaults to all)'
+    )
+    terrain.add_argument(
+        '--hidden-airspace', action='store_true',
+        help='Use the hidden (_airspace) polygons rather than the airspace polygons'
+    )
+    terrain.add_argument(
+        '--contour-interval', type=float, nargs='+',
+        help='The contour intervals in metres (defaults to 304.8), each is generated from the same DEM'
+    )
+    terrain.add_argument(
+        '--contour-levels', type=_parseLevels, action='append',
+        help='A comma separated list of explicit contour levels in metres, may be repeated'
+    )
+    terrain.add_argument(
+        '--tile-size', type=float,
+        help='Generate the contours in parallel tiles of this size (in degrees), for very large airspaces'
+    )
+    terrain.add_argument(
+        '--dem-resolution', type=float,
+        help='Resample the DEM to this resolution (in degrees) before contouring, eg. 0.001, bounding the vertex counts'
+    )
+    terrain.add_argument(
+        '--dem-smoothing', type=int, default=0,
+        help='Smooth the DEM with a box filter of this radius (in pixels) before contouring'
+    )
+    terrain.add_argument(
+        '--no-fill-voids', action='store_true',
+        help='Contour the SRTM tiles as they are, rather than filling their voids first'
+    )
+    terrain.add_argument(
+        '--mask-ocean', action='store_true',
+        help='Set the DEM to sea level under the water before contouring, removing the contours over the sea'
+    )
+    terrain.add_argument(
+        '--preview', action='store_true',
+        help='Generate a quick, low resolution preview, eg. to tune the airspace or contour interval'
+    )
+    terrain.add_argument(
+        '--simplify', choices=['independent', 'coverage'], default='independent',
+        help='Simplify each geometry independently, or shared edges once as a coverage'
+    )
+    terrain.add_argument(
+        '--water', choices=['vector', 'raster'], default='vector',
+        help='Invert the coastlines with a geometric difference, or rasterise the land and vectorise the water once'
+    )
+    terrain.add_argument(
+        '--storage', choices=['memory', 'scratch', 'auto'], default='memory',
+        help='Keep the intermediate layers in memory, in scratch GeoPackages, or in memory up to the --memory-budget'
+    )
+    terrain.add_argument(
+        '--memory-budget', type=float, default=1024,
+        help='The memory (in MB) used by intermediate layers before the auto storage spills to disk'
+    )
+    terrain.add_argument('--gdal-cache', type=int, default=512, help='The size (in MB) of the GDAL block cache')
+    terrain.add_argument(
+        '--gdal-threads', type=int,
+        help='The number of threads used by GDAL warps (defaults to the CPU count)'
+    )
+    terrain.add_argument(
+        '--no-resume', action='store_true',
+        help='Regenerate every stage, rather than resuming from the checkpoints of an interrupted run'
+    )
+    terrain.add_argument(
+        '--export-format', nargs='+', choices=['gzip', 'topojson'],
+        help='Also export the terrain as gzip compressed GeoJSON and/or TopoJSON, alongside the GeoJSON'
+    )
+    terrain.add_argument(
+        '--export-report',
+        help='Write the size, write and parse times of each exported file to this JSON file'
+    )
+    terrain.add_argument(
+        '--max-size', type=float,
+        help='Simplify the exported terrain until the GeoJSON fits within this size (in MB)'
+    )
+    terrain.add_argument('--max-vertices', type=int, help='Simplify the exported terrain to at most this many vertices')
+    terrain.add_argument(
+        '--max-feature-vertices', type=int,
+        help='Split exported polygons with more than this many vertices along a grid'
+    )
+    terrain.add_argument(
+        '--max-feature-size', type=float,
+        help='Split exported polygons larger than this size (in degrees) along a grid'
+    )
+    terrain.add_argument(
+        '--quality-check', action='store_true',
+        help='Check each contour set and the water for gaps, overlaps and slivers (saved with --save-project)'
+    )
+    terrain.add_argument('--save-project', action='store_true', help='Save the QGIS project as well')
+
+    batch = commands.add_parser('batch', help='Generate and export the terrain for a directory of airports')
+    batch.add_argument('airports', help='The directory containing the openScope airport JSON files')
+    batch.add_argument('output', help='The directory the terrain GeoJSON files and report are written to')
+    batch.add_argument('--processes', type=int, help='The number of worker processes (defaults to the CPU count)')
+    batch.add_argument('--contour-interval', type=float, default=304.8, help='The contour interval in metres')
+
+    diff = commands.add_parser('diff', help='Compare the terrain with the existing terrain')
+    diff.add_argument('terrain', help='The terrain GeoJSON file')
+    diff.add_argument('existing', help='The existing terrain GeoJSON file')
+    diff.add_argument('--output', help='The GeoPackage the added, removed and changed areas are written to')
+
+    return parser
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""A collection of functions for simplifying the terrain to fit a file size or vertex budget.
+
+Features are (properties, polygons) tuples, where polygons is a list of polygons, each a list of closed rings
+of (x, y) tuples. The features are simplified as a coverage, so adjacent polygons never gap or overlap.
+
+This module doesn't depend on QGIS.
+"""
+import bisect
+import json
+from .topology import buildPolygons, buildTopology, countVertices, getSignificance, restoreCrossingArcs
+
+#------------------- Public -------------------
+
+def encodeFeature(properties, polygons, precision):
+    """Encodes the feature as a compact GeoJSON Feature string, with the coordinates rounded to `precision`"""
+    coordinates = [
+        [[[round(x, precision), round(y, precision)] for x, y in ring] for ring in polygon]
+        for polygon in polygons
+    ]
+
+    if len(coordinates) == 1:
+        geometry = {'type': 'Polygon', 'coordinates': coordinates[0]}
+    else:
+        geometry = {'type': 'MultiPolygon', 'coordinates': coordinates}
+
+    return json.dumps({
+        'type': 'Feature',
+        'properties': properties,
+        'geometry': geometry
+    }, separators=(',', ':'))
+
+def getEncodedSize(features, precision):
+    """Gets the size (in bytes) of the features encoded as a GeoJSON FeatureCollection, excluding the header"""
+    return sum(
+        len(encodeFeature(properties, polygons, precision).encode('utf-8')) + 2
+        for properties, polygons in features
+    )
+
+def simplifyToBudget(features, precision, maxVertices=None, maxBytes=None, iterations=20):
+    """Simplifies the features to fit within the vertex and/or byte budgets.
+
+    The tolerance is found by bisection over the topology, which is only built once. The Douglas-Peucker
+    significance of every vertex, and its encoded size, are also computed once, so each step of the bisection only
+    counts the vertices and bytes kept by the tolerance, without simplifying or encoding the features. Returns a
+    dict of the simplified features, the tolerance (in degrees), vertices and bytes. If the budget can't be met, the
+    most simplified features tried are returned.
+    """
+    topology = _getTopology(features, precision)
+
+    def fits(result):
+        if maxVertices and result['vertices'] > maxVertices:
+            return False
+
+        return not maxBytes or result['bytes'] <= maxBytes
+
+    best = _simplify(topology, 0, precision, maxBytes)
+    if fits(best):
+        return best
+
+    # Find a tolerance that fits, doubling from the quantisation step
+    low = 0
+    high = 10 ** -precision
+
+    while not fits(_measure(topology, high)):
+        if high >= 1:
+            return _simplify(topology, high, precision, maxBytes)
+
+        low = high
+        high *= 2
+
+    for _ in range(iterations):
+        middle = (low + high) / 2
+
+        if fits(_measure(topology, middle)):
+            high = middle
+        else:
+            low = middle
+
+    # The arcs restored where they'd cross another arc may still exceed the budget
+    best = _simplify(topology, high, precision, maxBytes)
+
+    while not fits(best) and high < 1:
+        high *= 2
+        best = _simplify(topology, high, precision, maxBytes)
+
+    return best
+
+#------------------- Private -------------------
+
+def _getArcStatistics(arc, precision):
+    """Gets the significance of the arc's vertices, and sorted with the cumulative size of their encodings"""
+    significance = getSignificance(arc)
+    sizes = [_getVertexSize(point, precision) for point in arc]
+    ranked = sorted(zip(significance, sizes))
+    cumulative = [0]
+
+    for _, size in ranked:
+        cumulative.append(cumulative[-1] + size)
+
+    return {
+        'significance': significance,
+        'ranked': [item[0] for item in ranked],
+        'sizes': cumulative,
+        'start': sizes[0],
+        'end': sizes[-1]
+    }
+
+def _getTopology(features, precision):
+    """Gets the shared-arc topology of the features' polygons, the feature each polygon belongs to, and the statistics
+    (see _getArcStatistics) of each arc, and the size of each feature without any coordinates.
+    """
+    arcs, shapes = buildTopology([polygon for _, polygons in features for polygon in polygons])
+
+    return {
+        'arcs': arcs,
+        'shapes': shapes,
+        'owners': [index for index, (_, polygons) in enumerate(features) for _ in polygons],
+        'properties': [properties for properties, _ in features],
+        'statistics': [_getArcStatistics(arc, precision) for arc in arcs],
+        # A feature with a single polygon is encoded as a Polygon, otherwise a MultiPolygon. The empty coordinates
+        # ('[]') are the same size as the separator between the features, so are left in
+        'headers': [
+            (
+                len(encodeFeature(properties, [[]], precision).encode('utf-8')),
+                len(encodeFeature(properties, [], precision).encode('utf-8'))
+            )
+            for properties, _ in features
+        ]
+    }
+
+def _getVertexSize(point, precision):
+    """Gets the size (in bytes) of the vertex encoded as a GeoJSON position"""
+    return len(json.dumps([round(point[0], precision), round(point[1], precision)], separators=(',', ':')))
+
+def _measure(topology, tolerance):
+    """Gets the vertex count and size of the features simplified with the tolerance, without simplifying them.
+
+    The rings and polygons that collapse are dropped, as by _simplify.
+    """
+    toleranceSquared = tolerance * tolerance
+    arcs = []
+
+    for statistics in topology['statistics']:
+        ranked = statistics['ranked']
+        index = bisect.bisect_right(ranked, toleranceSquared) if tolerance > 0 else 0
+        arcs.append((len(ranked) - index, statistics['sizes'][-1] - statistics['sizes'][index]))
+
+    # The sizes of the polygons kept for each feature
+    parts = [[] for _ in topology['properties']]
+    vertices = 0
+
+    for owner, shape in zip(topology['owners'], topology['shapes']):
+        rings = []
+
+        for index, refs in enumerate(shape):
+            count, size = _measureRing(topology, arcs, refs)
+
+            if count < 4:
+                # The exterior has collapsed, so does the polygon
+                if index == 0:
+                    rings = []
+                    break
+                continue
+
+            rings.append((count, size))
+
+        if rings:
+            vertices += sum(count for count, _ in rings)
+            parts[owner].append(2 + sum(size for _, size in rings) + len(rings) - 1)
+
+    size = 0
+
+    for headers, polygons in zip(topology['headers'], parts):
+        if len(polygons) == 1:
+            size += headers[0] + polygons[0]
+        elif polygons:
+            size += headers[1] + 2 + sum(polygons) + len(polygons) - 1
+
+    return {
+        'tolerance': tolerance,
+        'vertices': vertices,
+        'bytes': size
+    }
+
+def _measureRing(topology, arcs, refs):
+    """Gets the vertex count and encoded size of the ring built from the arcs, given each arc's (count, size)"""
+    if not refs:
+        return (0, 0)
+
+    count = 0
+    size = 0
+
+    for position, ref in enumerate(refs):
+        arcCount, arcSize = arcs[ref if ref >= 0 else ~ref]
+        count += arcCount
+        size += arcSize
+
+        # The first point of each arc is the last of the previous
+        if position:
+            statistics = topology['statistics'][ref if ref >= 0 else ~ref]
+            count -= 1
+            size -= statistics['start'] if ref >= 0 else statistics['end']
+
+    # The brackets, and the separators between the positions
+    return (count, size + 2 + count - 1)
+
+def _simplify(topology, tolerance, precision, countBytes):
+    """Gets the features simplified with the tolerance, and their vertex count and (if required) size"""
+    toleranceSquared = tolerance * tolerance
+    simplified = [
+        [point for point, significance in zip(arc, statistics['significance']) if significance > toleranceSquared]
+        if tolerance > 0 else list(arc)
+        for arc, statistics in zip(topology['arcs'], topology['statistics'])
+    ]
+    polygons = buildPolygons(restoreCrossingArcs(topology['arcs'], simplified), topology['shapes'])
+    parts = [[] for _ in topology['properties']]
+
+    for owner, polygon in zip(topology['owners'], polygons):
+        if polygon:
+            parts[owner].append(polygon)
+
+    features = [(properties, items) for properties, items in zip(topology['properties'], parts) if items]
+
+    return {
+        'features': features,
+        'tolerance': tolerance,
+        'vertices': sum(countVertices(items) for _, items in features),
+        'bytes': getEncodedSize(features, precision) if countBytes else None
+    }
@@ -0,0 +1,88 @@
+"""A collection of functions for the contour sets (intervals or explicit levels) generated from a DEM."""
+import math
+
+#------------------- Public -------------------
+
+def getContourSets(interval, intervals=None, levels=None):
+    """Gets the list of contour sets to generate.
+
+    `intervals` is a list of contour intervals (in metres), and `levels` a list of explicit level lists. If
+    neither is specified the single `interval` is used. Each set is a dict of its name, the interval (None for
+    explicit levels) and the sorted levels (None for an interval).
+    """
+    sets = []
+
+    if not intervals and not levels:
+        intervals = [interval]
+
+    for item in intervals or []:
+        if item <= 0:
+            raise Exception('The contour interval must be greater than zero, not %g' % item)
+
+        sets.append({
+            'label': '%g m' % item,
+            'interval': float(item),
+            'levels': None
+        })
+
+    for index, item in enumerate(levels or []):
+        values = sorted({float(level) for level in item if level > 0})
+
+        if not values:
+            raise Exception('The contour levels must contain a level above sea level')
+
+        sets.append({
+            'label': 'Levels %d' % (index + 1),
+            'interval': None,
+            'levels': values
+        })
+
+    # A single set keeps the original layer names
+    for item in sets:
+        item['name'] = 'Contours' if len(sets) == 1 else 'Contours %s' % item['label']
+
+    return sets
+
+def getContourOptions(contourSet):
+    """Gets the gdal:contour INTERVAL and EXTRA parameters for the contour set"""
+    if contourSet['interval'] is not None:
+        return {'INTERVAL': contourSet['interval']}
+
+    # The fixed levels take precedence over the interval
+    return {
+        'INTERVAL': contourSet['levels'][-1],
+        'EXTRA': '-fl %s' % ' '.join('%g' % level for level in contourSet['levels'])
+    }
+
+def getElevationExpression(contourSet, field='_mean'):
+    """Gets the expression normalising the field's height down to the contour set's interval or levels"""
+    if contourSet['interval'] is not None:
+        return 'floor(%(field)s / %(interval)f) * %(interval)f' % {
+            'field': field,
+            'interval': contourSet['interval']
+        }
+
+    cases = ' '.join(
+        'WHEN %s >= %f THEN %f' % (field, level, level)
+        for level in reversed(contourSet['levels'])
+    )
+
+    return 'CASE %s ELSE 0 END' % cases
+
+def getLevel(contourSet, value):
+    """Gets the height normalised down to the contour set's interval or levels, as getElevationExpression"""
+    if contourSet['interval'] is not None:
+        return math.floor(value / contourSet['interval']) * contourSet['interval']
+
+    for level in reversed(contourSet['levels']):
+        if value >= level:
+            return level
+
+    return 0
+
+def getMinimumLevel(contourSet):
+    """Gets the lowest contour level of the contour set"""
+    if contourSet['interval'] is not None:
+        return contourSet['interval']
+
+    return contourSet['levels'][0]
@@ -4,34 +4,33 @@ import os
 import shutil
 import urllib.request
 import zipfile
+from qgis.core import QgsFeatureRequest, QgsGeometry, QgsRectangle
 from .dem_map import getTile
 
 #------------------- Public -------------------
 
 def getDemFromBounds(path, bounds, feedback):
     """Gets a list of the filename of the DEMs intersecting the QgsRectangle."""
+    return _getDems(path, _getGraticules(bounds), feedback)
 
-    graticules = _getGraticules(bounds)
+def getDemFromGeometry(path, geometry, feedback, land=None):
+    """Gets a list of the filename of the DEMs intersecting the QgsGeometry.
 
-    feedback.setProgress(0)
+    If the `land` QgsVectorLayer is specified, the graticules without any land are skipped, so their tile
+    archives are never fetched.
+    """
+    graticules = _getGraticules(geometry.boundingBox(), geometry)
 
-    dems = []
-    index = 0
-    count = len(graticules)
-    for item in graticules:
-        dem = _downloadDem(path, item)
-        # May be null if the tile doesn't exist
-        if dem is not None:
-            dems.append(dem)
+    if land is not None:
+        graticules = _getLandGraticules(graticules, land)
 
-        index = index + 1
-        feedback.setProgress(100 * index / count)
+    return _getDems(path, graticules, feedback)
 
-    return dems
+def getDemFromLayer(path, layer, feedback, land=None):
+    """Gets a list of the filename of the DEMs intersecting the features of the QgsMapLayer."""
+    geometry = QgsGeometry.unaryUnion([f.geometry() for f in layer.getFeatures()])
 
-def getDemFromLayer(path, layer, feedback):
-    """Gets a list of the filename of the DEMs intersecting the QgsMapLayer."""
-    return getDemFromBounds(path, layer.extent(), feedback)
+    return getDemFromGeometry(path, geometry, feedback, land)
 
 #------------------- Private -------------------
 
@@ -72,7 +71,10 @@ def _downloadTile(path, tile):
     if os.path.isfile(touchFile):
         return
 
-    # Download the tile and extract all the contents into a flat structure
+    # Download the tile and extract all the contents into a flat structure. Unique names are used for
+    # the partial files, as other processes may be fetching the same tile (eg. batch generation)
+    zipPath = '%s.%d' % (zipPath, os.getpid())
+
     print('Downloading %s ...' % uri)
     urllib.request.urlretrieve(uri, zipPath)
 
@@ -85,20 +87,48 @@ def _downloadTile(path, tile):
 
             source = zf.open(item)
             targetPath = os.path.join(path, fileName)
+            partialPath = '%s.%d' % (targetPath, os.getpid())
 
             print('Extracting %s ...' % targetPath)
-            target = open(targetPath, 'wb')
+            target = open(partialPath, 'wb')
             with source, target:
                 shutil.copyfileobj(source, target)
 
+            os.replace(partialPath, targetPath)
+
         zf.close()
 
     # Remove the archive to save space and create the touchFile to indicate it's been downloaded
     os.unlink(zipPath)
     open(touchFile, 'a').close()
 
-def _getGraticules(bounds):
-    """Gets a list of graticule tuples intersecting the specified QgsRectangle."""
+def _getDems(path, graticules, feedback):
+    """Gets a list of the filename of the DEMs for the graticules, downloading them if required."""
+    feedback.setProgress(0)
+
+    dems = []
+    index = 0
+    count = len(graticules)
+    for item in graticules:
+        dem = _downloadDem(path, item)
+        # May be null if the tile doesn't exist
+        if dem is not None:
+            dems.append(dem)
+
+        index = index + 1
+        feedback.setProgress(100 * index / count)
+
+    return dems
+
+def _getGraticuleRect(graticule):
+    """Gets the QgsRectangle of the 1 degree graticule."""
+    return QgsRectangle(graticule['lng'], graticule['lat'], graticule['lng'] + 1, graticule['lat'] + 1)
+
+def _getGraticules(bounds, geometry=None):
+    """Gets a list of graticule tuples intersecting the specified QgsRectangle.
+
+    If the QgsGeometry is specified, only the graticules intersecting the geometry itself are included.
+    """
 
     # Generate the list of all the DEM files needed
     lng0 = math.floor(bounds.xMinimum())
@@ -109,13 +139,47 @@ def _getGraticules(bounds):
 
     for lng in range(lng0, lng1):
         for lat in range(lat0, lat1):
-            dems.append({
+            graticule = {
                 'lat': lat,
                 'lng': lng
-            })
+            }
+
+            if geometry is None or geometry.intersects(_getGraticuleRect(graticule)):
+                dems.append(graticule)
 
     return dems
 
+def _getLandGraticules(graticules, land):
+    """Gets the graticules intersecting any of the land polygons in the QgsVectorLayer."""
+    cells = {
+        (item['lat'], item['lng']): QgsGeometry.fromRect(_getGraticuleRect(item))
+        for item in graticules
+    }
+
+    if not cells:
+        return []
+
+    bounds = QgsRectangle(cells[next(iter(cells))].boundingBox())
+    for cell in cells.values():
+        bounds.combineExtentWith(cell.boundingBox())
+
+    found = set()
+    request = QgsFeatureRequest().setFilterRect(bounds).setNoAttributes()
+
+    for feature in land.getFeatures(request):
+        geometry = feature.geometry()
+        extent = geometry.boundingBox()
+
+        for key, cell in cells.items():
+            if key not in found and extent.intersects(cell.boundingBox()) and geometry.intersects(cell):
+                found.add(key)
+
+        # Stop as soon as every graticule has some land
+        if len(found) == len(cells):
+            break
+
+    return [item for item in graticules if (item['lat'], item['lng']) in found]
+
 def _getNameFromGraticule(graticule):
     """Gets the name of the DEM for the specified graticule."""
 
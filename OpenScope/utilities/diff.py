@@ -0,0 +1,199 @@
+"""A collection of functions for comparing the generated terrain with the existing openScope terrain."""
+import time
+from PyQt5.QtCore import QVariant
+from qgis.core import (
+    NULL,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsField,
+    QgsGeometry,
+    QgsSpatialIndex,
+    QgsVectorLayer,
+    QgsWkbTypes
+)
+
+# Elevations closer than this are the same band
+_ELEVATION_TOLERANCE = 0.01
+
+# The smallest area (in square degrees) reported, so slivers from a different simplification are ignored
+_MIN_AREA = 0.000001
+
+#------------------- Public -------------------
+
+def diffTerrain(layers, existing, feedback=None, minArea=_MIN_AREA):
+    """Compares the terrain with the existing terrain, both lists of polygon QgsVectorLayers with an elevation.
+
+    The polygons of each are bulk loaded into a QgsSpatialIndex (an STR packed R-tree), so each polygon is only
+    compared with the polygons of the other terrain whose bounding boxes intersect it. Returns a dict of the `added`,
+    `removed` and `changed` memory layers, and a `summary` dict of their feature counts and areas (in square degrees).
+    """
+    started = time.time()
+    generated = _getPolygons(layers)
+    previous = _getPolygons(existing)
+
+    added = _createLayer('Terrain Diff - Added', [QgsField('elevation', QVariant.Double)])
+    removed = _createLayer('Terrain Diff - Removed', [QgsField('elevation', QVariant.Double)])
+    changed = _createLayer('Terrain Diff - Changed', [
+        QgsField('from', QVariant.Double),
+        QgsField('to', QVariant.Double)
+    ])
+
+    addedFeatures = []
+    changedFeatures = []
+    total = len(generated['polygons']) + len(previous['polygons'])
+
+    # The generated areas that aren't the same band in the existing terrain are either added or changed
+    for count, (elevation, geometry) in enumerate(generated['polygons'].values()):
+        candidates = _getIntersecting(geometry, previous)
+        same = [item for item in candidates if _isSameElevation(item[0], elevation)]
+        others = [item for item in candidates if not _isSameElevation(item[0], elevation)]
+        remaining = _getDifference(geometry, [item[1] for item in same])
+
+        # Each piece is only counted once, eg. where the existing water overlaps the existing contours
+        for otherElevation, other in others:
+            if remaining.isEmpty():
+                break
+
+            piece = _getPolygonal(remaining.intersection(other))
+
+            if piece.isEmpty():
+                continue
+
+            remaining = _getDifference(remaining, [other])
+
+            if piece.area() >= minArea:
+                changedFeatures.append(_createFeature(changed, piece, [otherElevation, elevation]))
+
+        if not remaining.isEmpty() and remaining.area() >= minArea:
+            addedFeatures.append(_createFeature(added, remaining, [elevation]))
+
+        _setProgress(feedback, count, total)
+
+    # The existing areas that aren't covered by the generated terrain at all are removed
+    removedFeatures = []
+    for count, (elevation, geometry) in enumerate(previous['polygons'].values()):
+        candidates = _getIntersecting(geometry, generated)
+        piece = _getDifference(geometry, [item[1] for item in candidates])
+
+        if piece.area() >= minArea:
+            removedFeatures.append(_createFeature(removed, piece, [elevation]))
+
+        _setProgress(feedback, len(generated['polygons']) + count, total)
+
+    summary = {
+        'generated': len(generated['polygons']),
+        'existing': len(previous['polygons']),
+        'seconds': 0
+    }
+
+    for layer, features in [(added, addedFeatures), (removed, removedFeatures), (changed, changedFeatures)]:
+        layer.dataProvider().addFeatures(features)
+        summary[layer.name().replace('Terrain Diff - ', '').lower()] = {
+            'features': len(features),
+            'area': sum(f.geometry().area() for f in features)
+        }
+
+    summary['seconds'] = time.time() - started
+
+    return {
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+        'summary': summary
+    }
+
+#------------------- Private -------------------
+
+def _createFeature(layer, geometry, values):
+    """Creates a feature for the layer with the multi polygon geometry and attribute values"""
+    feature = QgsFeature(layer.fields())
+    geometry.convertToMultiType()
+    feature.setGeometry(geometry)
+    feature.setAttributes(values)
+
+    return feature
+
+def _createLayer(name, fields):
+    """Creates a multi polygon memory layer with the fields"""
+    layer = QgsVectorLayer('MultiPolygon?crs=epsg:4326', name, 'memory')
+    layer.dataProvider().addAttributes(fields)
+    layer.updateFields()
+
+    return layer
+
+def _getDifference(geometry, others):
+    """Gets the part of the geometry not covered by any of the other geometries"""
+    if not others:
+        return geometry
+
+    return _getPolygonal(geometry.difference(QgsGeometry.unaryUnion(others)))
+
+def _getElevation(feature):
+    """Gets the feature's elevation, or None if it's NULL"""
+    value = feature['elevation']
+
+    return None if value == NULL else value
+
+def _getIntersecting(geometry, polygons):
+    """Gets the list of (elevation, geometry) tuples of the polygons intersecting the geometry.
+
+    The index only narrows the candidates to those whose bounding boxes intersect, a prepared geometry is used to
+    test each of them.
+    """
+    ids = polygons['index'].intersects(geometry.boundingBox())
+
+    if not ids:
+        return []
+
+    engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+    engine.prepareGeometry()
+
+    return [polygons['polygons'][i] for i in ids if engine.intersects(polygons['polygons'][i][1].constGet())]
+
+def _getPolygonal(geometry):
+    """Gets the polygon parts of the geometry, eg. dropping the lines and points of an intersection"""
+    if geometry.isNull() or geometry.type() == QgsWkbTypes.PolygonGeometry:
+        return geometry
+
+    parts = [part for part in geometry.asGeometryCollection() if part.type() == QgsWkbTypes.PolygonGeometry]
+
+    return QgsGeometry.collectGeometry(parts) if parts else QgsGeometry()
+
+def _getPolygons(layers):
+    """Gets a dict of the polygons of the layers, by ID, as (elevation, QgsGeometry) tuples, and their spatial index.
+
+    The polygons are copied to a memory layer, so the index can be bulk loaded from a single feature iterator.
+    """
+    merged = _createLayer('Polygons', [QgsField('elevation', QVariant.Double)])
+    features = []
+
+    for layer in layers:
+        for f in layer.getFeatures(QgsFeatureRequest().setSubsetOfAttributes(['elevation'], layer.fields())):
+            if f.geometry().isNull() or f.geometry().isEmpty():
+                continue
+
+            features.append(_createFeature(merged, f.geometry(), [_getElevation(f)]))
+
+    merged.dataProvider().addFeatures(features)
+
+    return {
+        'index': QgsSpatialIndex(merged.getFeatures()),
+        'polygons': {f.id(): (_getElevation(f), f.geometry()) for f in merged.getFeatures()}
+    }
+
+def _isSameElevation(elevation, other):
+    """Gets a flag indicating whether the elevations are the same band"""
+    if elevation is None or other is None:
+        return elevation is other
+
+    return abs(elevation - other) < _ELEVATION_TOLERANCE
+
+def _setProgress(feedback, count, total):
+    """Updates the progress of the feedback, if specified"""
+    if feedback is None:
+        return
+
+    if feedback.isCanceled():
+        raise Exception('The terrain comparison was cancelled')
+
+    feedback.setProgress(100 * (count + 1) / total)
@@ -0,0 +1,112 @@
+"""A collection of functions for detecting the edits made to a layer since a snapshot of it was taken."""
+import binascii
+import hashlib
+import json
+import os
+from qgis.core import QgsFeatureRequest, QgsGeometry, QgsRectangle
+
+#------------------- Public -------------------
+
+def getChangedIds(previous, current):
+    """Compares two dicts of feature ID to hash, returning a tuple of the sorted added, changed and removed IDs"""
+    added = sorted(key for key in current if key not in previous)
+    changed = sorted(key for key in current if key in previous and current[key] != previous[key])
+    removed = sorted(key for key in previous if key not in current)
+
+    return (added, changed, removed)
+
+def getEdits(snapshot, layer):
+    """Gets the edits made to the polygons of the layer since the snapshot, eg. from readSnapshot.
+
+    Returns a list with a dict for each added, changed or removed feature, of the area it `added` and `removed`
+    (QgsGeometry) and the `extent` (QgsRectangle) of its geometry before and after the edit.
+    """
+    hashes = {}
+    geometries = {}
+
+    for feature in layer.getFeatures(QgsFeatureRequest().setNoAttributes()):
+        key = str(feature.id())
+        hashes[key] = _getHash(feature.geometry())
+        geometries[key] = feature.geometry()
+
+    previous = {key: item['hash'] for key, item in snapshot.items()}
+    added, changed, removed = getChangedIds(previous, hashes)
+    edits = []
+
+    for key in added + changed + removed:
+        before = _fromHex(snapshot[key]['wkb']) if key in snapshot else QgsGeometry()
+        after = geometries.get(key, QgsGeometry())
+        edit = {
+            'added': _getDifference(after, before),
+            'removed': _getDifference(before, after),
+            'extent': _getExtent(before, after)
+        }
+
+        # eg. the vertices were only reordered
+        if edit['added'].isEmpty() and edit['removed'].isEmpty():
+            continue
+
+        edits.append(edit)
+
+    return edits
+
+def readSnapshot(fileName):
+    """Reads the snapshot of a layer, a dict of the feature ID (as a string) to its hash and WKB (as hex)"""
+    with open(fileName) as f:
+        return json.load(f)['features']
+
+def writeSnapshot(layer, fileName):
+    """Writes a snapshot of the geometries of the layer's features, to detect the edits made to it later"""
+    features = {}
+
+    for feature in layer.getFeatures(QgsFeatureRequest().setNoAttributes()):
+        geometry = feature.geometry()
+        features[str(feature.id())] = {
+            'hash': _getHash(geometry),
+            'wkb': binascii.hexlify(bytes(geometry.asWkb())).decode('ascii')
+        }
+
+    # Write to a temporary file first, so a crash doesn't leave a partial snapshot
+    tmpFile = '%s.tmp' % fileName
+    with open(tmpFile, 'w') as f:
+        json.dump({'features': features}, f)
+
+    os.replace(tmpFile, fileName)
+
+#------------------- Private -------------------
+
+def _fromHex(value):
+    """Gets the QgsGeometry from the hex encoded WKB"""
+    geometry = QgsGeometry()
+    geometry.fromWkb(binascii.unhexlify(value))
+
+    return geometry
+
+def _getDifference(geometry, other):
+    """Gets the part of the geometry that isn't part of the other geometry, either of which may be empty"""
+    if geometry.isNull() or geometry.isEmpty():
+        return QgsGeometry()
+
+    if other.isNull() or other.isEmpty():
+        return QgsGeometry(geometry)
+
+    return geometry.difference(other)
+
+def _getExtent(*geometries):
+    """Gets the QgsRectangle covering all the (non-empty) geometries"""
+    extent = QgsRectangle()
+
+    for geometry in geometries:
+        if geometry.isNull() or geometry.isEmpty():
+            continue
+
+        if extent.isNull():
+            extent = QgsRectangle(geometry.boundingBox())
+        else:
+            extent.combineExtentWith(geometry.boundingBox())
+
+    return extent
+
+def _getHash(geometry):
+    """Gets the hash of the geometry's WKB"""
+    return hashlib.sha1(bytes(geometry.asWkb())).hexdigest()
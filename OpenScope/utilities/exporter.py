@@ -1,13 +1,24 @@
 """A collection of functions to help exporting data"""
+import os
+import time
+from enum import Enum
 from qgis.PyQt.QtWidgets import QApplication, QFileDialog, QMessageBox
-from qgis.core import QgsProject, QgsVectorFileWriter
-import processing # pylint: disable=import-error
+from qgis.core import QgsProject
 from .converters import EXPORT_PRECISION
+from .budget import simplifyToBudget
+from .geojson import readFeatures, writeFeatureCollection, writeFeatures, writeTopology
+from .splitting import getVertexStatistics, splitGeometry
 from ..AirspaceModel import AirspaceModel
 from ..FixModel import FixModel
 from ..MapModel import MapModel
 from ..RestrictedModel import RestrictedModel
 
+class ExportFormat(Enum):
+    """The valid values for the terrain export formats"""
+    GEOJSON = 'geojson' # Plain GeoJSON
+    GZIP = 'gzip' # Gzip compressed GeoJSON
+    TOPOJSON = 'topojson' # TopoJSON, with shared arcs and delta-encoded quantised coordinates
+
 #------------------- Public -------------------
 
 def exportAirspace():
@@ -56,35 +67,83 @@ def exportMaps():
     _copyToClipboard(MapModel.export(layers))
     QMessageBox.information(None, 'QgsOpenScope', 'Map JSON has been copied to the clipboard.')
 
-def exportTerrain(layers, fileName):
-    """Exports the Terrain as GeoJSON."""
+def exportTerrain(layers, fileName, formats=None, maxBytes=None, maxVertices=None, maxFeatureVertices=None,
+                  maxFeatureSize=None):
+    """Exports the Terrain as GeoJSON, and any other ExportFormat `formats` alongside it.
+
+    Polygons with more than `maxFeatureVertices`, or larger than `maxFeatureSize` degrees across, are split along a
+    grid. If a GeoJSON size (`maxBytes`) or vertex budget is specified, the terrain is simplified as a coverage with
+    the largest tolerance found (by bisection) that fits. Returns a list with a dict of the format, filename, size
+    (in bytes) and time taken (in seconds) for each file, plus the tolerance and vertices if budgeted, and the
+    per-feature vertex statistics of the GeoJSON.
+    """
 
     if not fileName:
         fileName, _ = QFileDialog.getSaveFileName(None, 'Save openScope terrain', '', 'Terrain Files (*.geojson)')
 
     if not fileName:
-        return
+        return []
+
+    report = []
+    features = None
+    budget = None
+    split = None
+
+    if maxFeatureVertices or maxFeatureSize:
+        split = lambda geometry: splitGeometry(geometry, maxFeatureVertices, maxFeatureSize, EXPORT_PRECISION)
+
+    if maxBytes or maxVertices:
+        features = readFeatures(layers, EXPORT_PRECISION, ['elevation'], split)
+        budget = simplifyToBudget(features, EXPORT_PRECISION, maxVertices, maxBytes)
+        features = budget['features']
+
+    for item in [ExportFormat.GEOJSON] + [f for f in formats or [] if f != ExportFormat.GEOJSON]:
+        started = time.time()
+        itemFile = getTerrainFileName(fileName, item)
+        compress = item == ExportFormat.GZIP
+
+        counts = None
+
+        if item == ExportFormat.TOPOJSON:
+            if features is None:
+                features = readFeatures(layers, EXPORT_PRECISION, ['elevation'], split)
+
+            writeTopology(features, itemFile, EXPORT_PRECISION)
+        elif budget is not None:
+            counts = writeFeatures(features, itemFile, EXPORT_PRECISION, 'Terrain', compress)
+        else:
+            # The features are streamed straight from the layers, so the terrain is never copied into memory
+            counts = writeFeatureCollection(
+                layers, itemFile, EXPORT_PRECISION, ['elevation'], 'Terrain', compress, split
+            )
+
+        entry = {
+            'format': item.value,
+            'fileName': itemFile,
+            'bytes': os.path.getsize(itemFile),
+            'seconds': time.time() - started
+        }
+
+        if budget is not None:
+            entry['tolerance'] = budget['tolerance']
+            entry['vertices'] = budget['vertices']
+
+        if counts is not None:
+            entry['vertexStatistics'] = getVertexStatistics(counts)
+
+        report.append(entry)
+
+    return report
+
+def getTerrainFileName(fileName, exportFormat):
+    """Gets the filename of the terrain in the ExportFormat, eg. einn.geojson => einn.geojson.gz or einn.topojson"""
+    if exportFormat == ExportFormat.GZIP:
+        return '%s.gz' % fileName
+
+    if exportFormat == ExportFormat.TOPOJSON:
+        return '%s.topojson' % os.path.splitext(fileName)[0]
 
-    result = processing.run('qgis:mergevectorlayers', {
-        'LAYERS': layers,
-        'OUTPUT': 'memory:'
-    })
-    merged = result['OUTPUT']
-    merged.setName('Terrain - Merged')
-
-    QgsVectorFileWriter.writeAsVectorFormat(
-        merged,
-        fileName,
-        'utf-8',
-        merged.crs(),
-        'GeoJson',
-        attributes=[
-            merged.fields().indexFromName('elevation') # Only the elevation layer
-        ],
-        layerOptions=[
-            'COORDINATE_PRECISION=%d' % EXPORT_PRECISION
-        ]
-    )
+    return fileName
 
 #------------------- Private -------------------
 
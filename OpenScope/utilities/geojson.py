@@ -0,0 +1,168 @@
+"""A collection of functions for streaming features to GeoJSON (and TopoJSON) files."""
+import gzip
+import json
+import os
+from qgis.core import (
+    NULL,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsFeatureRequest,
+    QgsProject
+)
+from .budget import encodeFeature
+from .topology import countVertices
+from .topojson import buildTopoJson
+
+_CRS = QgsCoordinateReferenceSystem('EPSG:4326')
+
+#------------------- Public -------------------
+
+def getQuantisedGeometry(geometry, precision):
+    """Gets the QgsGeometry with its coordinates rounded to the number of decimal places.
+
+    Consecutive vertices that become duplicates are dropped, and rings that collapse are removed. Returns None
+    if the whole geometry collapses.
+    """
+    step = 10 ** -precision
+    quantised = geometry.snappedToGrid(step, step)
+
+    if quantised.isNull() or quantised.isEmpty():
+        return None
+
+    return quantised
+
+def writeFeatureCollection(layers, fileName, precision, attributes=None, name=None, compress=False, split=None):
+    """Writes the features of the layers to a GeoJSON FeatureCollection, one feature at a time.
+
+    The coordinates are quantised to `precision` decimal places, and only the `attributes` (a list of field names)
+    are written as properties. A field missing from a layer is written as null. If `compress` is set the file is
+    gzip compressed as it's written. `split` is an optional callable splitting each QgsGeometry into a list of
+    pieces, written as separate features. The file is written alongside and then moved into place, so a failed
+    export never leaves a partial file. Returns the list of the number of vertices of each feature written.
+    """
+    attributes = attributes or []
+    partialFile = '%s.%d' % (fileName, os.getpid())
+    counts = []
+
+    with _openFile(partialFile, compress) as f:
+        f.write(_getHeader(name))
+
+        for layer in layers:
+            for properties, geometry in _getFeatures(layer, precision, attributes, split):
+                if counts:
+                    f.write(',\n')
+
+                f.write('{"type":"Feature","properties":%s,"geometry":%s}' % (
+                    json.dumps(properties, separators=(',', ':')),
+                    geometry.asJson(precision)
+                ))
+                counts.append(geometry.constGet().nCoordinates())
+
+        f.write('\n]}\n')
+
+    os.replace(partialFile, fileName)
+
+    return counts
+
+def readFeatures(layers, precision, attributes=None, split=None):
+    """Reads the polygon features of the layers into a list of (properties, polygons) tuples.
+
+    The coordinates are quantised to `precision` decimal places, and each polygon is a list of rings of (x, y)
+    tuples. `split` is as for writeFeatureCollection. Unlike the streamed GeoJSON, every feature is held in memory.
+    """
+    features = []
+
+    for layer in layers:
+        for properties, geometry in _getFeatures(layer, precision, attributes or [], split):
+            polygons = geometry.asMultiPolygon() if geometry.isMultipart() else [geometry.asPolygon()]
+            features.append((properties, [
+                [[(point.x(), point.y()) for point in ring] for ring in polygon]
+                for polygon in polygons
+            ]))
+
+    return features
+
+def writeFeatures(features, fileName, precision, name=None, compress=False):
+    """Writes the (properties, polygons) tuples, eg. from readFeatures, to a GeoJSON FeatureCollection.
+
+    Returns the list of the number of vertices of each feature written.
+    """
+    partialFile = '%s.%d' % (fileName, os.getpid())
+
+    with _openFile(partialFile, compress) as f:
+        f.write(_getHeader(name))
+        f.write(',\n'.join(encodeFeature(properties, polygons, precision) for properties, polygons in features))
+        f.write('\n]}\n')
+
+    os.replace(partialFile, fileName)
+
+    return [countVertices(polygons) for _, polygons in features]
+
+def writeTopology(features, fileName, precision, name='terrain'):
+    """Writes the (properties, polygons) tuples, eg. from readFeatures, to a TopoJSON Topology.
+
+    The edges shared by adjacent polygons are only stored once, and the quantised coordinates are delta-encoded.
+    Returns the number of features written.
+    """
+    topology = buildTopoJson(features, precision, name)
+    partialFile = '%s.%d' % (fileName, os.getpid())
+
+    with _openFile(partialFile, False) as f:
+        json.dump(topology, f, separators=(',', ':'))
+
+    os.replace(partialFile, fileName)
+
+    return len(topology['objects'][name]['geometries'])
+
+#------------------- Private -------------------
+
+def _getFeatures(layer, precision, attributes, split=None):
+    """Yields the properties dict and quantised QgsGeometry of each of the layer's features (or their pieces)"""
+    indexes = [layer.fields().indexFromName(item) for item in attributes]
+    transform = None
+
+    if layer.crs() != _CRS:
+        transform = QgsCoordinateTransform(layer.crs(), _CRS, QgsProject.instance())
+
+    request = QgsFeatureRequest().setSubsetOfAttributes([i for i in indexes if i != -1])
+
+    for feature in layer.getFeatures(request):
+        geometry = feature.geometry()
+
+        if geometry.isNull():
+            continue
+
+        if transform is not None:
+            geometry.transform(transform)
+
+        geometry = getQuantisedGeometry(geometry, precision)
+
+        if geometry is None:
+            continue
+
+        properties = {}
+        for item, index in zip(attributes, indexes):
+            value = feature.attribute(index) if index != -1 else None
+            properties[item] = None if value == NULL else value
+
+        if split is None:
+            yield properties, geometry
+            continue
+
+        # The cuts add new vertices, which are quantised too
+        for piece in split(geometry):
+            piece = getQuantisedGeometry(piece, precision)
+
+            if piece is not None:
+                yield properties, piece
+
+def _getHeader(name):
+    """Gets the start of the FeatureCollection, up to the first feature"""
+    return '{"type":"FeatureCollection",%s"features":[\n' % ('"name":%s,' % json.dumps(name) if name else '')
+
+def _openFile(fileName, compress):
+    """Opens the UTF-8 text file for writing, gzip compressed if specified"""
+    if compress:
+        return gzip.open(fileName, 'wt', encoding='utf-8')
+
+    return open(fileName, 'w', encoding='utf-8')
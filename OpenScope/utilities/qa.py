@@ -0,0 +1,184 @@
+"""A collection of functions for checking the terrain for gaps, overlaps and slivers."""
+import time
+from enum import Enum
+from PyQt5.QtCore import QVariant
+from qgis.core import (
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsField,
+    QgsGeometry,
+    QgsSpatialIndex,
+    QgsVectorLayer,
+    QgsWkbTypes
+)
+
+# The area (in square degrees) below which a polygon is a sliver, as for the small contour polygons eliminated
+SLIVER_AREA = 0.00005
+
+# Gaps smaller than this (in square degrees) are ignored, eg. from the rounding of shared edges
+MIN_GAP_AREA = 0.0000001
+
+# Overlaps smaller than this (in square degrees) are ignored, eg. from the rounding of shared edges
+_OVERLAP_TOLERANCE = 1e-10
+
+class IssueType(Enum):
+    """The types of issue found in the terrain"""
+    GAP = 'gap' # An area inside the bounds not covered by any of the layers, nor deliberately left uncovered
+    OVERLAP = 'overlap' # Two polygons of the same layer overlap
+    SLIVER = 'sliver' # A polygon smaller than the sliver area
+    WATER = 'water' # A sliver of overlap between a contour polygon and the water
+
+#------------------- Public -------------------
+
+def checkTerrain(layers, bounds=None, excluded=None, sliverArea=SLIVER_AREA, gapArea=MIN_GAP_AREA, feedback=None,
+                 water=None):
+    """Checks the terrain layers (polygon QgsVectorLayers) for gaps, overlaps and slivers.
+
+    The polygons of each layer are bulk loaded into a QgsSpatialIndex, so each is only tested for overlaps with the
+    polygons whose bounding boxes intersect it. The gaps are the parts of the `bounds` QgsGeometry (or the holes in
+    the layers, if not specified) not covered by a single cascaded union of all the polygons, nor by the `excluded`
+    QgsGeometry (eg. the lowland deliberately left uncovered), that are at least `gapArea`. Returns a dict of the
+    `issues` point memory layer, a point on each issue, and a `summary` dict of the number of each type of issue.
+
+    The `water` layers are checked as part of the terrain too. The water is drawn over the contours, so only the
+    overlaps between the water and the other layers smaller than `sliverArea` are reported, eg. where the coastline
+    and a contour were simplified differently.
+    """
+    started = time.time()
+    issues = _createLayer('Terrain QA')
+    features = []
+    geometries = []
+
+    water = water or []
+    waterIndexes = [_getPolygons(layer) for layer in water]
+    layers = water + [layer for layer in layers if layer not in water]
+
+    for count, layer in enumerate(layers):
+        index, polygons = waterIndexes[count] if count < len(water) else _getPolygons(layer)
+
+        for fid, geometry in polygons.items():
+            area = geometry.area()
+
+            if area < sliverArea:
+                features.append(_createFeature(issues, geometry, IssueType.SLIVER, layer.name(), area))
+
+            # Each pair is only tested once
+            engine = QgsGeometry.createGeometryEngine(geometry.constGet())
+            engine.prepareGeometry()
+
+            for other in index.intersects(geometry.boundingBox()):
+                if other <= fid or other not in polygons or not engine.intersects(polygons[other].constGet()):
+                    continue
+
+                for part in _getParts(geometry.intersection(polygons[other])):
+                    if part.area() > _OVERLAP_TOLERANCE:
+                        features.append(_createFeature(issues, part, IssueType.OVERLAP, layer.name(), part.area()))
+
+            if count < len(water):
+                continue
+
+            for waterIndex, waterPolygons in waterIndexes:
+                for other in waterIndex.intersects(geometry.boundingBox()):
+                    if other not in waterPolygons or not engine.intersects(waterPolygons[other].constGet()):
+                        continue
+
+                    for part in _getParts(geometry.intersection(waterPolygons[other])):
+                        if _OVERLAP_TOLERANCE < part.area() < sliverArea:
+                            features.append(_createFeature(issues, part, IssueType.WATER, layer.name(), part.area()))
+
+        geometries.extend(polygons.values())
+        _setProgress(feedback, count, len(layers) + 1)
+
+    # The gaps
+    coverage = QgsGeometry.unaryUnion(geometries) if geometries else QgsGeometry()
+
+    if bounds is not None:
+        uncovered = bounds.difference(coverage) if geometries else bounds
+    else:
+        holes = _getHoles(coverage)
+        uncovered = QgsGeometry.collectGeometry(holes) if holes else QgsGeometry()
+
+    if excluded is not None and not uncovered.isEmpty():
+        uncovered = uncovered.difference(excluded)
+
+    for gap in _getParts(uncovered):
+        if gap.area() >= gapArea:
+            features.append(_createFeature(issues, gap, IssueType.GAP, None, gap.area()))
+
+    _setProgress(feedback, len(layers), len(layers) + 1)
+    issues.dataProvider().addFeatures(features)
+
+    summary = {
+        'polygons': len(geometries),
+        'seconds': time.time() - started
+    }
+
+    for issueType in IssueType:
+        summary[issueType.value] = len([f for f in features if f['type'] == issueType.value])
+
+    return {
+        'issues': issues,
+        'summary': summary
+    }
+
+#------------------- Private -------------------
+
+def _createFeature(layer, geometry, issueType, layerName, area):
+    """Creates a feature for the issue, located at a point on the surface of its geometry"""
+    feature = QgsFeature(layer.fields())
+    feature.setGeometry(geometry.pointOnSurface())
+    feature.setAttributes([issueType.value, layerName, area])
+
+    return feature
+
+def _createLayer(name):
+    """Creates the point memory layer of the issues"""
+    layer = QgsVectorLayer('Point?crs=epsg:4326', name, 'memory')
+    layer.dataProvider().addAttributes([
+        QgsField('type', QVariant.String),
+        QgsField('layer', QVariant.String),
+        QgsField('area', QVariant.Double)
+    ])
+    layer.updateFields()
+
+    return layer
+
+def _getHoles(geometry):
+    """Gets the list of the holes (interior rings) in the polygon geometry, as polygons"""
+    holes = []
+
+    for part in _getParts(geometry):
+        holes.extend(QgsGeometry.fromPolygonXY([ring]) for ring in part.asPolygon()[1:])
+
+    return holes
+
+def _getParts(geometry):
+    """Gets the list of single part polygons in the geometry, dropping any lines or points"""
+    if geometry.isNull() or geometry.isEmpty():
+        return []
+
+    return [
+        part for part in geometry.asGeometryCollection()
+        if part.type() == QgsWkbTypes.PolygonGeometry and not part.isEmpty()
+    ]
+
+def _getPolygons(layer):
+    """Gets the spatial index of the layer's polygons, bulk loaded, and a dict of their QgsGeometry by ID"""
+    request = QgsFeatureRequest().setNoAttributes()
+    polygons = {}
+
+    for f in layer.getFeatures(request):
+        if not f.geometry().isNull() and not f.geometry().isEmpty():
+            polygons[f.id()] = f.geometry()
+
+    return (QgsSpatialIndex(layer.getFeatures(request)), polygons)
+
+def _setProgress(feedback, count, total):
+    """Updates the progress of the feedback, if specified"""
+    if feedback is None:
+        return
+
+    if feedback.isCanceled():
+        raise Exception('The terrain quality check was cancelled')
+
+    feedback.setProgress(100 * (count + 1) / total)
@@ -0,0 +1,54 @@
+"""A collection of functions for low-pass filtering a DEM before it's contoured."""
+import numpy
+from osgeo import gdal # pylint: disable=import-error
+
+#------------------- Public -------------------
+
+def smoothDem(fileName, radius):
+    """Smooths the first band of the GeoTIFF in place, with a box filter of the radius (in pixels)"""
+    dem = gdal.Open(fileName, gdal.GA_Update)
+    band = dem.GetRasterBand(1)
+
+    band.WriteArray(smoothElevation(band.ReadAsArray(), radius, band.GetNoDataValue()))
+    band.FlushCache()
+
+    # Close the dataset
+    dem = None
+
+def smoothElevation(elevation, radius, nodata=None):
+    """Gets the elevation array smoothed with a box filter of the radius (in pixels).
+
+    Each pixel takes the mean of the valid pixels in its (2 * radius + 1) square window, so the edges and nodata
+    pixels don't pull the heights down. Nodata pixels are left untouched.
+    """
+    if radius < 1:
+        return elevation.copy()
+
+    if nodata is None:
+        valid = numpy.ones(elevation.shape, dtype=bool)
+    else:
+        valid = elevation != nodata
+
+    values = numpy.where(valid, elevation, 0).astype(numpy.float64)
+    total = _getBoxSum(_getBoxSum(values, radius, 0), radius, 1)
+    count = _getBoxSum(_getBoxSum(valid.astype(numpy.float64), radius, 0), radius, 1)
+
+    smoothed = numpy.where(valid, total / numpy.maximum(count, 1), elevation)
+
+    if numpy.issubdtype(elevation.dtype, numpy.integer):
+        smoothed = numpy.rint(smoothed)
+
+    return smoothed.astype(elevation.dtype)
+
+#------------------- Private -------------------
+
+def _getBoxSum(values, radius, axis):
+    """Gets the sum of the (2 * radius + 1) window centred on each value along the axis, using a cumulative sum"""
+    size = values.shape[axis]
+    width = 2 * radius + 1
+
+    padding = [(0, 0)] * values.ndim
+    padding[axis] = (radius + 1, radius)
+    cumulative = numpy.cumsum(numpy.pad(values, padding, 'constant'), axis=axis)
+
+    return numpy.take(cumulative, range(width, width + size), axis) - numpy.take(cumulative, range(size), axis)
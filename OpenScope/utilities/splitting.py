@@ -0,0 +1,81 @@
+"""A collection of functions for splitting oversized terrain polygons along a grid."""
+import math
+from qgis.core import QgsGeometry, QgsRectangle, QgsWkbTypes
+from .tiling import getTiles
+
+#------------------- Public -------------------
+
+def getVertexStatistics(counts):
+    """Gets a dict of the statistics of the list of per-feature vertex counts.
+
+    The dict has the number of features, total vertices, and the minimum, maximum, mean, median and 95th percentile.
+    """
+    ordered = sorted(counts)
+
+    if not ordered:
+        return {'features': 0, 'vertices': 0, 'min': 0, 'max': 0, 'mean': 0, 'median': 0, 'p95': 0}
+
+    return {
+        'features': len(ordered),
+        'vertices': sum(ordered),
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': sum(ordered) / len(ordered),
+        'median': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+    }
+
+def splitGeometry(geometry, maxVertices=None, maxSize=None, precision=None):
+    """Splits the polygon QgsGeometry along a grid, if it has more than `maxVertices` or is larger than `maxSize`
+    degrees across. Returns the list of single part polygon QgsGeometry pieces.
+
+    The grid is sized from the average vertex density, so pieces covering a dense area may still exceed
+    `maxVertices`. The grid lines are rounded to `precision` decimal places (if specified), and adjacent pieces
+    share exactly the same vertices along the cuts, so no seams appear between them once they're filled.
+    """
+    vertices = geometry.constGet().nCoordinates()
+    extent = geometry.boundingBox()
+    size = max(extent.width(), extent.height())
+    cellSize = size
+
+    if maxSize and size > maxSize:
+        cellSize = maxSize
+
+    if maxVertices and vertices > maxVertices:
+        cellSize = min(cellSize, size / math.ceil(math.sqrt(vertices / maxVertices)))
+
+    if cellSize >= size:
+        return _getPolygons(geometry)
+
+    pieces = []
+    for tile in getTiles(extent, cellSize):
+        rect = QgsRectangle(
+            _roundEdge(tile['xMin'], tile['col'] > 0, precision),
+            _roundEdge(tile['yMin'], tile['row'] > 0, precision),
+            _roundEdge(tile['xMax'], tile['col'] < tile['cols'] - 1, precision),
+            _roundEdge(tile['yMax'], tile['row'] < tile['rows'] - 1, precision)
+        )
+
+        piece = geometry.intersection(QgsGeometry.fromRect(rect))
+        pieces.extend(_getPolygons(piece))
+
+    return pieces
+
+#------------------- Private -------------------
+
+def _getPolygons(geometry):
+    """Gets the list of single part polygons in the geometry, dropping any lines or points"""
+    if geometry.isNull() or geometry.isEmpty():
+        return []
+
+    return [
+        part for part in geometry.asGeometryCollection()
+        if part.type() == QgsWkbTypes.PolygonGeometry and not part.isEmpty()
+    ]
+
+def _roundEdge(value, interior, precision):
+    """Rounds the interior tile edge to the precision, leaving the exterior edges on the geometry's extent"""
+    if not interior or precision is None:
+        return value
+
+    return round(value, precision)
@@ -0,0 +1,121 @@
+"""A collection of functions for splitting the terrain bounds into tiles and stitching the tiled results."""
+import math
+from qgis.core import (
+    QgsFeature,
+    QgsGeometry,
+    QgsPointXY,
+    QgsSpatialIndex
+)
+
+#------------------- Public -------------------
+
+def getCutLines(tile):
+    """Gets the list of interior tile edges (those shared with another tile) as [QgsPointXY, QgsPointXY] lists."""
+    xMin, yMin, xMax, yMax = tile['xMin'], tile['yMin'], tile['xMax'], tile['yMax']
+    lines = []
+
+    if tile['col'] > 0:
+        lines.append([QgsPointXY(xMin, yMin), QgsPointXY(xMin, yMax)])
+
+    if tile['col'] < tile['cols'] - 1:
+        lines.append([QgsPointXY(xMax, yMin), QgsPointXY(xMax, yMax)])
+
+    if tile['row'] > 0:
+        lines.append([QgsPointXY(xMin, yMin), QgsPointXY(xMax, yMin)])
+
+    if tile['row'] < tile['rows'] - 1:
+        lines.append([QgsPointXY(xMin, yMax), QgsPointXY(xMax, yMax)])
+
+    return lines
+
+def getTiles(extent, size):
+    """Gets the list of tiles, no larger than `size` degrees, covering the QgsRectangle.
+
+    The tiles are of equal size, and adjacent tiles share exactly the same edge coordinates.
+    """
+    cols = max(1, math.ceil(extent.width() / size))
+    rows = max(1, math.ceil(extent.height() / size))
+    xs = _getEdges(extent.xMinimum(), extent.xMaximum(), cols)
+    ys = _getEdges(extent.yMinimum(), extent.yMaximum(), rows)
+    tiles = []
+
+    for row in range(rows):
+        for col in range(cols):
+            tiles.append({
+                'col': col,
+                'cols': cols,
+                'row': row,
+                'rows': rows,
+                'xMin': xs[col],
+                'xMax': xs[col + 1],
+                'yMin': ys[row],
+                'yMax': ys[row + 1]
+            })
+
+    return tiles
+
+def stitchPolygons(pieces):
+    """Dissolves polygons that were split by the tile edges.
+
+    `pieces` is a list of (tile, QgsGeometry) tuples. Polygons from different tiles sharing a boundary segment
+    are parts of the same polygon, as the tile edge is the only line separating them. Returns the list of
+    stitched QgsGeometry objects.
+    """
+    index = QgsSpatialIndex()
+    parents = list(range(len(pieces)))
+    candidates = []
+
+    # Only polygons on a tile edge need stitching
+    cutLines = {}
+    for i, (tile, geometry) in enumerate(pieces):
+        key = (tile['col'], tile['row'])
+        if key not in cutLines:
+            cutLines[key] = QgsGeometry.fromMultiPolylineXY(getCutLines(tile))
+
+        feature = QgsFeature(i)
+        feature.setGeometry(geometry)
+        index.addFeature(feature)
+
+        if not cutLines[key].isEmpty() and geometry.intersects(cutLines[key]):
+            candidates.append(i)
+
+    for i in candidates:
+        tile, geometry = pieces[i]
+
+        for j in index.intersects(geometry.boundingBox()):
+            otherTile, otherGeometry = pieces[j]
+
+            if j <= i or otherTile is tile or _find(parents, i) == _find(parents, j):
+                continue
+
+            shared = geometry.intersection(otherGeometry)
+            if shared.length() > 0 or shared.area() > 0:
+                parents[_find(parents, j)] = _find(parents, i)
+
+    groups = {}
+    for i, (_tile, geometry) in enumerate(pieces):
+        groups.setdefault(_find(parents, i), []).append(geometry)
+
+    return [
+        items[0] if len(items) == 1 else QgsGeometry.unaryUnion(items)
+        for items in groups.values()
+    ]
+
+#------------------- Private -------------------
+
+def _find(parents, i):
+    """Finds the root of the disjoint set containing i, compressing the path"""
+    root = i
+    while parents[root] != root:
+        root = parents[root]
+
+    while parents[i] != root:
+        parents[i], i = root, parents[i]
+
+    return root
+
+def _getEdges(minimum, maximum, count):
+    """Gets the `count + 1` evenly spaced edge coordinates from minimum to maximum"""
+    step = (maximum - minimum) / count
+
+    return [minimum + i * step for i in range(count)] + [maximum]
@@ -0,0 +1,96 @@
+"""A collection of functions for encoding polygon features as TopoJSON.
+
+The coordinates are quantised to integers, so the edges shared by adjacent polygons are identical and only
+stored once, as an arc. The arcs are delta-encoded, so most coordinates are small numbers.
+
+This module doesn't depend on QGIS.
+"""
+from .topology import buildTopology
+
+#------------------- Public -------------------
+
+def buildTopoJson(features, precision, name='terrain'):
+    """Builds the TopoJSON Topology dict for the list of (properties, polygons) tuples.
+
+    `polygons` is the list of polygons of a feature, where each polygon is a list of rings of (x, y) tuples.
+    Coordinates are quantised to `precision` decimal places. Features that collapse are dropped.
+    """
+    scale = 10 ** precision
+    owners = []
+    polygons = []
+
+    for index, (_, items) in enumerate(features):
+        for polygon in items:
+            owners.append(index)
+            polygons.append([[(round(x * scale), round(y * scale)) for x, y in ring] for ring in polygon])
+
+    points = [point for polygon in polygons for ring in polygon for point in ring]
+    x0 = min((p[0] for p in points), default=0)
+    y0 = min((p[1] for p in points), default=0)
+
+    # Translate to the origin, so the first point of each arc is small too
+    polygons = [[[(x - x0, y - y0) for x, y in ring] for ring in polygon] for polygon in polygons]
+
+    arcs, shapes = buildTopology(polygons)
+    parts = [[] for _ in features]
+
+    for owner, shape in zip(owners, shapes):
+        # A collapsed exterior means the whole polygon has collapsed
+        if shape and shape[0]:
+            parts[owner].append([refs for refs in shape if refs])
+
+    geometries = []
+    for (properties, _), items in zip(features, parts):
+        if not items:
+            continue
+
+        if len(items) == 1:
+            geometry = {'type': 'Polygon', 'arcs': items[0]}
+        else:
+            geometry = {'type': 'MultiPolygon', 'arcs': items}
+
+        geometry['properties'] = properties
+        geometries.append(geometry)
+
+    return {
+        'type': 'Topology',
+        'transform': {
+            'scale': [1 / scale, 1 / scale],
+            'translate': [x0 / scale, y0 / scale]
+        },
+        'objects': {
+            name: {
+                'type': 'GeometryCollection',
+                'geometries': geometries
+            }
+        },
+        'arcs': [_encodeArc(arc) for arc in arcs]
+    }
+
+def decodeArc(arc, transform):
+    """Decodes the delta-encoded arc to a list of (x, y) tuples, using the Topology's transform."""
+    scale = transform['scale']
+    translate = transform['translate']
+    x = 0
+    y = 0
+    points = []
+
+    for dx, dy in arc:
+        x += dx
+        y += dy
+        points.append((x * scale[0] + translate[0], y * scale[1] + translate[1]))
+
+    return points
+
+#------------------- Private -------------------
+
+def _encodeArc(arc):
+    """Delta-encodes the arc, where each point is the offset from the previous"""
+    encoded = []
+    previous = (0, 0)
+
+    for point in arc:
+        encoded.append([point[0] - previous[0], point[1] - previous[1]])
+        previous = point
+
+    return encoded
@@ -0,0 +1,386 @@
+"""A collection of functions for building and simplifying a shared-arc polygon topology.
+
+Polygons are lists of rings, and rings are closed lists of (x, y) tuples. The topology splits the rings at
+the junctions (where more than two edges meet) into arcs, each of which is only stored once. Rings reference
+the arcs by index, where a negative index `~i` is arc `i` reversed (as in TopoJSON).
+
+This module doesn't depend on QGIS.
+"""
+
+#------------------- Public -------------------
+
+def buildTopology(polygons):
+    """Builds the topology for the list of polygons.
+
+    Returns a tuple of the list of arcs, and a list of polygons where each ring is a list of arc indices.
+    """
+    rings = [_cleanRing(ring) for polygon in polygons for ring in polygon]
+    junctions = _getJunctions(rings)
+    arcs = []
+    arcIndex = {}
+    shapes = []
+    ringIndex = 0
+
+    for polygon in polygons:
+        shape = []
+
+        for _ in polygon:
+            ring = rings[ringIndex]
+            ringIndex += 1
+
+            if len(ring) < 4:
+                shape.append([])
+                continue
+
+            shape.append([
+                _addArc(arcs, arcIndex, arc)
+                for arc in _splitRing(ring, junctions)
+            ])
+
+        shapes.append(shape)
+
+    return (arcs, shapes)
+
+def buildPolygons(arcs, shapes):
+    """Builds the list of polygons from the arcs and shapes returned by buildTopology.
+
+    Rings that have collapsed (fewer than 4 points) are dropped, as are polygons whose exterior has collapsed.
+    """
+    polygons = []
+
+    for shape in shapes:
+        polygon = []
+
+        for index, refs in enumerate(shape):
+            ring = _buildRing(arcs, refs)
+
+            if len(ring) < 4:
+                # The exterior has collapsed, so does the polygon
+                if index == 0:
+                    polygon = []
+                    break
+                continue
+
+            polygon.append(ring)
+
+        polygons.append(polygon)
+
+    return polygons
+
+def countVertices(polygons):
+    """Counts the number of vertices in the list of polygons."""
+    return sum(len(ring) for polygon in polygons for ring in polygon)
+
+def getSignificance(points):
+    """Gets the Douglas-Peucker significance of each of the points, the squared tolerance they're kept below.
+
+    simplifyLine keeps a point for any tolerance whose square is less than its significance, so the line can be
+    simplified with any tolerance without repeating the Douglas-Peucker recursion. The end points (and the split
+    point of a closed line) are always kept.
+    """
+    last = len(points) - 1
+    significance = [float('inf')] * len(points)
+
+    if len(points) < 3:
+        return significance
+
+    if points[0] == points[last]:
+        far = max(range(1, last), key=lambda i: _distanceSquared(points[0], points[i]))
+        stack = [(0, far, float('inf')), (far, last, float('inf'))]
+    else:
+        stack = [(0, last, float('inf'))]
+
+    # A point is only kept if the point that split its segment was too
+    while stack:
+        first, last, parent = stack.pop()
+
+        if last - first < 2:
+            continue
+
+        maxDistance = -1
+        maxIndex = first
+
+        for i in range(first + 1, last):
+            distance = _segmentDistanceSquared(points[i], points[first], points[last])
+            if distance > maxDistance:
+                maxDistance = distance
+                maxIndex = i
+
+        significance[maxIndex] = min(maxDistance, parent)
+        stack.append((first, maxIndex, significance[maxIndex]))
+        stack.append((maxIndex, last, significance[maxIndex]))
+
+    return significance
+
+def restoreCrossingArcs(arcs, simplified):
+    """Restores the original of each of the simplified arcs that crosses another arc, or itself.
+
+    Douglas-Peucker simplifies each arc independently, so a simplified arc can cross a nearby arc (eg. a nearly
+    parallel contour), creating invalid polygons. Restoring an arc may make it cross another simplified arc, so
+    this is repeated until none cross. Returns the list of arcs.
+    """
+    result = list(simplified)
+    crossing = _getCrossingArcs(result)
+
+    while True:
+        restore = [index for index in crossing if result[index] != arcs[index]]
+
+        if not restore:
+            return result
+
+        for index in restore:
+            result[index] = list(arcs[index])
+
+        crossing = _getCrossingArcs(result)
+
+def simplifyArcs(arcs, tolerance):
+    """Simplifies each of the arcs using the Douglas-Peucker algorithm, keeping the end points.
+
+    As every shared edge is a single arc, it's simplified identically for all the polygons using it. Any simplified
+    arc that would cross another arc is left unsimplified.
+    """
+    return restoreCrossingArcs(arcs, [simplifyLine(arc, tolerance) for arc in arcs])
+
+def simplifyCoverage(polygons, tolerance):
+    """Simplifies the list of polygons, without creating gaps or overlaps along their shared edges."""
+    arcs, shapes = buildTopology(polygons)
+
+    return buildPolygons(simplifyArcs(arcs, tolerance), shapes)
+
+def simplifyLine(points, tolerance):
+    """Simplifies the list of points using the Douglas-Peucker algorithm, keeping the end points.
+
+    Closed lines are split at the point furthest from the start, so they don't collapse to a single point.
+    """
+    if len(points) < 3 or tolerance <= 0:
+        return list(points)
+
+    last = len(points) - 1
+
+    if points[0] == points[last]:
+        far = max(range(1, last), key=lambda i: _distanceSquared(points[0], points[i]))
+        keep = {0, far, last}
+        _douglasPeucker(points, 0, far, tolerance * tolerance, keep)
+        _douglasPeucker(points, far, last, tolerance * tolerance, keep)
+    else:
+        keep = {0, last}
+        _douglasPeucker(points, 0, last, tolerance * tolerance, keep)
+
+    return [points[i] for i in sorted(keep)]
+
+#------------------- Private -------------------
+
+def _addArc(arcs, arcIndex, arc):
+    """Adds the arc if it doesn't exist (in either direction), and returns its index"""
+    key = tuple(arc)
+
+    if key in arcIndex:
+        return arcIndex[key]
+
+    reverseKey = tuple(reversed(arc))
+    if reverseKey in arcIndex:
+        return ~arcIndex[reverseKey]
+
+    index = len(arcs)
+    arcs.append(arc)
+    arcIndex[key] = index
+
+    return index
+
+def _buildRing(arcs, refs):
+    """Builds the ring from the list of arc indices"""
+    ring = []
+
+    for ref in refs:
+        arc = arcs[ref] if ref >= 0 else list(reversed(arcs[~ref]))
+
+        # The first point of each arc is the last of the previous
+        ring.extend(arc if not ring else arc[1:])
+
+    return ring
+
+def _cleanRing(ring):
+    """Returns the closed ring, without any consecutive duplicate points"""
+    points = [tuple(p) for p in ring]
+    cleaned = points[:1]
+
+    for point in points[1:]:
+        if point != cleaned[-1]:
+            cleaned.append(point)
+
+    if cleaned and cleaned[0] != cleaned[-1]:
+        cleaned.append(cleaned[0])
+
+    return cleaned
+
+def _distanceSquared(a, b):
+    """Gets the squared distance between the two points"""
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+
+    return dx * dx + dy * dy
+
+def _douglasPeucker(points, first, last, toleranceSquared, keep):
+    """Adds the indices of the points between first and last that should be kept to the `keep` set"""
+    stack = [(first, last)]
+
+    while stack:
+        first, last = stack.pop()
+
+        if last - first < 2:
+            continue
+
+        maxDistance = -1
+        maxIndex = first
+
+        for i in range(first + 1, last):
+            distance = _segmentDistanceSquared(points[i], points[first], points[last])
+            if distance > maxDistance:
+                maxDistance = distance
+                maxIndex = i
+
+        if maxDistance > toleranceSquared:
+            keep.add(maxIndex)
+            stack.append((first, maxIndex))
+            stack.append((maxIndex, last))
+
+def _getCrossingArcs(arcs):
+    """Gets the set of indices of the arcs that cross another arc, or themselves.
+
+    Arcs may only touch at their end points (the junctions). The segments are bucketed in a grid, so each is only
+    tested against the segments near it.
+    """
+    segments = [
+        (index, i, arc[i], arc[i + 1])
+        for index, arc in enumerate(arcs)
+        for i in range(len(arc) - 1)
+    ]
+
+    if not segments:
+        return set()
+
+    # Cells twice the average segment size, so most segments only fall in a few
+    size = 2 * sum(max(abs(a[0] - b[0]), abs(a[1] - b[1])) for _, _, a, b in segments) / len(segments)
+    size = size or 1
+    grid = {}
+
+    for segment in segments:
+        _, _, a, b = segment
+        for x in range(int(min(a[0], b[0]) // size), int(max(a[0], b[0]) // size) + 1):
+            for y in range(int(min(a[1], b[1]) // size), int(max(a[1], b[1]) // size) + 1):
+                grid.setdefault((x, y), []).append(segment)
+
+    crossing = set()
+    tested = set()
+
+    for cell in grid.values():
+        for i, first in enumerate(cell):
+            for second in cell[i + 1:]:
+                key = (first[0], first[1], second[0], second[1])
+
+                if key in tested or _isAdjacent(arcs, first, second):
+                    continue
+
+                tested.add(key)
+
+                if _isCrossing(first[2], first[3], second[2], second[3]):
+                    crossing.add(first[0])
+                    crossing.add(second[0])
+
+    return crossing
+
+def _getJunctions(rings):
+    """Gets the set of points where more than two edges meet"""
+    neighbours = {}
+
+    for ring in rings:
+        for i in range(len(ring) - 1):
+            a = ring[i]
+            b = ring[i + 1]
+            neighbours.setdefault(a, set()).add(b)
+            neighbours.setdefault(b, set()).add(a)
+
+    return {point for point, items in neighbours.items() if len(items) > 2}
+
+def _isAdjacent(arcs, first, second):
+    """Gets a flag indicating whether the (arc index, segment index, start, end) segments are consecutive in an arc"""
+    if first[0] != second[0]:
+        return False
+
+    last = len(arcs[first[0]]) - 2
+    indices = {first[1], second[1]}
+
+    # The first and last segments of a closed arc meet too
+    return abs(first[1] - second[1]) == 1 or (indices == {0, last} and arcs[first[0]][0] == arcs[first[0]][-1])
+
+def _isCrossing(a, b, c, d):
+    """Gets a flag indicating whether the segments a-b and c-d intersect, other than at an end point of both"""
+    o1 = _orientation(a, b, c)
+    o2 = _orientation(a, b, d)
+    o3 = _orientation(c, d, a)
+    o4 = _orientation(c, d, b)
+
+    # Collinear segments cross if they overlap by more than a point
+    if o1 == 0 and o2 == 0:
+        axis = 0 if a[0] != b[0] or c[0] != d[0] else 1
+        overlap = min(max(a[axis], b[axis]), max(c[axis], d[axis])) - max(min(a[axis], b[axis]), min(c[axis], d[axis]))
+        return overlap > 0
+
+    if o1 * o2 < 0 and o3 * o4 < 0:
+        return True
+
+    # An end point touching the other segment, unless it's an end point of both
+    shared = {a, b} & {c, d}
+
+    return any(
+        orientation == 0 and point not in shared and _isOnSegment(point, start, end)
+        for orientation, point, start, end in [(o1, c, a, b), (o2, d, a, b), (o3, a, c, d), (o4, b, c, d)]
+    )
+
+def _isOnSegment(point, a, b):
+    """Gets a flag indicating whether the point, collinear with the segment a-b, lies within it"""
+    return min(a[0], b[0]) <= point[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= point[1] <= max(a[1], b[1])
+
+def _orientation(a, b, c):
+    """Gets the sign of the cross product of a-b and a-c, 1 if c is left of a-b, -1 if right, and 0 if collinear"""
+    cross = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+    return (cross > 0) - (cross < 0)
+
+def _segmentDistanceSquared(point, a, b):
+    """Gets the squared distance from the point to the segment a-b"""
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    lengthSquared = dx * dx + dy * dy
+
+    if lengthSquared == 0:
+        return _distanceSquared(point, a)
+
+    t = ((point[0] - a[0]) * dx + (point[1] - a[1]) * dy) / lengthSquared
+    t = max(0, min(1, t))
+
+    return _distanceSquared(point, (a[0] + t * dx, a[1] + t * dy))
+
+def _splitRing(ring, junctions):
+    """Splits the closed ring into arcs at the junctions"""
+    points = ring[:-1]
+    starts = [i for i, point in enumerate(points) if point in junctions]
+
+    # Without any junctions the ring is a single arc, starting from its smallest point so that the same ring
+    # used by another polygon (eg. as a hole) creates the same arc
+    if not starts:
+        start = min(range(len(points)), key=lambda i: points[i])
+        rotated = points[start:] + points[:start]
+        return [rotated + rotated[:1]]
+
+    rotated = points[starts[0]:] + points[:starts[0]] + [points[starts[0]]]
+    arcs = []
+    arc = [rotated[0]]
+
+    for point in rotated[1:]:
+        arc.append(point)
+        if point in junctions:
+            arcs.append(arc)
+            arc = [point]
+
+    return arcs
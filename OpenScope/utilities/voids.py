@@ -0,0 +1,88 @@
+"""A collection of functions for filling the voids in SRTM (.hgt) DEM tiles."""
+import math
+import os
+import numpy
+
+# The value of the void pixels in an SRTM tile
+VOID = -32768
+
+# The .hgt pixel format, big-endian signed 16 bit heights
+_HGT_TYPE = '>i2'
+
+# The inverse-distance weights of the 8 neighbours of a pixel, as (row offset, column offset, weight)
+_NEIGHBOURS = [
+    (dy, dx, 1 / math.hypot(dy, dx))
+    for dy in (-1, 0, 1)
+    for dx in (-1, 0, 1)
+    if dy or dx
+]
+
+#------------------- Public -------------------
+
+def fillVoids(elevation, void=VOID):
+    """Gets a copy of the elevation array with the void pixels filled.
+
+    Voids are filled from their edges inwards, each pixel taking the inverse-distance weighted mean of its
+    filled neighbours. Each pass is vectorised over the whole array, so a void takes as many passes as its
+    radius in pixels. An array with no valid pixels (eg. a tile entirely over the sea) is filled with sea level.
+    """
+    voids = elevation == void
+
+    if not voids.any():
+        return elevation.copy()
+
+    if voids.all():
+        return numpy.zeros_like(elevation)
+
+    filled = numpy.where(voids, 0, elevation).astype(numpy.float64)
+    valid = ~voids
+    rows, columns = elevation.shape
+
+    while voids.any():
+        # Pad by a pixel, so the neighbours of the edge pixels can be sliced
+        values = numpy.pad(filled, 1, 'constant')
+        weights = numpy.pad(valid, 1, 'constant').astype(numpy.float64)
+
+        total = numpy.zeros_like(filled)
+        weight = numpy.zeros_like(filled)
+
+        for dy, dx, w in _NEIGHBOURS:
+            neighbourWeights = weights[1 + dy:1 + dy + rows, 1 + dx:1 + dx + columns] * w
+            total += values[1 + dy:1 + dy + rows, 1 + dx:1 + dx + columns] * neighbourWeights
+            weight += neighbourWeights
+
+        edge = numpy.logical_and(voids, weight > 0)
+        filled[edge] = total[edge] / weight[edge]
+        valid[edge] = True
+        voids[edge] = False
+
+    return numpy.rint(filled).astype(elevation.dtype)
+
+def getFilledDem(fileName, path):
+    """Gets the filename of the void filled copy of the .hgt file, which is cached in `path`.
+
+    The tile is memory-mapped, and only filled the first time (or if the source is newer than the cache).
+    """
+    filledFile = os.path.join(path, os.path.basename(fileName))
+
+    if os.path.isfile(filledFile) and os.path.getmtime(filledFile) >= os.path.getmtime(fileName):
+        return filledFile
+
+    os.makedirs(path, exist_ok=True)
+
+    size = int(math.sqrt(os.path.getsize(fileName) // 2))
+    source = numpy.memmap(fileName, dtype=_HGT_TYPE, mode='r', shape=(size, size))
+
+    # Unique names are used for the partial files, as other processes may be filling the same tile
+    partialFile = '%s.%d' % (filledFile, os.getpid())
+    target = numpy.memmap(partialFile, dtype=_HGT_TYPE, mode='w+', shape=(size, size))
+    target[:] = fillVoids(numpy.asarray(source))
+    target.flush()
+
+    # Close the memory maps before moving the file into place
+    del source
+    del target
+
+    os.replace(partialFile, filledFile)
+
+    return filledFile
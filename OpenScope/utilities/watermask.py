@@ -0,0 +1,100 @@
+"""A collection of functions for computing a water mask from rasterised land and lakes."""
+import numpy
+from osgeo import gdal, ogr # pylint: disable=import-error
+
+#------------------- Public -------------------
+
+def computeWaterMask(land, lakes):
+    """Gets the water mask, 1 for water and 0 for land, from the land and lakes arrays (non-zero where present)"""
+    return numpy.logical_or(land == 0, lakes != 0).astype(numpy.uint8)
+
+def getRasterSize(extent, resolution):
+    """Gets the (width, height) in pixels of a grid with the resolution (in degrees) covering the QgsRectangle"""
+    return (
+        max(1, int(numpy.ceil(extent.width() / resolution))),
+        max(1, int(numpy.ceil(extent.height() / resolution)))
+    )
+
+def getSeaLevelElevation(elevation, land, nodata=None):
+    """Gets the elevation array with every pixel outside the land (zero in the land array) set to sea level.
+
+    Nodata pixels are left untouched.
+    """
+    sea = land == 0
+
+    if nodata is not None:
+        sea = numpy.logical_and(sea, elevation != nodata)
+
+    return numpy.where(sea, 0, elevation).astype(elevation.dtype)
+
+def maskSea(demFile, waterFile, layerName=None):
+    """Sets the pixels of the DEM GeoTIFF inside the water polygons to sea level, in place.
+
+    The water is the layer (the first, if not named) of the vector file the terrain's water is written to, so the DEM
+    and the water agree along the coastline. Only the water polygons intersecting the DEM are rasterised. Returns the
+    number of pixels masked.
+    """
+    dem = gdal.Open(demFile, gdal.GA_Update)
+    band = dem.GetRasterBand(1)
+    transform = dem.GetGeoTransform()
+
+    # Rasterise the water onto the DEM's grid, everything else is land
+    waterSource = ogr.Open(waterFile)
+    waterLayer = waterSource.GetLayerByName(layerName) if layerName else waterSource.GetLayer()
+    waterLayer.SetSpatialFilterRect(
+        transform[0],
+        transform[3] + dem.RasterYSize * transform[5],
+        transform[0] + dem.RasterXSize * transform[1],
+        transform[3]
+    )
+
+    land = gdal.GetDriverByName('MEM').Create('', dem.RasterXSize, dem.RasterYSize, 1, gdal.GDT_Byte)
+    land.SetGeoTransform(transform)
+    land.SetProjection(dem.GetProjection())
+    land.GetRasterBand(1).Fill(1)
+    gdal.RasterizeLayer(land, [1], waterLayer, burn_values=[0])
+
+    elevation = band.ReadAsArray()
+    masked = getSeaLevelElevation(elevation, land.GetRasterBand(1).ReadAsArray(), band.GetNoDataValue())
+
+    band.WriteArray(masked)
+    band.FlushCache()
+
+    count = int(numpy.count_nonzero(masked != elevation))
+
+    # Close the datasets
+    land = None
+    waterSource = None
+    dem = None
+
+    return count
+
+def writeWaterMask(landFile, lakesFile, outputFile):
+    """Writes the water mask GeoTIFF from the land and lakes rasters, which must share the same grid.
+
+    Land pixels are nodata, so only the water is vectorised. Returns the number of water pixels.
+    """
+    land = gdal.Open(landFile)
+    lakes = gdal.Open(lakesFile)
+
+    mask = computeWaterMask(
+        land.GetRasterBand(1).ReadAsArray(),
+        lakes.GetRasterBand(1).ReadAsArray()
+    )
+
+    driver = gdal.GetDriverByName('GTiff')
+    output = driver.Create(outputFile, land.RasterXSize, land.RasterYSize, 1, gdal.GDT_Byte, ['COMPRESS=DEFLATE'])
+    output.SetGeoTransform(land.GetGeoTransform())
+    output.SetProjection(land.GetProjection())
+
+    band = output.GetRasterBand(1)
+    band.SetNoDataValue(0)
+    band.WriteArray(mask)
+    band.FlushCache()
+
+    # Close the datasets
+    output = None
+    land = None
+    lakes = None
+
+    return int(mask.sum())
@@ -25,10 +25,12 @@
 """
 #pylint: disable=broad-except
 
+import copy
 import math
 import os.path
 
 #from qgis.core import QgsProcessingFeedback
+from qgis.core import QgsApplication, QgsMapLayer, QgsTask, QgsWkbTypes
 from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication, Qt
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction, QFileDialog, QInputDialog, QMessageBox, QProgressDialog
@@ -42,6 +44,7 @@ from .ui.import_dialog import ImportDialog
 from .ui.settings_dialog import SettingsDialog
 
 from .OpenScope.TerrainGenerator import TerrainGenerator, TerrainGeneratorConfig
+from .OpenScope.TerrainTask import TerrainTask
 from .OpenScope.utilities import drawing, exporter, gshhg
 from .OpenScope.TextProcessingFeedback import TextProcessingFeedback
 
@@ -76,6 +79,12 @@ class QgsOpenScope:
         self.actions = []
         self.menu = self.tr(u'&QgsOpenScope')
 
+        # The background task building the terrain, a reference is kept until it completes
+        self.terrainTask = None
+
+        # A cancelled task that's still finishing its current step, the next task is started once it has
+        self.stoppingTask = None
+
         # Check if plugin was started the first time in current QGIS session
         # Must be set in initGui() to survive plugin reloads
         self.firstStart = None
@@ -202,6 +211,27 @@ class QgsOpenScope:
             parent=self.iface.mainWindow(),
             isToolbarItem=True
         )
+        self.addAction(
+            None,
+            text='Update Terrain from Water Edits',
+            callback=self.updateTerrain,
+            parent=self.iface.mainWindow(),
+            isToolbarItem=False
+        )
+        self.addAction(
+            None,
+            text='Compare with Existing Terrain',
+            callback=self.compareTerrain,
+            parent=self.iface.mainWindow(),
+            isToolbarItem=False
+        )
+        self.addAction(
+            None,
+            text='Check Terrain Quality',
+            callback=self.checkTerrain,
+            parent=self.iface.mainWindow(),
+            isToolbarItem=False
+        )
 
         # Export
         self.addMenuSeparator()
@@ -273,6 +303,8 @@ class QgsOpenScope:
 
     def unload(self):
         """Removes the plugin menu item and icon from QGIS GUI."""
+        self._cancelTerrainTask()
+
         for action in self.actions:
             self.iface.removePluginMenu(
                 self.tr(u'&QgsOpenScope'),
@@ -300,6 +332,59 @@ class QgsOpenScope:
 
 #------------------- Handlers -------------------
 
+    def checkTerrain(self):
+        """Checks the selected polygon layers, or the generated terrain, for gaps, overlaps and slivers"""
+
+        if self._isGeneratingTerrain():
+            QMessageBox.warning(None, 'QgsOpenScope', 'The terrain is still being generated')
+            return
+
+        layers = [
+            layer for layer in self.iface.layerTreeView().selectedLayers()
+            if layer.type() == QgsMapLayer.VectorLayer and layer.geometryType() == QgsWkbTypes.PolygonGeometry
+        ]
+
+        progress, feedback = self._showProgress()
+
+        try:
+            summary = TerrainGenerator.checkQuality(layers, feedback)
+
+            self.iface.messageBar().pushInfo('QgsOpenScope', (
+                'Found %d gaps, %d overlaps, %d slivers and %d water slivers in %d polygons in %.1f seconds' % (
+                    summary['gap'], summary['overlap'], summary['sliver'], summary['water'], summary['polygons'],
+                    summary['seconds']
+                )
+            ))
+
+        except Exception as e:
+            QMessageBox.warning(None, 'QgsOpenScope', str(e))
+
+        progress.hide()
+
+    def compareTerrain(self):
+        """Compares the generated terrain with the existing terrain"""
+
+        if self._isGeneratingTerrain():
+            QMessageBox.warning(None, 'QgsOpenScope', 'The terrain is still being generated')
+            return
+
+        progress, feedback = self._showProgress()
+
+        try:
+            summary = TerrainGenerator.compareTerrain(feedback)
+
+            self.iface.messageBar().pushInfo('QgsOpenScope', (
+                '%d added, %d removed and %d changed areas, compared %d with %d polygons in %.1f seconds' % (
+                    summary['added']['features'], summary['removed']['features'], summary['changed']['features'],
+                    summary['generated'], summary['existing'], summary['seconds']
+                )
+            ))
+
+        except Exception as e:
+            QMessageBox.warning(None, 'QgsOpenScope', str(e))
+
+        progress.hide()
+
     def drawCircles(self):
         """Draws a circle around the selected points"""
 
@@ -392,31 +477,37 @@ class QgsOpenScope:
         if not airportFile:
             return
 
-        config = TerrainGeneratorConfig()
+        # A task still building earlier terrain would publish over the new terrain
+        self._cancelTerrainTask()
 
-        config.airportFile = airportFile
-        config.projectPath = SettingsDialog.getProjectPath()
-        config.tmpPath = SettingsDialog.getTempPath()
-        config.contourInterval = 304.8
+        config = self._getTerrainConfig(airportFile)
+        config.preview = SettingsDialog.getPreviewTerrain()
 
-        # For providing UI feedback
-        progress = QProgressDialog('', 'Cancel', 0, 100)
-        feedback = TextProcessingFeedback()
+        polygons = TerrainGenerator.getSelectedPolygons()
 
-        feedback.progressChanged.connect(lambda x: self._updateDialog(progress, value=x))
-        feedback.progressTextChanged.connect(lambda x: self._updateDialog(progress, text=x))
+        if not polygons:
+            QMessageBox.warning(None, 'QgsOpenScope', 'No valid polygons were selected to determine the terrain bounds')
+            return
 
-        progress.setAutoClose(False)
-        progress.setWindowModality(Qt.WindowModal)
-        progress.setMinimumDuration(500)
-        progress.canceled.connect(feedback.cancel)
-        progress.show()
+        terrain = TerrainGenerator(config)
+
+        # The layers are published as they're completed, while the later stages keep running in the background
+        if not config.preview:
+            terrain.resetTerrain()
+            self._startTerrainTask('Generating terrain', terrain, polygons)
+            return
+
+        progress, feedback = self._showProgress()
 
         try:
-            terrain = TerrainGenerator(config)
-            terrain.generateTerrain(feedback)
+            terrain.generateTerrain(feedback, polygons)
             terrain.saveProject()
 
+            # Refine the preview in the background, each refined layer replaces its preview once complete
+            refined = copy.copy(config)
+            refined.preview = False
+            self._startTerrainTask('Refining terrain', TerrainGenerator(refined), polygons)
+
         except Exception as e:
             QMessageBox.warning(None, 'QgsOpenScope', str(e))
 
@@ -446,8 +537,49 @@ class QgsOpenScope:
         if result:
             pass
 
+    def updateTerrain(self):
+        """Updates the contours for the edits made to the water since the terrain was generated"""
+
+        if self._isGeneratingTerrain():
+            QMessageBox.warning(None, 'QgsOpenScope', 'The terrain is still being generated')
+            return
+
+        airportFile = self._getAirportFile()
+
+        if not airportFile:
+            return
+
+        progress, feedback = self._showProgress()
+
+        try:
+            terrain = TerrainGenerator(self._getTerrainConfig(airportFile))
+            replaced = terrain.updateTerrain(feedback)
+            terrain.saveProject()
+
+            self.iface.messageBar().pushInfo('QgsOpenScope', 'Updated %d contour polygons' % replaced)
+
+        except Exception as e:
+            QMessageBox.warning(None, 'QgsOpenScope', str(e))
+
+        progress.hide()
+
 #------------------- Private methods -------------------
 
+    def _cancelTerrainTask(self):
+        """Cancels the background task building the terrain, if it's still running.
+
+        The task stops at the start of its next step, without blocking the UI. Until it has, it's kept as the
+        stopping task, so the next task doesn't write to the same project files at the same time.
+        """
+        if self.terrainTask is not None:
+            self.terrainTask.cancel()
+
+            # A task that hasn't started yet never runs
+            if self.terrainTask.status() == QgsTask.Running:
+                self.stoppingTask = self.terrainTask
+
+        self.terrainTask = None
+
     def _getAirportFile(self):
         """Prompts the user to select an airport file and returns the AirportModel"""
 
@@ -468,6 +600,73 @@ class QgsOpenScope:
 
         return fileName
 
+    @staticmethod
+    def _getTerrainConfig(airportFile):
+        """Gets the TerrainGeneratorConfig for the airport file, from the settings"""
+        config = TerrainGeneratorConfig()
+
+        config.airportFile = airportFile
+        config.projectPath = SettingsDialog.getProjectPath()
+        config.tmpPath = SettingsDialog.getTempPath()
+        config.contourIntervals = SettingsDialog.getContourIntervals()
+        config.rasterCacheSize = SettingsDialog.getRasterCacheSize()
+        config.rasterThreads = SettingsDialog.getRasterThreads() or None
+
+        return config
+
+    def _isGeneratingTerrain(self):
+        """Gets a flag indicating whether a task is building the terrain, or a cancelled task hasn't stopped yet"""
+        if self.stoppingTask is not None and self.stoppingTask.status() in [QgsTask.Complete, QgsTask.Terminated]:
+            self.stoppingTask = None
+
+        return self.terrainTask is not None or self.stoppingTask is not None
+
+    def _showProgress(self):
+        """Shows a QProgressDialog, returning it and the feedback that updates it"""
+        progress = QProgressDialog('', 'Cancel', 0, 100)
+        feedback = TextProcessingFeedback()
+
+        feedback.progressChanged.connect(lambda x: self._updateDialog(progress, value=x))
+        feedback.progressTextChanged.connect(lambda x: self._updateDialog(progress, text=x))
+
+        progress.setAutoClose(False)
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.canceled.connect(feedback.cancel)
+        progress.show()
+
+        return (progress, feedback)
+
+    def _startTerrainTask(self, description, generator, polygons):
+        """Starts building the terrain in a background task"""
+        task = TerrainTask(description, generator, polygons)
+
+        def onComplete():
+            if self.terrainTask is task:
+                self.terrainTask = None
+
+        task.taskCompleted.connect(onComplete)
+        task.taskTerminated.connect(onComplete)
+
+        self.terrainTask = task
+        stopping = self.stoppingTask
+
+        if stopping is None or stopping.status() in [QgsTask.Complete, QgsTask.Terminated]:
+            self.stoppingTask = None
+            QgsApplication.taskManager().addTask(task)
+            return
+
+        # Started once the cancelled task has stopped
+        def onStopped():
+            if self.stoppingTask is stopping:
+                self.stoppingTask = None
+
+            if not task.isCanceled():
+                QgsApplication.taskManager().addTask(task)
+
+        stopping.taskCompleted.connect(onStopped)
+        stopping.taskTerminated.connect(onStopped)
+
     def _updateDialog(self, progressDialog, value=None, text=None):
         """Helper method for updating the value and text of a QProgressDialog"""
         if value is not None:
@@ -0,0 +1,142 @@
+"""An end-to-end terrain generation benchmark, run offline against the synthetic fixtures.
+
+Run from the plugin directory, eg.
+    python3 -m test.benchmark --output benchmark.json
+    python3 -m test.benchmark --storage memory scratch --simplify independent coverage --water vector raster --repeat 3
+
+Every combination of the options is run, and the per-stage wall time, peak memory and output vertex
+counts of each run are written to the JSON results file.
+"""
+#pylint: disable=import-outside-toplevel
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+
+_DEFAULT_WORK_PATH = os.path.join(tempfile.gettempdir(), 'qgsopenscope-benchmark')
+
+#------------------- Public -------------------
+
+def runBenchmark(workPath, relief=1000, hills=12, seed=1, storageModes=None, simplifyMethods=None,
+                 tileSizes=None, waterEngines=None, repeat=1, feedback=None):
+    """Runs the benchmark for every combination of the options, returning the results"""
+    from qgis.core import Qgis
+    from OpenScope.ConsoleProcessingFeedback import ConsoleProcessingFeedback
+    from .fixtures import createFixtures
+
+    feedback = feedback or ConsoleProcessingFeedback(open(os.devnull, 'w'))
+    fixtures = createFixtures(os.path.join(workPath, 'fixtures'), relief=relief, hills=hills, seed=seed)
+    runs = []
+
+    for storageMode, simplifyMethod, tileSize, waterEngine in itertools.product(
+            storageModes or ['memory'],
+            simplifyMethods or ['independent'],
+            tileSizes or [None],
+            waterEngines or ['vector']
+    ):
+        for index in range(repeat):
+            print('Running storage=%s simplify=%s tileSize=%s water=%s (%d/%d)' % (
+                storageMode, simplifyMethod, tileSize, waterEngine, index + 1, repeat
+            ))
+
+            metrics = _runTerrain(workPath, fixtures, storageMode, simplifyMethod, tileSize, waterEngine, feedback)
+            runs.append(metrics)
+
+            print('  %.1fs, peak memory %.0f MB, %d vertices' % (
+                metrics['seconds'], metrics['peakMemory'] / 1024 / 1024, metrics['vertices']
+            ))
+
+    return {
+        'created': datetime.datetime.now().isoformat(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'qgis': Qgis.QGIS_VERSION,
+        'fixtures': fixtures['parameters'],
+        'runs': runs
+    }
+
+def main(argv=None):
+    """The command-line entry point"""
+    args = _getArgumentParser().parse_args(argv)
+
+    from OpenScope.headless import exitQgis, initQgis
+
+    initQgis(args.prefix)
+
+    try:
+        results = runBenchmark(
+            args.work_path,
+            relief=args.relief,
+            hills=args.hills,
+            seed=args.seed,
+            storageModes=args.storage,
+            simplifyMethods=args.simplify,
+            tileSizes=args.tile_size,
+            waterEngines=args.water,
+            repeat=args.repeat
+        )
+
+    finally:
+        exitQgis()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print('Saved %s' % args.output)
+
+    return 0
+
+#------------------- Private -------------------
+
+def _getArgumentParser():
+    """Gets the command-line argument parser"""
+    parser = argparse.ArgumentParser(prog='python3 -m test.benchmark', description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='benchmark.json', help='The JSON results file to write')
+    parser.add_argument('--work-path', default=_DEFAULT_WORK_PATH, help='Where the fixtures and runs are stored')
+    parser.add_argument('--prefix', help='The QGIS prefix path (defaults to $QGIS_PREFIX_PATH or /usr)')
+    parser.add_argument('--relief', type=float, default=1000, help='The height (in metres) of the highest hills')
+    parser.add_argument('--hills', type=int, default=12, help='The number of hills in the synthetic DEM')
+    parser.add_argument('--seed', type=int, default=1, help='The seed for the synthetic DEM')
+    parser.add_argument('--storage', nargs='+', choices=['memory', 'scratch', 'auto'], help='The storage modes')
+    parser.add_argument('--simplify', nargs='+', choices=['independent', 'coverage'], help='The simplify methods')
+    parser.add_argument('--tile-size', type=float, nargs='+', help='The tile sizes (in degrees)')
+    parser.add_argument('--water', nargs='+', choices=['vector', 'raster'], help='The water engines')
+    parser.add_argument('--repeat', type=int, default=1, help='The number of times each combination is run')
+
+    return parser
+
+def _runTerrain(workPath, fixtures, storageMode, simplifyMethod, tileSize, waterEngine, feedback):
+    """Generates the terrain from the fixtures in a clean project, returning the metrics"""
+    from qgis.core import QgsProject
+    from OpenScope.IntermediateStorage import StorageMode
+    from OpenScope.TerrainGenerator import SimplifyMethod, TerrainGenerator, TerrainGeneratorConfig, WaterEngine
+
+    runPath = os.path.join(workPath, 'run')
+    shutil.rmtree(runPath, ignore_errors=True)
+
+    config = TerrainGeneratorConfig()
+    config.airportFile = fixtures['airportFile']
+    config.cachePath = fixtures['cachePath']
+    config.projectPath = os.path.join(runPath, 'projects')
+    config.tmpPath = os.path.join(runPath, 'tmp')
+    config.resume = False
+    config.simplifyMethod = SimplifyMethod(simplifyMethod)
+    config.storageMode = StorageMode(storageMode)
+    config.tileSize = tileSize
+    config.waterEngine = WaterEngine(waterEngine)
+
+    QgsProject.instance().clear()
+
+    terrain = TerrainGenerator(config)
+    terrain.generateTerrain(feedback, terrain.getAirspacePolygons())
+
+    return terrain.getMetrics().toDict()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""Synthetic, deterministic fixtures for running the terrain generator offline.
+
+Creates SRTM3 style .hgt tiles with controllable relief, a small GSHHG style set of shoreline and river
+shapefiles, and an airport file with airspace. The DEM and GSHHG files are created in the cache layout used
+by GeneratorBase (`<cachePath>/qgsopenscope/...`), along with the touch files that mark them as downloaded.
+"""
+
+import array
+import json
+import math
+import os
+import random
+import sys
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsField,
+    QgsGeometry,
+    QgsPointXY,
+    QgsRectangle,
+    QgsVectorFileWriter,
+    QgsVectorLayer
+)
+from PyQt5.QtCore import QVariant
+
+from OpenScope.utilities.converters import fromPointXY
+from OpenScope.utilities.dem import _getGraticules, _getNameFromGraticule
+from OpenScope.utilities.dem_map import getTile
+from OpenScope.utilities.gshhg import (
+    _GSHHG_FILE,
+    _getRiverPath,
+    _getShorelinePath,
+    Resolution,
+    RiverLevel,
+    ShorelineLevel
+)
+
+FIXTURE_FILE = 'fixture.json'
+
+# The number of rows and columns in an SRTM3 (3 arc second) tile
+HGT_SIZE = 1201
+
+ICAO = 'XBEN'
+
+class ElevationModel:
+    """A deterministic synthetic landscape: sea to the west of a wavy coastline, and hills inland.
+
+    `relief` is the approximate height (in metres) of the highest hills, `hills` the number of hills.
+    """
+
+    _coastAmplitude = 0.03
+
+    _coastX = None
+
+    _hills = None
+
+    def __init__(self, bounds, relief=1000, hills=12, seed=1):
+        xMin, yMin, xMax, yMax = bounds
+        rand = random.Random(seed)
+
+        self._coastX = xMin + (xMax - xMin) * 0.25
+        self._hills = []
+
+        for _ in range(hills):
+            self._hills.append({
+                'x': rand.uniform(self._coastX, xMax),
+                'y': rand.uniform(yMin, yMax),
+                'height': relief * rand.uniform(0.2, 1),
+                'sigma': rand.uniform(0.03, 0.15)
+            })
+
+    def getCoastX(self, y):
+        """Gets the longitude of the coastline at the latitude"""
+        return self._coastX + self._coastAmplitude * math.sin(y * 40)
+
+    def getElevation(self, x, y):
+        """Gets the elevation (in metres) at the point"""
+        if x < self.getCoastX(y):
+            return 0
+
+        return 5 + sum(
+            hill['height'] * math.exp(-((x - hill['x']) ** 2 + (y - hill['y']) ** 2) / (2 * hill['sigma'] ** 2))
+            for hill in self._hills
+        )
+
+    def getElevationRow(self, y, xs):
+        """Gets the elevations (in metres) along the row, using the separable Gaussians for speed"""
+        coastX = self.getCoastX(y)
+        rowFactors = [
+            hill['height'] * math.exp(-(y - hill['y']) ** 2 / (2 * hill['sigma'] ** 2))
+            for hill in self._hills
+        ]
+        columns = [
+            [math.exp(-(x - hill['x']) ** 2 / (2 * hill['sigma'] ** 2)) for x in xs]
+            for hill in self._hills
+        ]
+
+        return [
+            0 if x < coastX else 5 + sum(f * c[i] for f, c in zip(rowFactors, columns))
+            for i, x in enumerate(xs)
+        ]
+
+#------------------- Public -------------------
+
+def createFixtures(path, bounds=(-9.6, 52.3, -8.4, 52.9), relief=1000, hills=12, seed=1, lake=True):
+    """Creates the fixtures in `path`, unless they already exist for the same parameters.
+
+    `bounds` is the (xMin, yMin, xMax, yMax) of the airspace, and `lake` whether the GSHHG lakes include a lake
+    among the hills. Returns a dict of the airport file, the cache path (for GeneratorConfigBase.cachePath) and
+    the parameters.
+    """
+    parameters = {
+        'bounds': list(bounds),
+        'hills': hills,
+        'lake': lake,
+        'relief': relief,
+        'seed': seed
+    }
+    fixtureFile = os.path.join(path, FIXTURE_FILE)
+    fixtures = {
+        'airportFile': os.path.join(path, '%s.json' % ICAO.lower()),
+        'cachePath': os.path.join(path, 'cache'),
+        'parameters': parameters
+    }
+
+    if os.path.isfile(fixtureFile):
+        with open(fixtureFile) as f:
+            if json.load(f) == fixtures:
+                return fixtures
+
+    model = ElevationModel(bounds, relief, hills, seed)
+    cachePath = os.path.join(fixtures['cachePath'], 'qgsopenscope')
+
+    writeAirport(fixtures['airportFile'], bounds)
+    writeDems(os.path.join(cachePath, 'dems'), bounds, model)
+    writeGshhg(os.path.join(cachePath, 'gshhg'), bounds, model, lake)
+
+    with open(fixtureFile, 'w') as f:
+        json.dump(fixtures, f, indent=2)
+
+    return fixtures
+
+def writeAirport(fileName, bounds):
+    """Writes an airport file whose airspace is an octagon inscribed in the bounds"""
+    xMin, yMin, xMax, yMax = bounds
+    cx = (xMin + xMax) / 2
+    cy = (yMin + yMax) / 2
+    points = [
+        QgsPointXY(cx + math.cos(a) * (xMax - xMin) / 2, cy + math.sin(a) * (yMax - yMin) / 2)
+        for a in [i * math.pi / 4 + math.pi / 8 for i in range(8)]
+    ]
+
+    airport = {
+        'icao': ICAO,
+        'name': 'Synthetic Benchmark Airport',
+        'airspace': [{
+            'floor': 0,
+            'ceiling': 100,
+            'airspace_class': 'C',
+            'poly': [fromPointXY(p) for p in points]
+        }]
+    }
+
+    os.makedirs(os.path.dirname(fileName), exist_ok=True)
+    with open(fileName, 'w') as f:
+        json.dump(airport, f, indent=2)
+
+def writeDems(path, bounds, model, size=HGT_SIZE):
+    """Writes the .hgt tiles covering the bounds (plus the terrain buffer), and their download touch files"""
+    os.makedirs(path, exist_ok=True)
+
+    xMin, yMin, xMax, yMax = bounds
+    extent = QgsRectangle(xMin - 0.1, yMin - 0.1, xMax + 0.1, yMax + 0.1)
+
+    for graticule in _getGraticules(extent):
+        name = _getNameFromGraticule(graticule)
+        writeHgt(os.path.join(path, '%s.hgt' % name), graticule['lat'], graticule['lng'], model, size)
+
+        tile = getTile(graticule['lat'], graticule['lng'])
+        if tile:
+            open(os.path.join(path, 'downloaded_%s' % os.path.basename(tile['uri'])), 'a').close()
+
+def writeGshhg(path, bounds, model, lake=True):
+    """Writes the full resolution coastline, lakes and river shapefiles, and the archive's touch file.
+
+    The lakes are empty unless `lake` is specified.
+    """
+    xMin, yMin, xMax, yMax = bounds
+    margin = 1
+    cx = (xMin + xMax) / 2
+    cy = (yMin + yMax) / 2
+
+    # The land is everything east of the coastline
+    ys = [yMin - margin + i * 0.005 for i in range(int((yMax - yMin + 2 * margin) / 0.005) + 1)]
+    coast = [QgsPointXY(model.getCoastX(y), y) for y in ys]
+    land = coast + [QgsPointXY(xMax + margin, ys[-1]), QgsPointXY(xMax + margin, ys[0]), coast[0]]
+    _writeShapefile(_getShorelinePath(path, Resolution.FULL, ShorelineLevel.CONTINENTAL), 'Polygon', [
+        QgsGeometry.fromPolygonXY([land])
+    ])
+
+    ring = [
+        QgsPointXY(cx + 0.1 + 0.04 * math.cos(a), cy + 0.1 + 0.025 * math.sin(a))
+        for a in [i * 2 * math.pi / 48 for i in range(48)]
+    ]
+    _writeShapefile(_getShorelinePath(path, Resolution.FULL, ShorelineLevel.LAKES), 'Polygon', [
+        QgsGeometry.fromPolygonXY([ring + ring[:1]])
+    ] if lake else [])
+
+    # A meandering river for each level, flowing west to the coast
+    for index, level in enumerate([
+            RiverLevel.DOUBLE_LINED_RIVER,
+            RiverLevel.PERMAMENT_MAJOR_RIVER,
+            RiverLevel.ADDITIONAL_MAJOR_RIVER
+    ]):
+        y0 = yMin + (yMax - yMin) * (index + 1) / 4
+        river = [
+            QgsPointXY(x, y0 + 0.02 * math.sin(x * 30))
+            for x in [xMax - i * 0.002 for i in range(int((xMax - model.getCoastX(y0)) / 0.002) + 1)]
+        ]
+        _writeShapefile(_getRiverPath(path, Resolution.FULL, level), 'LineString', [
+            QgsGeometry.fromPolylineXY(river)
+        ])
+
+    open(os.path.join(path, 'downloaded_%s' % _GSHHG_FILE), 'a').close()
+
+def writeHgt(fileName, lat, lng, model, size=HGT_SIZE):
+    """Writes the .hgt tile (big-endian signed 16 bit heights, north to south) for the graticule"""
+    step = 1 / (size - 1)
+    xs = [lng + i * step for i in range(size)]
+    heights = array.array('h')
+
+    for row in range(size):
+        y = lat + 1 - row * step
+        heights.extend(int(round(h)) for h in model.getElevationRow(y, xs))
+
+    if sys.byteorder == 'little':
+        heights.byteswap()
+
+    with open(fileName, 'wb') as f:
+        heights.tofile(f)
+
+#------------------- Private -------------------
+
+def _writeShapefile(fileName, layerType, geometries):
+    """Writes the geometries to a WGS84 shapefile"""
+    os.makedirs(os.path.dirname(fileName), exist_ok=True)
+
+    layer = QgsVectorLayer('%s?crs=epsg:4326' % layerType, os.path.basename(fileName), 'memory')
+    layer.dataProvider().addAttributes([QgsField('id', QVariant.Int)])
+    layer.updateFields()
+
+    features = []
+    for index, geometry in enumerate(geometries):
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(geometry)
+        feature.setAttribute('id', index + 1)
+        features.append(feature)
+
+    layer.dataProvider().addFeatures(features)
+
+    QgsVectorFileWriter.writeAsVectorFormat(
+        layer,
+        fileName,
+        'utf-8',
+        QgsCoordinateReferenceSystem('EPSG:4326'),
+        'ESRI Shapefile'
+    )
@@ -0,0 +1,91 @@
+"""CheckpointManifest tests"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from OpenScope.CheckpointManifest import CheckpointManifest
+
+class CheckpointManifestTest(unittest.TestCase):
+    """A collection of tests for the CheckpointManifest"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.path, 'terrain-checkpoint.json')
+        self.output = os.path.join(self.path, 'Water.gpkg')
+
+        with open(self.output, 'w') as f:
+            f.write('')
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def testComplete(self):
+        """Tests that a completed stage is saved, and loaded by the next run"""
+        inputHash = CheckpointManifest.getHash('Water', ['abc', 'vector'])
+        source = '%s|layername=Water' % self.output
+
+        CheckpointManifest(self.fileName).complete('Water', inputHash, source)
+        manifest = CheckpointManifest(self.fileName)
+
+        self.assertEqual(manifest.getOutput('Water', inputHash), source)
+        self.assertIsNone(manifest.getOutput('Rivers', inputHash))
+
+    def testDisabled(self):
+        """Tests that nothing is saved or loaded when the checkpoints are disabled"""
+        inputHash = CheckpointManifest.getHash('Water', [])
+
+        manifest = CheckpointManifest(self.fileName, False)
+        manifest.complete('Water', inputHash, self.output)
+
+        self.assertFalse(manifest.isEnabled())
+        self.assertFalse(os.path.isfile(self.fileName))
+        self.assertIsNone(manifest.getOutput('Water', inputHash))
+
+    def testInvalidated(self):
+        """Tests that a checkpoint is invalid once the inputs or parameters change, or the output is removed"""
+        inputHash = CheckpointManifest.getHash('Water', ['abc', 'vector', 0.002])
+
+        CheckpointManifest(self.fileName).complete('Water', inputHash, self.output)
+        manifest = CheckpointManifest(self.fileName)
+
+        self.assertIsNone(manifest.getOutput('Water', CheckpointManifest.getHash('Water', ['abd', 'vector', 0.002])))
+        self.assertIsNone(manifest.getOutput('Water', CheckpointManifest.getHash('Water', ['abc', 'raster', 0.002])))
+        self.assertEqual(manifest.getOutput('Water', inputHash), self.output)
+
+        os.unlink(self.output)
+
+        self.assertIsNone(manifest.getOutput('Water', inputHash))
+
+    def testGetHash(self):
+        """Tests that the hash only depends on the inputs"""
+        self.assertEqual(
+            CheckpointManifest.getHash('Water', {'a': 1, 'b': 2}),
+            CheckpointManifest.getHash('Water', {'b': 2, 'a': 1})
+        )
+        self.assertNotEqual(CheckpointManifest.getHash('Water', [1]), CheckpointManifest.getHash('Water', [2]))
+        self.assertNotEqual(CheckpointManifest.getHash('Water', [1]), CheckpointManifest.getHash('Rivers', [1]))
+
+    def testPartialManifest(self):
+        """Tests that a partially written manifest is ignored"""
+        with open(self.fileName, 'w') as f:
+            f.write('{"stages": {"Wat')
+
+        self.assertIsNone(CheckpointManifest(self.fileName).getOutput('Water', CheckpointManifest.getHash()))
+
+    def testClear(self):
+        """Tests that clearing removes the manifest and the checkpoint files, but not the outputs"""
+        manifest = CheckpointManifest(self.fileName)
+        checkpointFile = manifest.getFile('Tiles.gpkg')
+
+        with open(checkpointFile, 'w') as f:
+            f.write('')
+
+        manifest.complete('Water', CheckpointManifest.getHash(), self.output)
+        manifest.clear()
+
+        self.assertFalse(os.path.isfile(self.fileName))
+        self.assertFalse(os.path.isfile(checkpointFile))
+        self.assertTrue(os.path.isfile(self.output))
+        self.assertIsNone(CheckpointManifest(self.fileName).getOutput('Water', CheckpointManifest.getHash()))
@@ -0,0 +1,132 @@
+"""IntermediateStorage tests"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from qgis.core import QgsFeature, QgsGeometry, QgsVectorFileWriter, QgsVectorLayer
+
+from OpenScope.IntermediateStorage import IntermediateStorage, StorageMode
+from .utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+class IntermediateStorageTest(unittest.TestCase):
+    """A collection of tests for the IntermediateStorage"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.projectPath = os.path.join(self.path, 'project')
+        self.scratchPath = os.path.join(self.path, 'scratch')
+
+        os.makedirs(self.projectPath)
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def testAuto(self):
+        """Tests that the auto mode keeps the intermediates in memory until the budget is exceeded"""
+        storage = IntermediateStorage(StorageMode.AUTO, self.scratchPath, budget=100, projectPath=self.projectPath)
+
+        self.assertEqual(storage.getOutput('Contours'), 'memory:')
+        self.assertEqual(storage.getFile('water.tif'), os.path.join(self.projectPath, 'water.tif'))
+
+        layer = QgsVectorLayer('Polygon?crs=epsg:4326', 'Contours', 'memory')
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromWkt('POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))'))
+        layer.dataProvider().addFeatures([feature] * 10)
+
+        storage.track(layer)
+
+        self.assertGreater(storage.getLiveBytes(), 100)
+        self.assertIn(self.scratchPath, storage.getOutput('Contours'))
+        self.assertEqual(storage.getFile('water.tif'), os.path.join(self.scratchPath, 'water.tif'))
+
+        # Releasing the layer brings the intermediates back under the budget
+        storage.release(layer)
+
+        self.assertEqual(storage.getLiveBytes(), 0)
+        self.assertEqual(layer.featureCount(), 0)
+        self.assertEqual(storage.getOutput('Contours'), 'memory:')
+
+    def testMemory(self):
+        """Tests that the memory mode keeps the layers in memory, and the files in the project directory"""
+        storage = IntermediateStorage(projectPath=self.projectPath)
+        existing = os.path.join(self.projectPath, 'water.tif')
+
+        with open(existing, 'w') as f:
+            f.write('')
+
+        self.assertEqual(storage.getOutput('Contours - Clipped'), 'memory:')
+        self.assertEqual(storage.getFile('water.tif'), existing)
+        self.assertFalse(os.path.isfile(existing))
+
+    def testScratch(self):
+        """Tests that the scratch mode writes the layers to unique GeoPackages, with the files alongside"""
+        storage = IntermediateStorage(StorageMode.SCRATCH, self.scratchPath, projectPath=self.projectPath)
+
+        self.assertEqual(
+            storage.getOutput('Contours - Clipped'),
+            'ogr:dbname=\'%s\' table="contours_clipped_1" (geom) sql=' % os.path.join(
+                self.scratchPath, 'contours_clipped_1.gpkg'
+            )
+        )
+        self.assertEqual(
+            storage.getOutput('Contours - Clipped'),
+            'ogr:dbname=\'%s\' table="contours_clipped_2" (geom) sql=' % os.path.join(
+                self.scratchPath, 'contours_clipped_2.gpkg'
+            )
+        )
+
+        path = storage.getFile('water.tif')
+
+        self.assertEqual(path, os.path.join(self.scratchPath, 'water.tif'))
+
+        # Only the scratch files are released
+        with open(path, 'w') as f:
+            f.write('')
+
+        projectFile = os.path.join(self.projectPath, 'Water.gpkg')
+        with open(projectFile, 'w') as f:
+            f.write('')
+
+        storage.release(path, projectFile)
+
+        self.assertFalse(os.path.isfile(path))
+        self.assertTrue(os.path.isfile(projectFile))
+
+        storage.cleanUp()
+
+        self.assertFalse(os.path.isdir(self.scratchPath))
+
+    def testScratchLayer(self):
+        """Tests that releasing a scratch layer removes its GeoPackage"""
+        storage = IntermediateStorage(StorageMode.SCRATCH, self.scratchPath, projectPath=self.projectPath)
+        fileName = os.path.join(self.scratchPath, 'contours_1.gpkg')
+
+        self.assertIn(fileName, storage.getOutput('Contours'))
+
+        layer = QgsVectorLayer('Polygon?crs=epsg:4326', 'Contours', 'memory')
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromWkt('POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))'))
+        layer.dataProvider().addFeatures([feature])
+
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = 'GPKG'
+        options.layerName = 'contours_1'
+        QgsVectorFileWriter.writeAsVectorFormat(layer, fileName, options)
+
+        scratch = QgsVectorLayer('%s|layername=contours_1' % fileName, 'Contours')
+
+        self.assertEqual(scratch.featureCount(), 1)
+
+        storage.release(scratch)
+
+        self.assertFalse(os.path.isfile(fileName))
+
+    def testScratchPathRequired(self):
+        """Tests that the scratch and auto modes require a scratch path"""
+        with self.assertRaises(Exception):
+            IntermediateStorage(StorageMode.SCRATCH)
+
+        with self.assertRaises(Exception):
+            IntermediateStorage(StorageMode.AUTO, budget=1024)
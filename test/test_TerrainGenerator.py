@@ -0,0 +1,193 @@
+"""TerrainGenerator tests"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from qgis.core import (
+    QgsFeature,
+    QgsGeometry,
+    QgsProcessingException,
+    QgsProcessingFeedback,
+    QgsProject,
+    QgsRectangle,
+    QgsVectorLayer,
+    QgsWkbTypes
+)
+
+from .utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+# pylint: disable=wrong-import-position
+from OpenScope.CheckpointManifest import CheckpointManifest
+from OpenScope.headless import initProcessing
+from OpenScope.TerrainGenerator import SimplifyMethod, TerrainGenerator, TerrainGeneratorConfig
+from .fixtures import createFixtures
+# pylint: enable=wrong-import-position
+
+def _getBands(layers):
+    """Gets a dict of the union of the polygons of each elevation in the final contour layers"""
+    bands = {}
+
+    for layer in layers:
+        if not layer.name().endswith(' - Final'):
+            continue
+
+        for f in layer.getFeatures():
+            bands.setdefault(round(f['elevation'], 1), []).append(f.geometry())
+
+    return {elevation: QgsGeometry.unaryUnion(items) for elevation, items in bands.items()}
+
+def _getDifference(bands, expected):
+    """Gets the area of the symmetric difference between the bands and the expected bands"""
+    difference = 0
+
+    for elevation in set(bands) | set(expected):
+        if elevation not in bands:
+            difference += expected[elevation].area()
+        elif elevation not in expected:
+            difference += bands[elevation].area()
+        else:
+            difference += bands[elevation].symDifference(expected[elevation]).area()
+
+    return difference
+
+class TerrainGeneratorTest(unittest.TestCase):
+    """A collection of tests for the TerrainGenerator pipeline stages"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.path, 'terrain-checkpoint.json')
+
+        # The stages don't need an airport
+        self.generator = TerrainGenerator.__new__(TerrainGenerator)
+        self.generator._checkpoints = CheckpointManifest(self.fileName) # pylint: disable=protected-access
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _generate(self, feedback, cancel=False):
+        """Generates a stage's output, cancelling the feedback part way through if specified"""
+        fileName = os.path.join(self.path, 'Water.gpkg')
+
+        with open(fileName, 'w') as f:
+            f.write('')
+
+        if cancel:
+            feedback.cancel()
+
+        return QgsVectorLayer(fileName, 'Water')
+
+    def testRunStage(self):
+        """Tests that a completed stage is recorded, and resumed from"""
+        feedback = QgsProcessingFeedback()
+        runStage = self.generator._runStage # pylint: disable=protected-access
+
+        runStage('Water', ['abc'], lambda: self._generate(feedback), feedback)
+
+        manifest = CheckpointManifest(self.fileName)
+        self.assertIsNotNone(manifest.getOutput('Water', CheckpointManifest.getHash('Water', ['abc'])))
+
+    def testRunStageCancelled(self):
+        """Tests that a stage cancelled part way through isn't recorded, so its partial output isn't resumed from"""
+        feedback = QgsProcessingFeedback()
+        runStage = self.generator._runStage # pylint: disable=protected-access
+
+        with self.assertRaises(QgsProcessingException):
+            runStage('Water', ['abc'], lambda: self._generate(feedback, True), feedback)
+
+        manifest = CheckpointManifest(self.fileName)
+        self.assertIsNone(manifest.getOutput('Water', CheckpointManifest.getHash('Water', ['abc'])))
+
+    def testGetEditWindows(self):
+        """Tests that the windows around the edits are merged where they overlap, including after a merge"""
+        edits = [
+            {'extent': QgsRectangle(0, 0, 1, 1)},
+            {'extent': QgsRectangle(3, 0, 4, 1)},
+            {'extent': QgsRectangle(5, 5, 6, 6)},
+            {'extent': QgsRectangle(1.2, 0, 2.8, 1)}
+        ]
+
+        windows = TerrainGenerator._getEditWindows(edits, 0.25) # pylint: disable=protected-access
+        windows = sorted((w.xMinimum(), w.yMinimum(), w.xMaximum(), w.yMaximum()) for w in windows)
+
+        self.assertEqual(windows, [(-0.25, -0.25, 4.25, 1.25), (4.75, 4.75, 6.25, 6.25)])
+
+class TerrainGenerationTest(unittest.TestCase):
+    """End-to-end tests of the terrain generation, against the synthetic fixtures"""
+
+    @classmethod
+    def setUpClass(cls):
+        initProcessing()
+        cls.path = tempfile.mkdtemp()
+        cls.fixtures = createFixtures(os.path.join(cls.path, 'fixtures'))
+        cls.withoutLake = createFixtures(os.path.join(cls.path, 'fixtures-without-lake'), lake=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path, ignore_errors=True)
+
+    def _generate(self, name, fixtures=None, **settings):
+        """Generates the terrain from the fixtures in its own project, returning the generator"""
+        fixtures = fixtures or self.fixtures
+        config = TerrainGeneratorConfig()
+        config.airportFile = fixtures['airportFile']
+        config.cachePath = fixtures['cachePath']
+        config.projectPath = os.path.join(self.path, name, 'projects')
+        config.tmpPath = os.path.join(self.path, name, 'tmp')
+        config.resume = False
+        config.simplifyMethod = SimplifyMethod.COVERAGE
+
+        for key, value in settings.items():
+            setattr(config, key, value)
+
+        QgsProject.instance().clear()
+
+        terrain = TerrainGenerator(config)
+        terrain.generateTerrain(QgsProcessingFeedback(), terrain.getAirspacePolygons())
+
+        return terrain
+
+    def testTiled(self):
+        """Tests that the contours generated in tiles match those generated in one piece"""
+        self._generate('Untiled')
+        untiled = _getBands(TerrainGenerator.getTerrainLayers())
+
+        self._generate('Tiled', tileSize=0.5, tileWorkers=2)
+        tiled = _getBands(TerrainGenerator.getTerrainLayers())
+
+        self.assertSetEqual(set(tiled), set(untiled))
+
+        area = sum(geometry.area() for geometry in untiled.values())
+
+        self.assertGreater(area, 0)
+        self.assertLess(_getDifference(tiled, untiled), 0.01 * area)
+
+    def testUpdateTerrain(self):
+        """Tests that updating the contours for edits to the water matches generating them with the edited water"""
+        self._generate('Full', maskOcean=True)
+        expected = _getBands(TerrainGenerator.getTerrainLayers())
+        water = TerrainGenerator._getTerrainLayer('Water') # pylint: disable=protected-access
+        withLake = QgsGeometry.unaryUnion([f.geometry() for f in water.getFeatures()])
+
+        # Add the lake's water to the terrain generated without it
+        terrain = self._generate('Updated', self.withoutLake, maskOcean=True)
+        generated = _getBands(TerrainGenerator.getTerrainLayers())
+        water = TerrainGenerator._getTerrainLayer('Water') # pylint: disable=protected-access
+        lake = withLake.difference(QgsGeometry.unaryUnion([f.geometry() for f in water.getFeatures()]))
+
+        if QgsWkbTypes.isMultiType(water.wkbType()):
+            lake.convertToMultiType()
+
+        feature = QgsFeature(water.fields())
+        feature.setGeometry(lake)
+        water.dataProvider().addFeatures([feature])
+
+        replaced = terrain.updateTerrain(QgsProcessingFeedback())
+        updated = _getBands(TerrainGenerator.getTerrainLayers())
+        area = sum(geometry.area() for geometry in expected.values())
+
+        self.assertGreater(lake.area(), 0)
+        self.assertGreater(replaced, 0)
+        self.assertLess(_getDifference(updated, expected), _getDifference(generated, expected))
+        self.assertLess(_getDifference(updated, expected), 0.01 * area)
@@ -0,0 +1,75 @@
+"""Terrain budget utility tests"""
+
+import math
+import unittest
+
+from OpenScope.utilities.budget import (
+    encodeFeature,
+    getEncodedSize,
+    simplifyToBudget,
+    _getTopology,
+    _measure,
+    _simplify
+)
+
+def _getCircle(cx, cy, radius, count):
+    """Gets a closed ring approximating a circle"""
+    angles = [2 * math.pi * i / count for i in range(count)]
+    ring = [(round(cx + radius * math.cos(a), 5), round(cy + radius * math.sin(a), 5)) for a in angles]
+
+    return ring + ring[:1]
+
+_SQUARE = [[(0, 0), (4, 0), (4, 4), (0, 4), (0, 0)], _getCircle(2, 2, 1, 200)]
+_HILL = [_getCircle(2, 2, 1, 200)]
+
+class BudgetTest(unittest.TestCase):
+    """A collection of tests for the terrain budget fuctions"""
+
+    def testEncodeFeature(self):
+        """Tests that the features are encoded as compact GeoJSON with rounded coordinates"""
+
+        self.assertEqual(
+            encodeFeature({'elevation': 0}, [[[(0.123456, 1), (1, 1), (1, 0), (0.123456, 1)]]], 5),
+            '{"type":"Feature","properties":{"elevation":0},"geometry":{"type":"Polygon","coordinates":'
+            '[[[0.12346,1],[1,1],[1,0],[0.12346,1]]]}}'
+        )
+
+    def testMeasure(self):
+        """Tests that the vertices and bytes counted from the significance match the simplified, encoded features"""
+
+        features = [
+            ({'elevation': 0}, [_SQUARE]),
+            ({'elevation': 300}, [_HILL]),
+            ({'elevation': 600}, [[_getCircle(10, 10, 1, 50)], [_getCircle(20, 10, 1, 7)]])
+        ]
+        topology = _getTopology(features, 5)
+
+        for tolerance in [0, 0.001, 0.01, 0.1, 0.6, 1, 2]:
+            measured = _measure(topology, tolerance)
+            simplified = _simplify(topology, tolerance, 5, True)
+
+            self.assertEqual(measured['vertices'], simplified['vertices'])
+            self.assertEqual(measured['bytes'], simplified['bytes'])
+
+    def testSimplifyToBudgetFits(self):
+        """Tests that terrain already within the budget isn't simplified"""
+
+        features = [({'elevation': 0}, [_SQUARE]), ({'elevation': 300}, [_HILL])]
+        result = simplifyToBudget(features, 5, maxVertices=1000)
+
+        self.assertEqual(result['tolerance'], 0)
+        self.assertEqual(result['vertices'], 407)
+
+    def testSimplifyToBudget(self):
+        """Tests that the tolerance is increased until the budgets are met, keeping the shared edges identical"""
+
+        features = [({'elevation': 0}, [_SQUARE]), ({'elevation': 300}, [_HILL])]
+        maxBytes = getEncodedSize(features, 5) // 4
+        result = simplifyToBudget(features, 5, maxVertices=60, maxBytes=maxBytes)
+
+        self.assertGreater(result['tolerance'], 0)
+        self.assertLessEqual(result['vertices'], 60)
+        self.assertLessEqual(result['bytes'], maxBytes)
+
+        square, hill = [polygons[0] for _, polygons in result['features']]
+        self.assertEqual(set(square[1]), set(hill[0]))
@@ -0,0 +1,62 @@
+"""Contour set utility tests"""
+
+import unittest
+
+from OpenScope.utilities.contours import (
+    getContourOptions,
+    getContourSets,
+    getElevationExpression,
+    getLevel,
+    getMinimumLevel
+)
+
+class ContoursTest(unittest.TestCase):
+    """A collection of tests for the contour set fuctions"""
+
+    def testGetContourSets(self):
+        """Tests that getContourSets returns a set for each interval and level list"""
+
+        sets = getContourSets(304.8)
+        self.assertEqual(len(sets), 1)
+        self.assertEqual(sets[0]['name'], 'Contours')
+        self.assertEqual(sets[0]['interval'], 304.8)
+
+        sets = getContourSets(304.8, [152.4, 304.8], [[600, 150, 300, 0]])
+        self.assertEqual([s['name'] for s in sets], ['Contours 152.4 m', 'Contours 304.8 m', 'Contours Levels 1'])
+        self.assertEqual(sets[2]['interval'], None)
+        self.assertEqual(sets[2]['levels'], [150, 300, 600])
+
+        with self.assertRaises(Exception):
+            getContourSets(304.8, [0])
+
+    def testGetContourOptions(self):
+        """Tests that explicit levels are passed to gdal:contour as fixed levels"""
+
+        interval, levels = getContourSets(304.8, [304.8], [[150, 300]])
+
+        self.assertEqual(getContourOptions(interval), {'INTERVAL': 304.8})
+        self.assertEqual(getContourOptions(levels)['EXTRA'], '-fl 150 300')
+
+    def testGetElevation(self):
+        """Tests the elevation expressions and minimum levels"""
+
+        interval, levels = getContourSets(304.8, [304.8], [[150, 300]])
+
+        self.assertEqual(getElevationExpression(interval), 'floor(_mean / 304.800000) * 304.800000')
+        self.assertEqual(
+            getElevationExpression(levels),
+            'CASE WHEN _mean >= 300.000000 THEN 300.000000 WHEN _mean >= 150.000000 THEN 150.000000 ELSE 0 END'
+        )
+        self.assertEqual(getMinimumLevel(interval), 304.8)
+        self.assertEqual(getMinimumLevel(levels), 150)
+
+    def testGetLevel(self):
+        """Tests that the heights are normalised down to the interval or levels, as the elevation expressions"""
+
+        interval, levels = getContourSets(304.8, [304.8], [[150, 300]])
+
+        self.assertEqual(getLevel(interval, 100), 0)
+        self.assertAlmostEqual(getLevel(interval, 700), 609.6)
+        self.assertEqual(getLevel(levels, 100), 0)
+        self.assertEqual(getLevel(levels, 150), 150)
+        self.assertEqual(getLevel(levels, 1000), 300)
@@ -1,7 +1,7 @@
 """DEM utility tests"""
 
 import unittest
-from qgis.core import QgsRectangle
+from qgis.core import QgsGeometry, QgsPointXY, QgsRectangle
 
 from OpenScope.utilities.dem import _getGraticules, _getNameFromGraticule
 from OpenScope.utilities.dem_map import getTile
@@ -76,6 +76,29 @@ class DemTest(unittest.TestCase):
 
         self.assertListEqual(graticules, expected)
 
+    def testGetGraticuleGeometry(self):
+        """Tests that _getGraticules only returns the graticules intersecting the geometry"""
+
+        # A diagonal airspace only intersects the graticules below the hypotenuse
+        geometry = QgsGeometry.fromPolygonXY([[
+            QgsPointXY(0.5, 0.5),
+            QgsPointXY(2.4, 0.5),
+            QgsPointXY(0.5, 2.4),
+            QgsPointXY(0.5, 0.5)
+        ]])
+        expected = [
+            {'lng': 0, 'lat': 0},
+            {'lng': 0, 'lat': 1},
+            {'lng': 0, 'lat': 2},
+            {'lng': 1, 'lat': 0},
+            {'lng': 1, 'lat': 1},
+            {'lng': 2, 'lat': 0},
+        ]
+
+        graticules = _getGraticules(geometry.boundingBox(), geometry)
+
+        self.assertListEqual(graticules, expected)
+
     def testGetNameFromGraticule(self):
         """Tests that _getNameFromGraticule returns the correct string"""
 
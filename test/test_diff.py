@@ -0,0 +1,89 @@
+"""Diff utility tests"""
+
+import unittest
+from PyQt5.QtCore import QVariant
+from qgis.core import NULL, QgsFeature, QgsField, QgsGeometry, QgsVectorLayer, QgsWkbTypes
+
+from OpenScope.utilities.diff import diffTerrain, _getDifference, _getPolygonal, _isSameElevation
+from .utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+def _createLayer(name, polygons):
+    """Creates a polygon memory layer of the (elevation, WKT) tuples"""
+    layer = QgsVectorLayer('Polygon?crs=epsg:4326', name, 'memory')
+    layer.dataProvider().addAttributes([QgsField('elevation', QVariant.Double)])
+    layer.updateFields()
+
+    features = []
+    for elevation, wkt in polygons:
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(QgsGeometry.fromWkt(wkt))
+        feature.setAttributes([elevation])
+        features.append(feature)
+
+    layer.dataProvider().addFeatures(features)
+
+    return layer
+
+class DiffTest(unittest.TestCase):
+    """A collection of tests for the diff fuctions"""
+
+    def testDiffTerrain(self):
+        """Tests the added, removed and changed areas, with each changed area only counted once"""
+
+        generated = _createLayer('Generated', [
+            (609.6, 'POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))'),
+            (NULL, 'POLYGON((5 0, 6 0, 6 1, 5 1, 5 0))')
+        ])
+
+        # The water overlaps the contours
+        existing = _createLayer('Existing', [
+            (0, 'POLYGON((0 0, 1 0, 1 2, 0 2, 0 0))'),
+            (304.8, 'POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))'),
+            (304.8, 'POLYGON((8 0, 9 0, 9 1, 8 1, 8 0))')
+        ])
+
+        summary = diffTerrain([generated], [existing])['summary']
+
+        self.assertAlmostEqual(summary['changed']['area'], 4)
+        self.assertAlmostEqual(summary['added']['area'], 1)
+        self.assertAlmostEqual(summary['removed']['area'], 1)
+        self.assertEqual(summary['generated'], 2)
+        self.assertEqual(summary['existing'], 3)
+
+    def testGetDifference(self):
+        """Tests the part of a polygon not covered by the others"""
+
+        geometry = QgsGeometry.fromWkt('POLYGON((0 0, 4 0, 4 2, 0 2, 0 0))')
+        others = [
+            QgsGeometry.fromWkt('POLYGON((0 0, 1 0, 1 2, 0 2, 0 0))'),
+            QgsGeometry.fromWkt('POLYGON((3 0, 4 0, 4 2, 3 2, 3 0))')
+        ]
+
+        self.assertAlmostEqual(_getDifference(geometry, others).area(), 4)
+        self.assertAlmostEqual(_getDifference(geometry, []).area(), 8)
+        self.assertTrue(_getDifference(geometry, [geometry]).isEmpty())
+
+    def testGetPolygonal(self):
+        """Tests that the lines and points of an intersection are dropped"""
+
+        first = QgsGeometry.fromWkt('POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))')
+        second = QgsGeometry.fromWkt('MULTIPOLYGON(((2 0, 4 0, 4 2, 2 2, 2 0)),((1 1, 3 1, 3 3, 1 3, 1 1)))')
+
+        polygonal = _getPolygonal(first.intersection(second))
+
+        self.assertEqual(polygonal.type(), QgsWkbTypes.PolygonGeometry)
+        self.assertAlmostEqual(polygonal.area(), 1)
+
+        # Only touching
+        touching = QgsGeometry.fromWkt('POLYGON((2 0, 4 0, 4 2, 2 2, 2 0))')
+
+        self.assertTrue(_getPolygonal(first.intersection(touching)).isEmpty())
+
+    def testIsSameElevation(self):
+        """Tests elevations are compared with a tolerance"""
+
+        self.assertTrue(_isSameElevation(304.8, 304.8000001))
+        self.assertFalse(_isSameElevation(304.8, 609.6))
+        self.assertFalse(_isSameElevation(None, 0))
+        self.assertTrue(_isSameElevation(None, None))
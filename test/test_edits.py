@@ -0,0 +1,43 @@
+"""Edits utility tests"""
+
+import unittest
+from qgis.core import QgsGeometry
+
+from OpenScope.utilities.edits import getChangedIds, _getDifference, _getExtent
+
+class EditsTest(unittest.TestCase):
+    """A collection of tests for the edits fuctions"""
+
+    def testGetChangedIds(self):
+        """Tests that the added, changed and removed feature IDs are detected from their hashes"""
+
+        previous = {'1': 'a', '2': 'b', '3': 'c'}
+        current = {'1': 'a', '2': 'x', '4': 'd'}
+
+        self.assertEqual(getChangedIds(previous, current), (['4'], ['2'], ['3']))
+        self.assertEqual(getChangedIds(previous, previous), ([], [], []))
+
+    def testGetDifference(self):
+        """Tests the area added and removed by reshaping a polygon"""
+
+        before = QgsGeometry.fromWkt('POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))')
+        after = QgsGeometry.fromWkt('POLYGON((1 0, 3 0, 3 2, 1 2, 1 0))')
+
+        self.assertAlmostEqual(_getDifference(after, before).area(), 2)
+        self.assertAlmostEqual(_getDifference(before, after).area(), 2)
+        self.assertTrue(_getDifference(QgsGeometry(), before).isEmpty())
+        self.assertEqual(_getDifference(after, QgsGeometry()).area(), 4)
+
+    def testGetExtent(self):
+        """Tests the extent covers the geometry before and after the edit"""
+
+        extent = _getExtent(
+            QgsGeometry.fromWkt('POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))'),
+            QgsGeometry(),
+            QgsGeometry.fromWkt('POLYGON((1 1, 3 1, 3 3, 1 3, 1 1))')
+        )
+
+        self.assertEqual(
+            [extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()],
+            [0, 0, 3, 3]
+        )
@@ -0,0 +1,48 @@
+"""Synthetic fixture tests"""
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from test.fixtures import ElevationModel, writeHgt
+
+class FixturesTest(unittest.TestCase):
+    """A collection of tests for the synthetic benchmark fixtures"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def testElevationModel(self):
+        """Tests that the elevation model is deterministic, with sea west of the coast"""
+        bounds = (-10, 52, -9, 53)
+        model = ElevationModel(bounds, relief=500, seed=3)
+        other = ElevationModel(bounds, relief=500, seed=3)
+
+        self.assertEqual(model.getElevation(-9.2, 52.5), other.getElevation(-9.2, 52.5))
+        self.assertEqual(model.getElevation(-10, 52.5), 0)
+        self.assertGreater(model.getElevation(-9.05, 52.5), 0)
+
+        xs = [-10 + i * 0.1 for i in range(11)]
+        for expected, actual in zip([model.getElevation(x, 52.5) for x in xs], model.getElevationRow(52.5, xs)):
+            self.assertAlmostEqual(expected, actual)
+
+    def testWriteHgt(self):
+        """Tests that writeHgt writes big-endian heights from the north-west corner"""
+        model = ElevationModel((-10, 52, -9, 53), relief=500, seed=3)
+        fileName = os.path.join(self.path, 'N52W010.hgt')
+
+        writeHgt(fileName, 52, -10, model, size=11)
+
+        with open(fileName, 'rb') as f:
+            data = f.read()
+
+        self.assertEqual(len(data), 11 * 11 * 2)
+
+        heights = struct.unpack('>%dh' % (11 * 11), data)
+        self.assertEqual(heights[0], round(model.getElevation(-10, 53)))
+        self.assertEqual(heights[-1], round(model.getElevation(-9, 52)))
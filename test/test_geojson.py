@@ -0,0 +1,28 @@
+"""GeoJSON utility tests"""
+
+import unittest
+from qgis.core import QgsGeometry
+
+from OpenScope.utilities.geojson import getQuantisedGeometry
+
+class GeoJsonTest(unittest.TestCase):
+    """A collection of tests for the GeoJSON fuctions"""
+
+    def testGetQuantisedGeometry(self):
+        """Tests that quantising drops the duplicate vertices, and keeps the rings closed"""
+
+        geometry = QgsGeometry.fromWkt('POLYGON((0 0, 1.000001 0, 1.000002 0, 1 1, 0 1, 0 0))')
+
+        quantised = getQuantisedGeometry(geometry, 5)
+
+        self.assertEqual(quantised.asWkt(5), 'Polygon ((0 0, 1 0, 1 1, 0 1, 0 0))')
+
+    def testGetQuantisedGeometryCollapsed(self):
+        """Tests that rings and geometries smaller than the precision are removed"""
+
+        geometry = QgsGeometry.fromWkt(
+            'POLYGON((0 0, 1 0, 1 1, 0 1, 0 0), (0.5 0.5, 0.500001 0.5, 0.500001 0.500001, 0.5 0.5))'
+        )
+
+        self.assertEqual(getQuantisedGeometry(geometry, 5).asWkt(5), 'Polygon ((0 0, 1 0, 1 1, 0 1, 0 0))')
+        self.assertIsNone(getQuantisedGeometry(QgsGeometry.fromWkt('POLYGON((0 0, 0.000001 0, 0 0.000001, 0 0))'), 5))
@@ -0,0 +1,104 @@
+"""QA utility tests"""
+
+import unittest
+from qgis.core import QgsFeature, QgsGeometry, QgsVectorLayer
+
+from OpenScope.utilities.qa import checkTerrain, _getHoles, _getParts
+from .utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+def _createLayer(name, wkts):
+    """Creates a polygon memory layer of the WKT geometries"""
+    layer = QgsVectorLayer('Polygon?crs=epsg:4326', name, 'memory')
+    features = []
+
+    for wkt in wkts:
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromWkt(wkt))
+        features.append(feature)
+
+    layer.dataProvider().addFeatures(features)
+
+    return layer
+
+class QaTest(unittest.TestCase):
+    """A collection of tests for the QA fuctions"""
+
+    def testCheckTerrain(self):
+        """Tests a known gap, overlap and sliver are found, and the excluded lowland isn't reported as a gap"""
+
+        contours = _createLayer('Contours', [
+            'POLYGON((0 0, 0.6 0, 0.6 1, 0 1, 0 0))',
+            'POLYGON((0.5 0, 1 0, 1 0.5, 0.5 0.5, 0.5 0))', # Overlaps the first
+            'POLYGON((0.6 0.5, 0.601 0.5, 0.601 0.501, 0.6 0.501, 0.6 0.5))' # A sliver
+        ])
+        water = _createLayer('Water', ['POLYGON((2 0, 3 0, 3 1, 2 1, 2 0))'])
+        bounds = QgsGeometry.fromWkt('POLYGON((0 0, 3 0, 3 1, 0 1, 0 0))')
+
+        # The lowland between the contours and the water
+        lowland = QgsGeometry.fromWkt('POLYGON((1 0, 2 0, 2 1, 1 1, 1 0))')
+
+        result = checkTerrain([contours, water], bounds, lowland)
+        summary = result['summary']
+
+        self.assertEqual(summary['polygons'], 4)
+        self.assertEqual(summary['overlap'], 1)
+        self.assertEqual(summary['sliver'], 1)
+        self.assertEqual(summary['gap'], 1)
+
+        issues = {f['type']: f for f in result['issues'].getFeatures()}
+
+        self.assertAlmostEqual(issues['overlap']['area'], 0.05)
+        self.assertEqual(issues['overlap']['layer'], 'Contours')
+        self.assertAlmostEqual(issues['gap']['area'], 0.4 * 0.5 - 0.000001, places=6)
+        self.assertTrue(QgsGeometry.fromWkt('POLYGON((0.6 0.5, 1 0.5, 1 1, 0.6 1, 0.6 0.5))').contains(
+            issues['gap'].geometry()
+        ))
+
+        # Without the lowland the whole uncovered area is a gap, however large
+        result = checkTerrain([contours, water], bounds)
+        gaps = [f['area'] for f in result['issues'].getFeatures() if f['type'] == 'gap']
+
+        self.assertEqual(len(gaps), 1)
+        self.assertAlmostEqual(gaps[0], 1.2 - 0.000001, places=6)
+
+    def testCheckTerrainWater(self):
+        """Tests a sliver of a contour overlapping the water is found, but not a lake drawn over a contour"""
+
+        contours = _createLayer('Contours', ['POLYGON((0 0, 1.001 0, 1.001 1, 0 1, 0 0))'])
+        water = _createLayer('Water', [
+            'POLYGON((1 0, 2 0, 2 1, 1 1, 1 0))', # The sea, overlapping the contour by 0.001 degrees
+            'POLYGON((0.2 0.2, 0.4 0.2, 0.4 0.4, 0.2 0.4, 0.2 0.2))' # A lake
+        ])
+
+        result = checkTerrain([contours, water], water=[water])
+        issues = [f for f in result['issues'].getFeatures() if f['type'] == 'water']
+
+        self.assertEqual(result['summary']['water'], 1)
+        self.assertEqual(result['summary']['overlap'], 0)
+        self.assertAlmostEqual(issues[0]['area'], 0.001)
+        self.assertEqual(issues[0]['layer'], 'Contours')
+
+    def testGetHoles(self):
+        """Tests that the holes in a coverage are returned as polygons"""
+
+        coverage = QgsGeometry.fromWkt(
+            'MULTIPOLYGON(((0 0, 4 0, 4 4, 0 4, 0 0),(1 1, 2 1, 2 2, 1 2, 1 1)),((5 0, 6 0, 6 1, 5 1, 5 0)))'
+        )
+
+        holes = _getHoles(coverage)
+
+        self.assertEqual(len(holes), 1)
+        self.assertAlmostEqual(holes[0].area(), 1)
+        self.assertEqual(_getHoles(QgsGeometry()), [])
+
+    def testGetParts(self):
+        """Tests that only the polygon parts of an intersection are returned"""
+
+        first = QgsGeometry.fromWkt('POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))')
+        second = QgsGeometry.fromWkt('MULTIPOLYGON(((2 0, 4 0, 4 2, 2 2, 2 0)),((1 1, 3 1, 3 3, 1 3, 1 1)))')
+
+        parts = _getParts(first.intersection(second))
+
+        self.assertEqual(len(parts), 1)
+        self.assertAlmostEqual(parts[0].area(), 1)
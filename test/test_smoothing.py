@@ -0,0 +1,34 @@
+"""DEM smoothing utility tests"""
+
+import unittest
+import numpy
+
+from OpenScope.utilities.smoothing import smoothElevation
+
+class SmoothingTest(unittest.TestCase):
+    """A collection of tests for the DEM smoothing fuctions"""
+
+    def testSmoothElevation(self):
+        """Tests that a box filter spreads a spike, and keeps a flat surface flat up to the edges"""
+
+        flat = numpy.full((4, 5), 120, dtype=numpy.int16)
+        self.assertEqual(smoothElevation(flat, 1).tolist(), flat.tolist())
+
+        spike = numpy.zeros((3, 3), dtype=numpy.float32)
+        spike[1, 1] = 900
+
+        smoothed = smoothElevation(spike, 1)
+
+        self.assertEqual(smoothed.dtype, numpy.float32)
+        self.assertAlmostEqual(float(smoothed[1, 1]), 100)
+        self.assertAlmostEqual(float(smoothed[0, 0]), 225)
+
+    def testSmoothElevationNoData(self):
+        """Tests that nodata pixels are left untouched, and excluded from their neighbours' means"""
+
+        elevation = numpy.array([[100, -32768, 300]], dtype=numpy.int16)
+
+        smoothed = smoothElevation(elevation, 1, -32768)
+
+        self.assertEqual(smoothed.tolist(), [[100, -32768, 300]])
+        self.assertEqual(smoothElevation(elevation, 0).tolist(), elevation.tolist())
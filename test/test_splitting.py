@@ -0,0 +1,40 @@
+"""Splitting utility tests"""
+
+import unittest
+from qgis.core import QgsGeometry
+
+from OpenScope.utilities.splitting import getVertexStatistics, splitGeometry
+
+class SplittingTest(unittest.TestCase):
+    """A collection of tests for the splitting fuctions"""
+
+    def testGetVertexStatistics(self):
+        """Tests the statistics of the per-feature vertex counts"""
+
+        statistics = getVertexStatistics([5, 100, 7, 9, 20])
+
+        self.assertEqual(statistics['features'], 5)
+        self.assertEqual(statistics['vertices'], 141)
+        self.assertEqual(statistics['min'], 5)
+        self.assertEqual(statistics['max'], 100)
+        self.assertEqual(statistics['median'], 9)
+        self.assertEqual(statistics['p95'], 100)
+        self.assertEqual(getVertexStatistics([])['features'], 0)
+
+    def testSplitGeometry(self):
+        """Tests that a polygon larger than the maximum size is split into pieces sharing their edges"""
+
+        geometry = QgsGeometry.fromWkt('POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))')
+
+        pieces = splitGeometry(geometry, maxSize=1, precision=5)
+
+        self.assertEqual(len(pieces), 4)
+        self.assertAlmostEqual(sum(piece.area() for piece in pieces), 4)
+        self.assertTrue(pieces[0].touches(pieces[1]))
+
+    def testSplitGeometrySmall(self):
+        """Tests that a polygon within the thresholds isn't split"""
+
+        geometry = QgsGeometry.fromWkt('POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))')
+
+        self.assertEqual(len(splitGeometry(geometry, maxVertices=100, maxSize=2)), 1)
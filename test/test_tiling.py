@@ -0,0 +1,38 @@
+"""Tiling utility tests"""
+
+import unittest
+from qgis.core import QgsPointXY, QgsRectangle
+
+from OpenScope.utilities.tiling import getCutLines, getTiles
+
+class TilingTest(unittest.TestCase):
+    """A collection of tests for the tiling fuctions"""
+
+    def testGetTiles(self):
+        """Tests that getTiles returns equal tiles sharing their edges"""
+
+        tiles = getTiles(QgsRectangle(-10, 50, -7, 52), 2)
+
+        self.assertEqual(len(tiles), 2 * 1 * 2)
+        self.assertEqual([(t['col'], t['row']) for t in tiles], [(0, 0), (1, 0), (0, 1), (1, 1)])
+        self.assertEqual(tiles[0]['xMin'], -10)
+        self.assertEqual(tiles[0]['xMax'], tiles[1]['xMin'])
+        self.assertEqual(tiles[1]['xMax'], -7)
+        self.assertEqual(tiles[0]['yMax'], tiles[2]['yMin'])
+        self.assertEqual(tiles[3]['yMax'], 52)
+
+    def testGetTilesSingle(self):
+        """Tests that getTiles returns a single tile when the bounds are smaller than the tile size"""
+
+        tiles = getTiles(QgsRectangle(-10, 50, -9, 51), 2)
+
+        self.assertEqual(len(tiles), 1)
+        self.assertListEqual(getCutLines(tiles[0]), [])
+
+    def testGetCutLines(self):
+        """Tests that getCutLines only returns the interior edges"""
+
+        tiles = getTiles(QgsRectangle(0, 0, 2, 1), 1)
+
+        self.assertListEqual(getCutLines(tiles[0]), [[QgsPointXY(1, 0), QgsPointXY(1, 1)]])
+        self.assertListEqual(getCutLines(tiles[1]), [[QgsPointXY(1, 0), QgsPointXY(1, 1)]])
@@ -0,0 +1,44 @@
+"""TopoJSON utility tests"""
+
+import unittest
+
+from OpenScope.utilities.topojson import buildTopoJson, decodeArc
+
+_LEFT = [[(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]]
+_RIGHT = [[(1, 0), (2, 0), (2, 1), (1, 1), (1, 0)]]
+
+class TopoJsonTest(unittest.TestCase):
+    """A collection of tests for the TopoJSON fuctions"""
+
+    def testBuildTopoJsonSharesArcs(self):
+        """Tests that the edge shared by adjacent features is only stored once"""
+
+        topology = buildTopoJson([({'elevation': 0}, [_LEFT]), ({'elevation': 300}, [_RIGHT])], 5)
+        geometries = topology['objects']['terrain']['geometries']
+
+        self.assertEqual(topology['type'], 'Topology')
+        self.assertEqual(len(topology['arcs']), 3)
+        self.assertEqual([g['type'] for g in geometries], ['Polygon', 'Polygon'])
+        self.assertEqual([g['properties']['elevation'] for g in geometries], [0, 300])
+
+    def testBuildTopoJsonDecodes(self):
+        """Tests that the delta-encoded, quantised arcs decode to the original coordinates"""
+
+        ring = [(-8.5, 52.25), (-8.25, 52.25), (-8.25, 52.5), (-8.5, 52.25)]
+        topology = buildTopoJson([({}, [[ring]])], 5)
+        points = decodeArc(topology['arcs'][0], topology['transform'])
+
+        self.assertEqual(topology['arcs'][0][0], [0, 0])
+        self.assertEqual(len(points), 4)
+        for point in points:
+            self.assertTrue(any(abs(point[0] - x) < 1e-9 and abs(point[1] - y) < 1e-9 for x, y in ring))
+
+    def testBuildTopoJsonCollapsed(self):
+        """Tests that features smaller than the precision are dropped, and multipart features are kept"""
+
+        tiny = [[(0, 0), (0.000001, 0), (0, 0.000001), (0, 0)]]
+        topology = buildTopoJson([({}, [tiny]), ({}, [_LEFT, [[(5, 5), (6, 5), (6, 6), (5, 5)]]])], 5)
+        geometries = topology['objects']['terrain']['geometries']
+
+        self.assertEqual(len(geometries), 1)
+        self.assertEqual(geometries[0]['type'], 'MultiPolygon')
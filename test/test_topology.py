@@ -0,0 +1,104 @@
+"""Topology utility tests"""
+
+import unittest
+
+from OpenScope.utilities.topology import (
+    buildPolygons,
+    buildTopology,
+    getSignificance,
+    simplifyArcs,
+    simplifyCoverage,
+    simplifyLine
+)
+
+_SHARED = [(1, 0), (1, 0.25), (1.001, 0.5), (1, 0.75), (1, 1)]
+_LEFT = [[(0, 0)] + _SHARED + [(0, 1), (0, 0)]]
+_RIGHT = [[(1, 0), (2, 0), (2, 1), (1, 1), (1, 0.75), (1.001, 0.5), (1, 0.25), (1, 0)]]
+
+class TopologyTest(unittest.TestCase):
+    """A collection of tests for the topology fuctions"""
+
+    def testBuildTopologySharesArcs(self):
+        """Tests that an edge shared by two polygons is stored as a single arc"""
+
+        arcs, shapes = buildTopology([_LEFT, _RIGHT])
+
+        self.assertEqual(len(arcs), 3)
+        self.assertIn(_SHARED, arcs)
+
+        shared = arcs.index(_SHARED)
+        self.assertIn(shared, shapes[0][0])
+        self.assertIn(~shared, shapes[1][0])
+
+    def testBuildPolygonsRoundTrip(self):
+        """Tests that the polygons built from the topology contain the same points"""
+
+        arcs, shapes = buildTopology([_LEFT, _RIGHT])
+        polygons = buildPolygons(arcs, shapes)
+
+        self.assertSetEqual(set(polygons[0][0]), set(_LEFT[0]))
+        self.assertSetEqual(set(polygons[1][0]), set(_RIGHT[0]))
+
+    def testHoleMatchesPolygon(self):
+        """Tests that a hole and the polygon filling it share the same arc"""
+
+        outer = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+        hole = [(2, 2), (2, 4), (4, 4), (4, 2), (2, 2)]
+
+        arcs, shapes = buildTopology([[outer, hole], [list(reversed(hole))]])
+
+        self.assertEqual(len(arcs), 2)
+        self.assertEqual(shapes[0][1], [~shapes[1][0][0]])
+
+    def testGetSignificance(self):
+        """Tests that keeping the points more significant than the tolerance matches simplifyLine"""
+
+        line = [(0, 0), (1, 0.1), (2, 0), (3, 5), (4, 0), (5, 0.3), (6, 0.2), (7, 0)]
+        ring = [(0, 0), (1, 0.1), (2, 0), (2, 1), (1, 1.2), (0, 1), (0, 0)]
+
+        for points in [line, ring]:
+            significance = getSignificance(points)
+
+            for tolerance in [0.05, 0.15, 0.25, 0.5, 2]:
+                kept = [point for point, value in zip(points, significance) if value > tolerance * tolerance]
+                self.assertListEqual(kept, simplifyLine(points, tolerance))
+
+    def testSimplifyArcsCrossing(self):
+        """Tests that an arc isn't simplified if it would cross a nearly parallel arc"""
+
+        # Simplified to a straight line, the first arc would cross the second
+        arcs = [
+            [(0, 0), (5, 0.4), (10, 0)],
+            [(2, 0.1), (8, -0.1)],
+            [(0, 5), (5, 5.4), (10, 5)]
+        ]
+
+        simplified = simplifyArcs(arcs, 0.5)
+
+        self.assertListEqual(simplified[0], arcs[0])
+        self.assertListEqual(simplified[1], arcs[1])
+        self.assertListEqual(simplified[2], [(0, 5), (10, 5)])
+
+    def testSimplifyCoverage(self):
+        """Tests that the shared edge is simplified identically for both polygons"""
+
+        left, right = simplifyCoverage([_LEFT, _RIGHT], 0.01)
+
+        self.assertNotIn((1.001, 0.5), left[0])
+        self.assertNotIn((1.001, 0.5), right[0])
+        self.assertSetEqual(set(left[0]) & set(right[0]), {(1, 0), (1, 1)})
+
+    def testSimplifyLine(self):
+        """Tests that simplifyLine keeps the end points and significant points"""
+
+        line = [(0, 0), (1, 0.1), (2, 0), (3, 5), (4, 0)]
+
+        self.assertListEqual(simplifyLine(line, 0.5), [(0, 0), (2, 0), (3, 5), (4, 0)])
+        self.assertListEqual(simplifyLine(line, 0), line)
+
+    def testSimplifyClosedLine(self):
+        """Tests that a closed line doesn't collapse"""
+
+        ring = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+
+        self.assertListEqual(simplifyLine(ring, 0.5), ring)
@@ -0,0 +1,52 @@
+"""SRTM void filling utility tests"""
+
+import os
+import tempfile
+import unittest
+import numpy
+
+from OpenScope.utilities.voids import VOID, fillVoids, getFilledDem
+
+class VoidsTest(unittest.TestCase):
+    """A collection of tests for the void filling fuctions"""
+
+    def testFillVoids(self):
+        """Tests that the voids are filled from their neighbours, and the valid pixels are unchanged"""
+
+        elevation = numpy.array([
+            [100, 100, 100, 100],
+            [100, VOID, VOID, 200],
+            [100, VOID, VOID, 200],
+            [100, 100, 200, 200]
+        ], dtype=numpy.int16)
+
+        filled = fillVoids(elevation)
+
+        self.assertEqual(filled.dtype, numpy.int16)
+        self.assertFalse((filled == VOID).any())
+        self.assertTrue((filled[elevation != VOID] == elevation[elevation != VOID]).all())
+        self.assertTrue(((filled >= 100) & (filled <= 200)).all())
+        self.assertEqual(elevation[1, 1], VOID)
+
+    def testFillAllVoids(self):
+        """Tests that a tile without any valid pixels is filled with sea level"""
+
+        filled = fillVoids(numpy.full((3, 3), VOID, dtype=numpy.int16))
+
+        self.assertEqual(filled.tolist(), [[0, 0, 0], [0, 0, 0], [0, 0, 0]])
+
+    def testGetFilledDem(self):
+        """Tests that the filled tile is written to, and then reused from, the cache"""
+
+        with tempfile.TemporaryDirectory() as path:
+            fileName = os.path.join(path, 'N52W009.hgt')
+            numpy.array([[10, VOID, 10], [10, 10, 10], [10, 10, 10]], dtype='>i2').tofile(fileName)
+
+            filledFile = getFilledDem(fileName, os.path.join(path, 'filled'))
+            filled = numpy.fromfile(filledFile, dtype='>i2').reshape(3, 3)
+
+            self.assertEqual(filled.tolist(), [[10, 10, 10], [10, 10, 10], [10, 10, 10]])
+
+            mtime = os.path.getmtime(filledFile)
+            self.assertEqual(getFilledDem(fileName, os.path.join(path, 'filled')), filledFile)
+            self.assertEqual(os.path.getmtime(filledFile), mtime)
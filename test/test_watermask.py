@@ -0,0 +1,38 @@
+"""Water mask utility tests"""
+
+import unittest
+import numpy
+from qgis.core import QgsRectangle
+
+from OpenScope.utilities.watermask import computeWaterMask, getRasterSize, getSeaLevelElevation
+
+class WaterMaskTest(unittest.TestCase):
+    """A collection of tests for the water mask fuctions"""
+
+    def testComputeWaterMask(self):
+        """Tests that water is everything that isn't land, plus the lakes"""
+
+        land = numpy.array([[0, 1, 1], [0, 1, 1]], dtype=numpy.uint8)
+        lakes = numpy.array([[0, 0, 1], [0, 0, 0]], dtype=numpy.uint8)
+
+        mask = computeWaterMask(land, lakes)
+
+        self.assertEqual(mask.dtype, numpy.uint8)
+        self.assertEqual(mask.tolist(), [[1, 0, 1], [1, 0, 0]])
+
+    def testGetSeaLevelElevation(self):
+        """Tests that the elevation outside the land is set to sea level, leaving the nodata pixels"""
+
+        elevation = numpy.array([[12, 250, 4], [-32768, 30, -3]], dtype=numpy.int16)
+        land = numpy.array([[0, 1, 0], [0, 1, 1]], dtype=numpy.uint8)
+
+        masked = getSeaLevelElevation(elevation, land, -32768)
+
+        self.assertEqual(masked.dtype, numpy.int16)
+        self.assertEqual(masked.tolist(), [[0, 250, 0], [-32768, 30, -3]])
+
+    def testGetRasterSize(self):
+        """Tests that the grid covers the extent"""
+
+        self.assertEqual(getRasterSize(QgsRectangle(-10, 52, -9, 52.5), 0.002), (500, 250))
+        self.assertEqual(getRasterSize(QgsRectangle(-10, 52, -9.9999, 52.0001), 0.002), (1, 1))
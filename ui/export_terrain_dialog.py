@@ -9,7 +9,7 @@ from qgis.core import (
     QgsWkbTypes
 )
 from .ui_utils import loadUIFormClass
-from ..OpenScope.utilities.exporter import exportTerrain
+from ..OpenScope.utilities.exporter import ExportFormat, exportTerrain
 
 # This loads your .ui file so that PyQt can populate your plugin with the elements from Qt Designer
 FORM_CLASS = loadUIFormClass('export_terrain_dialog')
@@ -45,7 +45,21 @@ class ExportTerrainDialog(QtWidgets.QDialog, FORM_CLASS):
             self.listLayers.selectedItems()
         ))
 
-        exportTerrain(layers, fileName)
+        formats = [
+            item for item, checkBox in [(ExportFormat.GZIP, self.chkGzip), (ExportFormat.TOPOJSON, self.chkTopoJson)]
+            if checkBox.isChecked()
+        ]
+
+        # Zero is no limit
+        exportTerrain(
+            layers,
+            fileName,
+            formats=formats,
+            maxBytes=int(self.spnMaxSize.value() * 1024 * 1024) or None,
+            maxVertices=self.spnMaxVertices.value() or None,
+            maxFeatureVertices=self.spnMaxFeatureVertices.value() or None,
+            maxFeatureSize=self.spnMaxFeatureSize.value() or None
+        )
 
     def _buttonBoxRejected(self):
         """Handler for when the button box is accepted."""
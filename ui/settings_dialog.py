@@ -10,6 +10,9 @@ from .ui_utils import loadUIFormClass
 # This loads your .ui file so that PyQt can populate your plugin with the elements from Qt Designer
 FORM_CLASS = loadUIFormClass('settings_dialog')
 
+# The contour interval (in metres) used if none are set, 1000 ft
+DEFAULT_CONTOUR_INTERVAL = 304.8
+
 class SettingsDialog(QtWidgets.QDialog, FORM_CLASS):
     """The dialog used for configuring settings."""
 
@@ -24,6 +27,10 @@ class SettingsDialog(QtWidgets.QDialog, FORM_CLASS):
         self.txtAirportPath.setText(SettingsDialog.getAirportPath())
         self.txtProjectPath.setText(SettingsDialog.getProjectPath())
         self.txtTempPath.setText(SettingsDialog.getTempPath())
+        self.spnRasterCacheSize.setValue(SettingsDialog.getRasterCacheSize())
+        self.spnRasterThreads.setValue(SettingsDialog.getRasterThreads())
+        self.txtContourIntervals.setText(', '.join('%g' % i for i in SettingsDialog.getContourIntervals()))
+        self.chkPreviewTerrain.setChecked(SettingsDialog.getPreviewTerrain())
 
         self.butSelectAirportPath.clicked.connect(self._butSelectAirportPathClicked)
         self.butSelectTempPath.clicked.connect(self._butSelectTempPathClicked)
@@ -38,6 +45,10 @@ class SettingsDialog(QtWidgets.QDialog, FORM_CLASS):
         SettingsDialog.setAirportPath(self.txtAirportPath.text())
         SettingsDialog.setTempPath(self.txtTempPath.text())
         SettingsDialog.setProjectPath(self.txtProjectPath.text())
+        SettingsDialog.setRasterCacheSize(self.spnRasterCacheSize.value())
+        SettingsDialog.setRasterThreads(self.spnRasterThreads.value())
+        SettingsDialog.setContourIntervals(self.txtContourIntervals.text())
+        SettingsDialog.setPreviewTerrain(self.chkPreviewTerrain.isChecked())
 
     def _buttonBoxRejected(self):
         """Handler for when the button box is accepted."""
@@ -97,6 +108,22 @@ class SettingsDialog(QtWidgets.QDialog, FORM_CLASS):
         """Gets the Airports path"""
         return SettingsDialog._readSetting('airportPath')
 
+    @staticmethod
+    def getContourIntervals():
+        """Gets the list of contour intervals (in metres), invalid values are ignored"""
+        intervals = []
+
+        for item in str(SettingsDialog._readSetting('contourIntervals', '')).split(','):
+            try:
+                value = float(item)
+            except ValueError:
+                continue
+
+            if value > 0:
+                intervals.append(value)
+
+        return intervals or [DEFAULT_CONTOUR_INTERVAL]
+
     @staticmethod
     def getGSHHSPath():
         """Gets the GSHHS path"""
@@ -110,11 +137,26 @@ class SettingsDialog(QtWidgets.QDialog, FORM_CLASS):
             SettingsDialog.getAirportPath()
         )
 
+    @staticmethod
+    def getPreviewTerrain():
+        """Gets a flag indicating whether a terrain preview is generated before refining it in the background"""
+        return str(SettingsDialog._readSetting('previewTerrain', False)).lower() == 'true'
+
     @staticmethod
     def getProjectPath():
         """Gets the Project path"""
         return SettingsDialog._readSetting('projectPath', os.path.expanduser('~/qgsopenscope'))
 
+    @staticmethod
+    def getRasterCacheSize():
+        """Gets the size (in MB) of the GDAL block cache"""
+        return int(SettingsDialog._readSetting('rasterCacheSize', 512))
+
+    @staticmethod
+    def getRasterThreads():
+        """Gets the number of GDAL threads, 0 for all the CPUs"""
+        return int(SettingsDialog._readSetting('rasterThreads', 0))
+
     @staticmethod
     def getTempPath():
         """Gets the temp path"""
@@ -125,6 +167,11 @@ class SettingsDialog(QtWidgets.QDialog, FORM_CLASS):
         """sets the Airports path"""
         SettingsDialog._saveSetting('airportPath', path)
 
+    @staticmethod
+    def setContourIntervals(intervals):
+        """Sets the comma separated list of contour intervals (in metres)"""
+        SettingsDialog._saveSetting('contourIntervals', intervals)
+
     @staticmethod
     def setGSHHSPath(path):
         """Sets the GSHHS path"""
@@ -135,11 +182,26 @@ class SettingsDialog(QtWidgets.QDialog, FORM_CLASS):
         """Sets the path of last airport used"""
         SettingsDialog._saveSetting('lastAirport', path)
 
+    @staticmethod
+    def setPreviewTerrain(preview):
+        """Sets a flag indicating whether a terrain preview is generated before refining it in the background"""
+        SettingsDialog._saveSetting('previewTerrain', preview)
+
     @staticmethod
     def setProjectPath(path):
         """sets the Project path"""
         SettingsDialog._saveSetting('projectPath', path)
 
+    @staticmethod
+    def setRasterCacheSize(size):
+        """Sets the size (in MB) of the GDAL block cache"""
+        SettingsDialog._saveSetting('rasterCacheSize', size)
+
+    @staticmethod
+    def setRasterThreads(threads):
+        """Sets the number of GDAL threads, 0 for all the CPUs"""
+        SettingsDialog._saveSetting('rasterThreads', threads)
+
     @staticmethod
     def setTempPath(path):
         """Sets the temp path"""